@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Solana Vanity Generator hot path
+
+Covers keypair derivation per backend, address encoding, prefix/suffix
+matching and end-to-end ``generate_vanity_address`` at several worker
+counts. Keys come from a ChaCha20 stream keyed by a fixed seed, so every
+run does exactly the same work; results are written as JSON and can be
+compared against a saved baseline to catch regressions.
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from calibration import host_key, runtime_versions
+from vanity_generator import (
+    KEY_BACKENDS,
+    WORKER_BATCH_SIZE,
+    KeySource,
+    PatternMatcher,
+    SolanaVanityGenerator,
+    seed_key,
+    usable_cpu_count,
+)
+
+# Master seed used unless --seed is given
+BENCHMARK_SEED = bytes(32)
+
+# Patterns timed by the matching benchmarks: (name, prefix, suffix, case_sensitive)
+MATCH_PATTERNS = (
+    ("prefix", "ABC", "", True),
+    ("suffix", "", "xyz", True),
+    ("prefix+suffix", "AB", "yz", True),
+    ("any-case", "abc", "", False),
+)
+
+# A pattern no end-to-end run will hit, so every run uses its full budget
+UNMATCHABLE_PREFIX = "zzzzzzzz"
+
+# Relative slowdown reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.05
+
+
+def deterministic_source(seed: bytes, index: int = 0) -> KeySource:
+    """Return the reproducible key source used for worker ``index``"""
+    return KeySource("chacha20", seed_key(seed, index))
+
+
+def time_runs(run: Callable[[], Any], operations: int, repeat: int) -> Tuple[Dict[str, float], Any]:
+    """
+    Time ``run`` ``repeat`` times.
+
+    Args:
+        run (Callable[[], Any]): Does ``operations`` units of work
+        operations (int): Units of work per run
+        repeat (int): Number of runs
+
+    Returns:
+        Tuple[Dict[str, float], Any]: (median/min/max ops per second, last return value)
+    """
+    rates = []
+    value = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        value = run()
+        rates.append(operations / (time.perf_counter() - start_time))
+    return {'value': statistics.median(rates), 'min': min(rates), 'max': max(rates)}, value
+
+
+def bench_derivation(seed: bytes, keys: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time keypair derivation (seed -> raw keypair bytes) for every backend"""
+    results = {}
+    batches = max(1, keys // WORKER_BATCH_SIZE)
+    for backend in KEY_BACKENDS:
+        source = KeySource(backend, seed_key(seed, 0))
+        source.derive(WORKER_BATCH_SIZE)  # warm up
+
+        def run():
+            for _ in range(batches):
+                for keypair in source.derive(WORKER_BATCH_SIZE):
+                    keypair.to_bytes()
+
+        stats, _ = time_runs(run, batches * WORKER_BATCH_SIZE, repeat)
+        results[f"derive/{backend}"] = stats
+    return results
+
+
+def bench_encoding(keypairs: List, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time base58 encoding of public keys, as done for every result shown to users"""
+    stats, _ = time_runs(lambda: [str(keypair.pubkey()) for keypair in keypairs], len(keypairs), repeat)
+    return {"encode/pubkey": stats}
+
+
+def bench_matching(pubkeys: List[bytes], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time PatternMatcher.matches on raw public keys for each pattern kind"""
+    results = {}
+    for name, prefix, suffix, case_sensitive in MATCH_PATTERNS:
+        matches = PatternMatcher(prefix, suffix, case_sensitive).matches
+        stats, hits = time_runs(lambda: sum(1 for raw in pubkeys if matches(raw)), len(pubkeys), repeat)
+        # Same seed, same keys: the hit count must not change between runs
+        stats['matches'] = hits
+        results[f"match/{name}"] = stats
+    return results
+
+
+def bench_end_to_end(seed: bytes, attempts: int, worker_counts: List[int],
+                     repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Time full generate_vanity_address runs, including worker start-up"""
+    results = {}
+    for workers in worker_counts:
+        generator = SolanaVanityGenerator(max_attempts=attempts, workers=workers,
+                                          backend="chacha20", seed=seed)
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                return generator.generate_vanity_address(UNMATCHABLE_PREFIX)
+
+        stats, _ = time_runs(run, attempts, repeat)
+        results[f"end-to-end/workers={workers}"] = stats
+    return results
+
+
+def run_suite(seed: bytes = BENCHMARK_SEED, keys: int = 50000, attempts: int = 200000,
+              worker_counts: Optional[List[int]] = None, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Run every benchmark.
+
+    Args:
+        seed (bytes): Master seed for all key sources
+        keys (int): Keys per derivation/encoding/matching run
+        attempts (int): Budget of each end-to-end run
+        worker_counts (Optional[List[int]]): Worker counts for end-to-end runs
+        repeat (int): Runs per benchmark; the median is reported
+
+    Returns:
+        Dict[str, Any]: Run metadata and ``results`` keyed by benchmark name
+    """
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, usable_cpu_count()})
+
+    keypairs = deterministic_source(seed).derive(keys)
+    pubkeys = [keypair.to_bytes()[32:] for keypair in keypairs]
+
+    results = {}
+    for name, bench in (
+        ("derivation", lambda: bench_derivation(seed, keys, repeat)),
+        ("encoding", lambda: bench_encoding(keypairs, repeat)),
+        ("matching", lambda: bench_matching(pubkeys, repeat)),
+        ("end-to-end", lambda: bench_end_to_end(seed, attempts, worker_counts, repeat)),
+    ):
+        print(f"🔧 Running {name} benchmarks...")
+        for key, stats in bench().items():
+            results[key] = stats
+            print(f"⏱️ {key:<26} {stats['value']:>14,.0f} ops/sec")
+
+    return {
+        'created': time.time(),
+        'host': host_key(),
+        'versions': runtime_versions(),
+        'config': {'seed': seed.hex(), 'keys': keys, 'attempts': attempts,
+                   'worker_counts': worker_counts, 'repeat': repeat},
+        'results': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Compare two suite runs and print the change of every benchmark.
+
+    Args:
+        baseline (Dict[str, Any]): The saved run
+        current (Dict[str, Any]): The new run
+        threshold (float): Relative slowdown counted as a regression
+
+    Returns:
+        List[str]: Names of the benchmarks that regressed
+    """
+    if baseline.get('host') != current.get('host'):
+        print("⚠️ Baseline was recorded on a different host; numbers may not be comparable")
+    if baseline.get('config') != current.get('config'):
+        print("⚠️ Baseline used a different configuration; numbers may not be comparable")
+
+    regressions = []
+    print(f"\n📊 Change against baseline (regression below -{threshold:.0%}):")
+    for name, stats in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            print(f"  {name:<26} new")
+            continue
+        change = stats['value'] / old['value'] - 1
+        # A different hit count means the run no longer does the same work
+        mismatch = 'matches' in stats and stats['matches'] != old.get('matches')
+        if change < -threshold or mismatch:
+            regressions.append(name)
+        print(f"  {'❌' if name in regressions else '✅'} {name:<26} {change:+7.1%}")
+        if mismatch:
+            print(f"     ⚠️ {stats['matches']} matches, baseline had {old.get('matches')}")
+    return regressions
+
+
+def main():
+    """Run the suite, optionally saving or comparing results"""
+    parser = argparse.ArgumentParser(description="Benchmark the vanity generation hot path")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a saved JSON baseline")
+    parser.add_argument("--results", help="compare this saved run instead of running the suite")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument("--seed", default=BENCHMARK_SEED.hex(), help="master seed as hex")
+    parser.add_argument("--keys", type=int, default=50000, help="keys per micro-benchmark run")
+    parser.add_argument("--attempts", type=int, default=200000, help="budget of each end-to-end run")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts for end-to-end runs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    args = parser.parse_args()
+
+    print("🚀 Solana Vanity Generator - Benchmark Suite")
+    print("=" * 50)
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(bytes.fromhex(args.seed), args.keys, args.attempts, args.workers, args.repeat)
+
+    results = current['results']
+    baseline_rate = results["derive/keypair"]['value']
+    print("\n📊 Gain over per-key Keypair():")
+    for backend in KEY_BACKENDS[1:]:
+        print(f"  {backend:>8}: {(results[f'derive/{backend}']['value'] / baseline_rate - 1) * 100:+.1f}%")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,24 @@
 Simple Telegram Bot for Solana Vanity Generator
 """
 
+import asyncio
+import io
 import logging
 import os
+from typing import Optional
+from aiohttp import web
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
+from telegram.request import BaseRequest
 from dotenv import load_dotenv
-from vanity_generator import SolanaVanityGenerator
+from vanity_generator import SolanaVanityGenerator, format_duration, format_stages
+from compute_daemon import COMPUTE_SOCKET, ComputeClient, ComputeError
+from generation_service import AdmissionRejected, SearchCancelled
+from quotas import QuotaExceeded
+from inventory import Inventory
+from edit_scheduler import EditScheduler
+from metrics import CONTENT_TYPE, Registry
+from profiler import hottest_frames
 
 # Load environment variables
 load_dotenv()
@@ -26,9 +38,127 @@ SOLANA_NETWORK = os.getenv('SOLANA_NETWORK', 'mainnet-beta')
 MAX_ATTEMPTS = int(os.getenv('MAX_ATTEMPTS', '1000000'))
 MAX_PREFIX_LENGTH = int(os.getenv('MAX_PREFIX_LENGTH', '8'))
 
+# Telegram user ids allowed to run admin commands (/profile), comma-separated
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+
+# Local port serving Prometheus metrics on /metrics; 0 disables it
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9101'))
+
+# Updates handled at once; a /generate waits for its search, so this bounds
+# the searches one bot keeps in flight (1 handles updates one at a time)
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '256'))
+
 # Initialize the vanity generator
 vanity_generator = SolanaVanityGenerator(max_attempts=MAX_ATTEMPTS)
 
+# Pre-mined short-prefix keypairs, handed out before starting a live search
+inventory = Inventory()
+
+# Searches run in the compute daemon (compute_daemon.py), so they survive bot restarts
+compute = ComputeClient(name="bot")
+
+# Progress edits are coalesced and paced to stay within Telegram's rate limits
+edits = EditScheduler()
+
+# The bot's own metrics; /metrics adds the compute daemon's
+metrics = Registry()
+requests_metric = metrics.counter(
+    'vanity_frontend_requests_total',
+    'Generate requests, by outcome (invalid, rate_limited, inventory, rejected, unavailable or search)',
+    ('outcome',)
+)
+compute_up_metric = metrics.gauge('vanity_compute_up', 'Whether the compute daemon answered the scrape')
+metrics_runner = None
+
+def format_pattern(prefix: str, suffix: str, case_sensitive: bool = True) -> str:
+    """Format the requested prefix/suffix as message lines"""
+    lines = ""
+    if prefix:
+        lines += f"📝 **Prefix:** `{prefix}`\n"
+    if suffix:
+        lines += f"🔚 **Suffix:** `{suffix}`\n"
+    if not case_sensitive:
+        lines += "🔡 **Case:** bebas (huruf besar/kecil)\n"
+    return lines
+
+def format_progress(prefix: str, suffix: str, case_sensitive: bool, progress: dict) -> str:
+    """Format a running (or queued) search's live statistics"""
+    pattern_text = format_pattern(prefix, suffix, case_sensitive)
+    if progress['position']:
+        return (
+            f"🕒 **Menunggu giliran...**\n\n"
+            f"{pattern_text}"
+            f"📋 **Posisi antrian:** #{progress['position']}"
+        )
+    
+    text = (
+        f"🔍 **Generating vanity address...**\n\n"
+        f"{pattern_text}"
+        f"📊 **Attempts:** {progress['attempts']:,}\n"
+        f"⚡ **Kecepatan:** {progress['keys_per_second']:,.0f} keys/sec\n"
+        f"🎯 **Peluang sejauh ini:** {progress['probability']:.0%}\n"
+    )
+    if progress['keys_per_second'] > 0:
+        # Matches are memoryless: the remaining time never depends on the attempts already made
+        estimate = vanity_generator.estimate(prefix, suffix, case_sensitive, progress['keys_per_second'])
+        median = format_duration(estimate['median_seconds'])
+        text += (f"⏱️ **ETA:** {median if median.startswith('<') else '~' + median} "
+                 f"(90%: {format_duration(estimate['p90_seconds'])})\n")
+    return text + f"🔄 **Status:** Searching... ({format_duration(progress['elapsed'])})"
+
+def format_estimate(prefix: str, suffix: str, case_sensitive: bool, keys_per_second: Optional[float]) -> str:
+    """
+    Format the estimated time line from the pattern's exact odds and the workers' measured rate.
+    
+    Empty until the daemon knows its rate: measuring it here would block the event loop.
+    """
+    if not keys_per_second:
+        return ""
+    estimated_time = vanity_generator.estimate_generation_time(prefix, suffix, case_sensitive, keys_per_second)
+    return f"⏱️ **Estimated time:** {estimated_time}\n"
+
+def format_rejection(prefix: str, suffix: str, case_sensitive: bool, admission: dict) -> str:
+    """Format the reply to a search that admission control turned away, with its estimate"""
+    pattern_text = format_pattern(prefix, suffix, case_sensitive)
+    if admission['reason'] == 'busy':
+        return (
+            f"⏳ **Antrian sedang penuh**\n\n"
+            f"{pattern_text}"
+            f"📋 **Perkiraan tunggu:** {format_duration(admission['wait_seconds'])}\n\n"
+            f"Silakan coba lagi nanti."
+        )
+    text = (
+        f"🚫 **Pola terlalu sulit**\n\n"
+        f"{pattern_text}"
+        f"🎯 **Peluang berhasil:** {admission['success_probability']:.1%} dalam {MAX_ATTEMPTS:,} percobaan\n"
+    )
+    if admission['keys_per_second']:
+        estimate = vanity_generator.estimate(prefix, suffix, case_sensitive, admission['keys_per_second'])
+        text += f"⏱️ **Perkiraan waktu tanpa batas:** ~{format_duration(estimate['median_seconds'])}\n"
+    return text + "\nCoba dengan prefix atau suffix yang lebih pendek, atau tambahkan `-i` agar huruf besar/kecil diabaikan."
+
+def format_success(keypair, pattern_text: str, stats_text: str) -> str:
+    """Format the message that delivers a generated keypair"""
+    public_key = str(keypair.pubkey())
+    private_key = vanity_generator.format_private_key(keypair)
+    return f"""
+✅ **Vanity Address Generated Successfully!**
+
+{pattern_text}{stats_text}🌐 **Network:** {SOLANA_NETWORK}
+
+🔑 **Public Key:**
+`{public_key}`
+
+🔐 **Private Key:**
+`{private_key}`
+
+⚠️ **Security Warning:**
+• Jaga kerahasiaan private key Anda
+• Jangan bagikan private key kepada siapapun
+• Simpan di tempat yang aman
+• Gunakan hardware wallet untuk jumlah besar
+"""
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /start command"""
     welcome_text = f"""
@@ -46,7 +176,8 @@ Selamat datang! Saya adalah bot untuk menghasilkan alamat Solana dengan prefix y
 📏 **Max Prefix:** {MAX_PREFIX_LENGTH} karakter
 
 **Perintah:**
-• `/generate <prefix>` - Generate alamat dengan prefix
+• `/generate <prefix> [suffix]` - Generate alamat dengan prefix/suffix
+• `/cancel` - Batalkan pencarian Anda yang sedang berjalan
 • `/help` - Bantuan lengkap
 • `/status` - Status bot
 
@@ -67,11 +198,19 @@ async def generate_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    prefix = context.args[0].upper()
+    # `/generate [-i] <prefix> [suffix]`; `*` as the prefix for a suffix-only search,
+    # `-i` to accept any letter case
+    args = [arg for arg in context.args if arg not in ('-i', '--any-case')]
+    case_sensitive = len(args) == len(context.args)
+    prefix = args[0] if args else ''
+    if prefix == '*':
+        prefix = ''
+    suffix = args[1] if len(args) > 1 else ''
     
-    # Validate prefix
-    is_valid, error_message = vanity_generator.validate_prefix(prefix)
+    # Validate prefix and suffix
+    is_valid, error_message = vanity_generator.validate_pattern(prefix, suffix, case_sensitive)
     if not is_valid:
+        requests_metric.inc('invalid')
         await update.message.reply_text(
             f"❌ **Error:** {error_message}\n\n"
             "Gunakan hanya huruf dan angka (A-Z, a-z, 1-9)\n"
@@ -80,75 +219,262 @@ async def generate_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
+    pattern_text = format_pattern(prefix, suffix, case_sensitive)
+    
+    # Per-user rate limit, kept by the daemon so every front end shares it
+    try:
+        await compute.admit(update.effective_user.id)
+    except QuotaExceeded as e:
+        requests_metric.inc('rate_limited')
+        await update.message.reply_text(
+            f"⏳ **Terlalu banyak permintaan.** Silakan coba lagi dalam {format_duration(e.retry_after or 0)}.",
+            parse_mode='Markdown'
+        )
+        return
+    except (OSError, ComputeError) as e:
+        # Stock can still be served; the search below reports the outage
+        logger.warning(f"Could not check rate limit: {e}")
+    
+    # Short prefixes are often already in stock
+    inventory.record_demand(prefix)
+    keypair = inventory.take(prefix, suffix, case_sensitive)
+    if keypair:
+        requests_metric.inc('inventory')
+        await update.message.reply_text(
+            format_success(keypair, pattern_text, "⚡ **Langsung dari stok**\n"), parse_mode='Markdown'
+        )
+        return
+    
+    # Accept, queue or reject up front, before any CPU goes into the search
+    try:
+        admission = await compute.admission(prefix, suffix, case_sensitive, update.effective_user.id)
+    except (OSError, ComputeError) as e:
+        requests_metric.inc('unavailable')
+        logger.error(f"Compute daemon unavailable at {COMPUTE_SOCKET}: {e}")
+        await update.message.reply_text(
+            "❌ **Error:** Mesin pencarian sedang tidak tersedia. Silakan coba lagi nanti.",
+            parse_mode='Markdown'
+        )
+        return
+    if admission['decision'] == 'reject':
+        requests_metric.inc('rejected')
+        await update.message.reply_text(
+            format_rejection(prefix, suffix, case_sensitive, admission), parse_mode='Markdown'
+        )
+        return
+    
+    requests_metric.inc('search')
+    estimate_text = format_estimate(prefix, suffix, case_sensitive, admission['keys_per_second'])
+    if admission['decision'] == 'queue':
+        status_text = f"📋 **Posisi antrian:** #{admission['position']}"
+        if admission['wait_seconds'] is not None:
+            status_text += f" (tunggu ~{format_duration(admission['wait_seconds'])})"
+    else:
+        status_text = "🔄 **Status:** Searching..."
+    
     # Send initial message
     status_message = await update.message.reply_text(
         f"🔍 **Generating vanity address...**\n\n"
-        f"📝 **Prefix:** `{prefix}`\n"
-        f"⏱️ **Estimated time:** {vanity_generator.estimate_generation_time(prefix)}\n"
-        f"🔄 **Status:** Searching...",
+        f"{pattern_text}"
+        f"{estimate_text}"
+        f"{status_text}",
         parse_mode='Markdown'
     )
     
+    await run_generation(
+        status_message, prefix, suffix, case_sensitive,
+        task_id=f"tg_{update.effective_chat.id}_{update.message.message_id}",
+        user_id=update.effective_user.id,
+        chat_id=update.effective_chat.id,
+        keys_per_second=admission['keys_per_second'],
+    )
+
+async def run_generation(status_message, prefix: str, suffix: str, case_sensitive: bool,
+                         task_id: str, user_id, chat_id, keys_per_second: Optional[float] = None):
+    """
+    Run a search and edit ``status_message`` with its queue position and result.
+    
+    ``keys_per_second`` is the daemon's rate from admission, for the estimate
+    shown while queued; without it (resumed searches, or no rate measured
+    yet) no estimate is shown.
+    """
+    pattern_text = format_pattern(prefix, suffix, case_sensitive)
+    estimate_text = format_estimate(prefix, suffix, case_sensitive, keys_per_second)
+    
     try:
-        # Generate the vanity address
-        keypair, attempts, time_taken = vanity_generator.generate_vanity_address(prefix)
+        # Queue the search in the daemon; resubmitting a running task just waits for it again.
+        # The chat id lets a restarted bot deliver the result
+        future = await compute.submit(
+            prefix, suffix, case_sensitive, task_id=task_id, user_id=user_id,
+            context={'chat_id': chat_id}
+        )
+        position = await compute.queue_position(task_id)
+        if position:
+            edits.update(
+                status_message,
+                f"🕒 **Menunggu giliran...**\n\n"
+                f"{pattern_text}"
+                f"{estimate_text}"
+                f"📋 **Posisi antrian:** #{position}",
+                parse_mode='Markdown'
+            )
+        
+        # Live statistics until the result arrives; polled no faster than edits are sent
+        while not (await asyncio.wait({future}, timeout=edits.message_interval))[0]:
+            try:
+                progress = await compute.progress(task_id)
+            except (OSError, ComputeError) as e:
+                logger.warning(f"No progress for {task_id}: {e}")
+                continue
+            if progress:
+                edits.update(status_message, format_progress(prefix, suffix, case_sensitive, progress),
+                             parse_mode='Markdown')
+        result = future.result()
+        keypair, attempts, time_taken = result
         
         if keypair:
             # Success
-            public_key = str(keypair.pubkey())
-            private_key = vanity_generator.format_private_key(keypair)
+            stats_text = f"📊 **Attempts:** {attempts:,}\n⏱️ **Time:** {time_taken:.2f} seconds\n"
+            if result.stages:
+                stats_text += f"🧪 **Per key:** {format_stages(result.stages, attempts)}\n"
+            success_text = format_success(keypair, pattern_text, stats_text)
             
-            success_text = f"""
-✅ **Vanity Address Generated Successfully!**
-
-📝 **Prefix:** `{prefix}`
-📊 **Attempts:** {attempts:,}
-⏱️ **Time:** {time_taken:.2f} seconds
-🌐 **Network:** {SOLANA_NETWORK}
-
-🔑 **Public Key:**
-`{public_key}`
-
-🔐 **Private Key:**
-`{private_key}`
-
-⚠️ **Security Warning:**
-• Jaga kerahasiaan private key Anda
-• Jangan bagikan private key kepada siapapun
-• Simpan di tempat yang aman
-• Gunakan hardware wallet untuk jumlah besar
-"""
-            
-            await status_message.edit_text(success_text, parse_mode='Markdown')
+            await edits.finish(status_message, success_text, parse_mode='Markdown')
             
         else:
             # Failed
-            await status_message.edit_text(
+            await edits.finish(
+                status_message,
                 f"❌ **Generation Failed**\n\n"
-                f"📝 **Prefix:** `{prefix}`\n"
+                f"{pattern_text}"
                 f"📊 **Attempts:** {attempts:,}\n"
                 f"⏱️ **Time:** {time_taken:.2f} seconds\n\n"
-                f"Tidak dapat menemukan alamat dengan prefix tersebut dalam {MAX_ATTEMPTS:,} percobaan.\n"
-                f"Coba dengan prefix yang lebih pendek.",
+                f"Tidak dapat menemukan alamat dengan pola tersebut dalam {MAX_ATTEMPTS:,} percobaan.\n"
+                f"Coba dengan prefix atau suffix yang lebih pendek.",
                 parse_mode='Markdown'
             )
             
+    except SearchCancelled:
+        await edits.finish(
+            status_message,
+            f"🛑 **Pencarian dibatalkan**\n\n"
+            f"{pattern_text}"
+            f"Gunakan `/generate` untuk memulai pencarian baru.",
+            parse_mode='Markdown'
+        )
+    except AdmissionRejected as e:
+        # The queue filled up between the first check and the submit
+        await edits.finish(
+            status_message, format_rejection(prefix, suffix, case_sensitive, e.admission), parse_mode='Markdown'
+        )
+    except QuotaExceeded as e:
+        if e.retry_after is None:
+            reason = "Pola ini terlalu mahal untuk kuota CPU harian Anda. Coba prefix atau suffix yang lebih pendek."
+        else:
+            reason = f"Kuota CPU Anda habis. Silakan coba lagi dalam {format_duration(e.retry_after)}."
+        await edits.finish(
+            status_message,
+            f"⏳ **Kuota terlampaui**\n\n"
+            f"{pattern_text}"
+            f"{reason}",
+            parse_mode='Markdown'
+        )
+    except (OSError, ComputeError) as e:
+        logger.error(f"Compute daemon unavailable at {COMPUTE_SOCKET}: {e}")
+        await edits.finish(
+            status_message,
+            "❌ **Error:** Mesin pencarian sedang tidak tersedia. Silakan coba lagi nanti.",
+            parse_mode='Markdown'
+        )
     except Exception as e:
         logger.error(f"Error in generation: {e}")
-        await status_message.edit_text(
+        await edits.finish(
+            status_message,
             f"❌ **Error occurred during generation**\n\n"
             f"Error: {str(e)}\n\n"
             f"Silakan coba lagi atau hubungi admin.",
             parse_mode='Markdown'
         )
 
+async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the /cancel command: stop the user's searches in this chat"""
+    user_id = str(update.effective_user.id)
+    try:
+        cancelled = 0
+        for task in await compute.tasks():
+            if (task['user_id'] == user_id and not task['finished']
+                    and (task['context'] or {}).get('chat_id') == update.effective_chat.id):
+                # The search's own status message reports the cancellation
+                cancelled += await compute.cancel(task['task_id'], user_id)
+    except (OSError, ComputeError) as e:
+        logger.error(f"Compute daemon unavailable at {COMPUTE_SOCKET}: {e}")
+        await update.message.reply_text(
+            "❌ **Error:** Mesin pencarian sedang tidak tersedia. Silakan coba lagi nanti.",
+            parse_mode='Markdown'
+        )
+        return
+    
+    if cancelled:
+        await update.message.reply_text(f"🛑 **{cancelled} pencarian dibatalkan.**", parse_mode='Markdown')
+    else:
+        await update.message.reply_text("ℹ️ Tidak ada pencarian Anda yang sedang berjalan.")
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the /profile command: sample the compute workers and send the collapsed stacks (admins only)"""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        await update.message.reply_text("❌ Perintah ini hanya untuk admin.")
+        return
+    try:
+        duration = float(context.args[0]) if context.args else 10.0
+    except ValueError:
+        await update.message.reply_text("❌ Contoh: `/profile 10`", parse_mode='Markdown')
+        return
+    
+    status_message = await update.message.reply_text(f"🔬 Profiling workers for {duration:g}s...")
+    try:
+        profile = await compute.profile(duration)
+    except (OSError, ComputeError, asyncio.TimeoutError) as e:
+        await status_message.edit_text(f"❌ Profiling failed: {e}")
+        return
+    if not profile:
+        await status_message.edit_text("ℹ️ No samples: the workers were idle. Profile while a search is running.")
+        return
+    
+    hottest = "\n".join(f"{share:6.1%}  `{frame}`" for frame, share in hottest_frames(profile))
+    await status_message.edit_text(f"🔬 **Hottest frames**\n\n{hottest}", parse_mode='Markdown')
+    # Collapsed stacks for flamegraph.pl, speedscope and similar tools
+    await update.message.reply_document(io.BytesIO(profile.encode()), filename="workers.folded")
+
+async def resume_searches(application: Application):
+    """Pick up the searches the daemon kept running (or finished) while the bot was down"""
+    try:
+        tasks = await compute.tasks()
+    except (OSError, ComputeError) as e:
+        logger.error(f"Compute daemon unavailable at {COMPUTE_SOCKET}: {e}")
+        return
+    for task in tasks:
+        chat_id = (task['context'] or {}).get('chat_id')
+        if chat_id is None:
+            continue
+        status_message = await application.bot.send_message(
+            chat_id,
+            f"♻️ **Melanjutkan pencarian setelah restart...**\n\n"
+            f"{format_pattern(task['prefix'], task['suffix'], task['case_sensitive'])}"
+            f"📊 **Attempts so far:** {task['attempts']:,}",
+            parse_mode='Markdown'
+        )
+        application.create_task(run_generation(
+            status_message, task['prefix'], task['suffix'], task['case_sensitive'],
+            task['task_id'], task['user_id'], chat_id
+        ))
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /help command"""
     help_text = """
 📖 **Solana Vanity Generator - Help**
 
 **Cara Penggunaan:**
-1. Gunakan `/generate <prefix>` untuk generate alamat
+1. Gunakan `/generate <prefix> [suffix]` untuk generate alamat
 2. Tunggu proses selesai
 3. Salin public dan private key yang dihasilkan
 
@@ -156,9 +482,13 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • `/generate ABC` - Generate alamat dengan prefix "ABC"
 • `/generate 123` - Generate alamat dengan prefix "123"
 • `/generate SOL` - Generate alamat dengan prefix "SOL"
+• `/generate AB XY` - Prefix "AB" dan suffix "XY"
+• `/generate * XYZ` - Hanya suffix "XYZ"
+• `/generate -i sol` - Prefix "sol" huruf besar/kecil bebas (lebih cepat)
 
 **Tips untuk Generate Lebih Cepat:**
-• Gunakan prefix pendek (2-4 karakter)
+• Gunakan prefix/suffix pendek (total 2-4 karakter)
+• Tambahkan `-i` jika huruf besar/kecil tidak penting
 • Hanya gunakan huruf dan angka (A-Z, a-z, 1-9)
 • Hindari karakter: 0, O, I, l
 
@@ -167,6 +497,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • 3 karakter: ~10-60 detik
 • 4 karakter: ~1-10 menit
 • 5+ karakter: ~10+ menit
+• Perkiraan median/90%/99% untuk pola Anda ditampilkan saat `/generate`
 
 **Keamanan:**
 • Private key adalah kunci rahasia yang nyata
@@ -176,7 +507,8 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 **Perintah:**
 • `/start` - Pesan selamat datang
-• `/generate <prefix>` - Generate alamat
+• `/generate <prefix> [suffix]` - Generate alamat
+• `/cancel` - Batalkan pencarian yang sedang berjalan
 • `/help` - Bantuan ini
 • `/status` - Status bot
 
@@ -187,6 +519,12 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle the /status command"""
+    try:
+        stats = await compute.stats()
+        engine_text = f"⚙️ **Pencarian aktif:** {stats['active']}\n📋 **Antrian:** {stats['queued']}"
+    except (OSError, ComputeError) as e:
+        logger.warning(f"Compute daemon unavailable at {COMPUTE_SOCKET}: {e}")
+        engine_text = "⚠️ **Mesin pencarian:** tidak tersedia"
     status_text = f"""
 🤖 **Bot Status**
 
@@ -195,6 +533,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 🔧 **Max Attempts:** {MAX_ATTEMPTS:,}
 📏 **Max Prefix Length:** {MAX_PREFIX_LENGTH}
 📱 **Version:** 1.0.0
+{engine_text}
 
 **Fitur Aktif:**
 • ✅ Vanity address generation
@@ -223,6 +562,41 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='Markdown'
     )
 
+async def metrics_handler(request):
+    """Serve the bot's and the compute daemon's metrics in the Prometheus text format"""
+    try:
+        daemon_text = await compute.metrics()
+        compute_up_metric.set(1)
+    except (OSError, ComputeError) as e:
+        logger.warning(f"No metrics from the compute daemon: {e}")
+        daemon_text = ''
+        compute_up_metric.set(0)
+    return web.Response(body=(metrics.render() + daemon_text).encode(), headers={'Content-Type': CONTENT_TYPE})
+
+async def start_metrics_server():
+    """Serve /metrics on localhost:METRICS_PORT"""
+    global metrics_runner
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler)
+    metrics_runner = web.AppRunner(app)
+    await metrics_runner.setup()
+    await web.TCPSite(metrics_runner, 'localhost', METRICS_PORT).start()
+    logger.info(f"Metrics served on http://localhost:{METRICS_PORT}/metrics")
+
+async def post_init(application: Application):
+    """Start the metrics server and pick up searches left running by the last run"""
+    if METRICS_PORT:
+        await start_metrics_server()
+    await resume_searches(application)
+
+async def shutdown(application: Application):
+    """Disconnect from the compute daemon (searches keep running there) when the bot shuts down"""
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    await edits.stop()
+    await compute.close()
+    inventory.close()
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors"""
     logger.error(f"Update {update} caused error {context.error}")
@@ -234,6 +608,39 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode='Markdown'
         )
 
+def build_application(request: Optional[BaseRequest] = None) -> Application:
+    """
+    Create the Application with the bot's handlers.
+    
+    Updates are handled concurrently, so a /generate waiting for its search
+    doesn't hold up other users' commands or the user's own /cancel.
+    
+    Args:
+        request (Optional[BaseRequest]): Transport for Bot API calls (the default HTTP one if None)
+    
+    Returns:
+        Application: The application, ready to poll
+    """
+    builder = Application.builder().token(TELEGRAM_TOKEN).concurrent_updates(CONCURRENT_UPDATES)
+    if request is not None:
+        builder = builder.request(request)
+    application = builder.post_init(post_init).post_shutdown(shutdown).build()
+    
+    # Add command handlers
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("generate", generate_command))
+    application.add_handler(CommandHandler("cancel", cancel_command))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("status", status_command))
+    application.add_handler(CommandHandler("profile", profile_command))
+    
+    # Add message handler for non-command messages
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    
+    # Add error handler
+    application.add_error_handler(error_handler)
+    return application
+
 def main():
     """Start the bot"""
     print("🔍 Debug: Starting bot initialization...")
@@ -248,22 +655,14 @@ def main():
     print(f"🌐 Network: {SOLANA_NETWORK}")
     print(f"📏 Max Prefix Length: {MAX_PREFIX_LENGTH}")
     
+    # Searches, calibration and the inventory miner live in the compute daemon
+    print(f"🔌 Compute daemon: {COMPUTE_SOCKET}")
+    print(f"📦 Inventory: {inventory.size()} keypairs in stock")
+    
     # Create the Application
     print("🔧 Creating Telegram application...")
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
-    
-    # Add command handlers
-    print("📝 Adding command handlers...")
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(CommandHandler("generate", generate_command))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("status", status_command))
-    
-    # Add message handler for non-command messages
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-    
-    # Add error handler
-    application.add_error_handler(error_handler)
+    print(f"🔀 Concurrent updates: {CONCURRENT_UPDATES}")
+    application = build_application()
     
     # Start the bot
     logger.info("Starting Solana Vanity Generator Bot...")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Throughput calibration for the Solana Vanity Generator
+
+Benchmarks every key backend and a few worker counts on this host and
+saves the result to a small JSON profile keyed by host and CPU. The bots
+load the profile at startup and only re-calibrate when it is missing or
+stale, so accurate ETAs cost a few seconds once per host.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from importlib import metadata
+from vanity_generator import KEY_BACKENDS, WORKER_BATCH_SIZE, KeySource, SolanaVanityGenerator, usable_cpu_count
+
+logger = logging.getLogger(__name__)
+
+# Where profiles are stored and how long they stay valid
+PROFILE_PATH = os.getenv(
+    'CALIBRATION_PROFILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calibration_profile.json')
+)
+PROFILE_MAX_AGE = float(os.getenv('CALIBRATION_MAX_AGE_DAYS', '7')) * 86400
+
+# Seconds spent on each backend / worker count
+CALIBRATION_DURATION = 1.0
+
+def cpu_model() -> str:
+    """Return the CPU model name, as precisely as the platform allows"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_key() -> str:
+    """Return the key a profile is stored under: host, CPU model and usable cores"""
+    return f"{socket.gethostname()}|{cpu_model()}|{usable_cpu_count()}"
+
+
+def runtime_versions() -> Dict[str, str]:
+    """Return the versions that affect throughput; a change invalidates the profile"""
+    try:
+        solders_version = metadata.version('solders')
+    except metadata.PackageNotFoundError:
+        solders_version = 'unknown'
+    return {'python': platform.python_version(), 'solders': solders_version}
+
+
+def measure_backend(backend: str, duration: float = CALIBRATION_DURATION) -> float:
+    """Return keys per second for one backend on a single core"""
+    source = KeySource(backend)
+    source.derive(WORKER_BATCH_SIZE)  # warm up
+
+    keys = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < duration:
+        for keypair in source.derive(WORKER_BATCH_SIZE):
+            keypair.to_bytes()
+        keys += WORKER_BATCH_SIZE
+    return keys / (time.perf_counter() - start_time)
+
+
+def _calibration_worker(backend: str, duration: float, start_event, result_queue):
+    """Worker process body: wait for the common start, then measure for ``duration`` seconds"""
+    start_event.wait()
+    result_queue.put(measure_backend(backend, duration))
+
+
+def measure_workers(backend: str, workers: int, duration: float = CALIBRATION_DURATION) -> float:
+    """Return total keys per second with ``workers`` processes running at once"""
+    ctx = multiprocessing.get_context("spawn")
+    start_event = ctx.Event()
+    result_queue = ctx.Queue()
+    processes = [
+        ctx.Process(target=_calibration_worker, args=(backend, duration, start_event, result_queue), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Process start-up is excluded: everyone begins counting together
+    start_event.set()
+
+    total = sum(result_queue.get(timeout=duration + 60) for _ in processes)
+    for process in processes:
+        process.join()
+    return total
+
+
+def worker_counts() -> List[int]:
+    """Return the worker counts worth trying on this host"""
+    cores = usable_cpu_count()
+    return sorted({1, max(1, cores // 2), cores})
+
+
+def calibrate(duration: float = CALIBRATION_DURATION) -> Dict[str, Any]:
+    """
+    Benchmark every backend and worker count on this host.
+
+    Args:
+        duration (float): Seconds spent on each measurement
+
+    Returns:
+        Dict[str, Any]: The host profile
+    """
+    print("🔧 Calibrating key generation throughput...")
+    backends = {}
+    for backend in KEY_BACKENDS:
+        backends[backend] = measure_backend(backend, duration)
+        print(f"⏱️ {backend:>8}: {backends[backend]:,.0f} keys/sec (1 core)")
+    best_backend = max(backends, key=backends.get)
+
+    workers = {}
+    for count in worker_counts():
+        workers[str(count)] = measure_workers(best_backend, count, duration)
+        print(f"⏱️ {count:>3} workers: {workers[str(count)]:,.0f} keys/sec")
+    best_workers = max(workers, key=workers.get)
+
+    return {
+        'created': time.time(),
+        'versions': runtime_versions(),
+        'backends': backends,
+        'workers': workers,
+        'best_backend': best_backend,
+        'best_workers': int(best_workers),
+        'keys_per_second': workers[best_workers],
+    }
+
+
+def load_profile(path: str = PROFILE_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Load this host's profile if it exists and is still valid.
+
+    A profile is stale when it is older than ``PROFILE_MAX_AGE`` or was
+    measured with a different Python or solders version.
+
+    Returns:
+        Optional[Dict[str, Any]]: The profile, or None
+    """
+    try:
+        with open(path) as f:
+            profile = json.load(f).get(host_key())
+    except (OSError, ValueError):
+        return None
+
+    if not profile:
+        return None
+    if time.time() - profile.get('created', 0) > PROFILE_MAX_AGE:
+        return None
+    if profile.get('versions') != runtime_versions():
+        return None
+    return profile
+
+
+def save_profile(profile: Dict[str, Any], path: str = PROFILE_PATH):
+    """Store this host's profile, keeping profiles of other hosts in the file"""
+    try:
+        with open(path) as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        profiles = {}
+
+    profiles[host_key()] = profile
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_or_calibrate(path: str = PROFILE_PATH, force: bool = False,
+                      duration: float = CALIBRATION_DURATION) -> Dict[str, Any]:
+    """
+    Return a valid profile for this host, calibrating only when needed.
+
+    Args:
+        path (str): Profile file
+        force (bool): Re-calibrate even if a valid profile exists
+        duration (float): Seconds spent on each measurement
+
+    Returns:
+        Dict[str, Any]: The host profile
+    """
+    profile = None if force else load_profile(path)
+    if profile is None:
+        profile = calibrate(duration)
+        try:
+            save_profile(profile, path)
+        except OSError as e:
+            logger.warning(f"Could not save calibration profile: {e}")
+    return profile
+
+
+def apply_profile(profile: Dict[str, Any], generator: SolanaVanityGenerator, service=None):
+    """
+    Configure a generator (and a not yet started generation service) from a profile.
+
+    Args:
+        profile (Dict[str, Any]): The host profile
+        generator (SolanaVanityGenerator): Generator used for searches and estimates
+        service (Optional[GenerationService]): Shared key stream to configure
+    """
+    if generator.seed is None:
+        # A seeded generator keeps the chacha20 stream its runs are replayed from
+        generator.backend = profile['best_backend']
+    generator.workers = profile['best_workers']
+    generator.keys_per_second = profile['keys_per_second']
+    if service is not None:
+        service.backend = profile['best_backend']
+        service.workers = profile['best_workers']
+
+
+def main():
+    """Calibrate this host and print the profile"""
+    parser = argparse.ArgumentParser(description="Calibrate key generation throughput for this host")
+    parser.add_argument("--force", action="store_true", help="re-calibrate even if the profile is fresh")
+    parser.add_argument("--duration", type=float, default=CALIBRATION_DURATION,
+                        help="seconds per measurement")
+    parser.add_argument("--profile", default=PROFILE_PATH, help="profile file")
+    args = parser.parse_args()
+
+    print("🚀 Solana Vanity Generator - Calibration")
+    print("=" * 50)
+    print(f"🖥️ Host: {host_key()}")
+
+    profile = load_or_calibrate(args.profile, args.force, args.duration)
+    print(f"\n📊 Best backend: {profile['best_backend']}")
+    print(f"📊 Best worker count: {profile['best_workers']}")
+    print(f"📊 Throughput: {profile['keys_per_second']:,.0f} keys/sec")
+    print(f"💾 Profile: {args.profile}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
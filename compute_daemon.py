@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Compute daemon for the Solana Vanity Generator
+
+Owns the key-grinding worker pool (the generation service and the
+inventory miner) and serves the Telegram front ends over a Unix socket.
+The front ends are thin clients: they can be restarted or scaled without
+killing the searches they started.
+
+The protocol is one JSON object per line. A client sends requests with an
+``id`` and an ``op`` and gets one response per request with the same
+``id``; ``ok`` is false and ``error`` set if the request failed (plus
+``quota`` with ``reason`` and ``retry_after`` if a user limit refused it,
+or ``admission`` if admission control turned the search away). Finished
+searches are pushed as ``{"event": "result", ...}`` lines to every
+connection watching the task. Results of tasks nobody is watching are kept
+for ``RESULT_RETENTION`` seconds so a restarted front end can collect them.
+
+    python compute_daemon.py
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Set, Tuple
+from solders.keypair import Keypair
+from config import MAX_ATTEMPTS
+from vanity_generator import PatternMatcher, SearchResult, SolanaVanityGenerator, format_duration
+from generation_service import AdmissionRejected, GenerationService, SearchCancelled, expected_attempts
+from quotas import QUOTA_SAVE_INTERVAL, QuotaExceeded
+
+logger = logging.getLogger(__name__)
+
+# Unix socket the daemon listens on; created with owner-only permissions since results carry private keys
+COMPUTE_SOCKET = os.getenv(
+    'COMPUTE_SOCKET',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compute.sock')
+)
+
+# Longest message line either side accepts, in bytes (worker profiles can be sizeable)
+MAX_MESSAGE = 1024 * 1024
+
+# Seconds a finished task's result waits for a front end to collect it
+RESULT_RETENTION = 3600.0
+
+# Seconds a client waits for a response before giving up
+REQUEST_TIMEOUT = 10.0
+
+# Seconds a client waits between attempts to reconnect to the daemon
+RECONNECT_DELAY = 1.0
+
+
+class ComputeError(Exception):
+    """The daemon rejected a request or lost a task"""
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """Serialise a message as one protocol line"""
+    return (json.dumps(message) + '\n').encode()
+
+
+def _result_event(task_id: str, future: Future) -> Dict[str, Any]:
+    """Turn a finished service future into a result event"""
+    event = {'event': 'result', 'task_id': task_id}
+    try:
+        result = future.result()
+    except SearchCancelled:
+        return {**event, 'cancelled': True}
+    except Exception as e:
+        return {**event, 'error': str(e)}
+    keypair, attempts, time_taken = result
+    return {**event, 'secret': bytes(keypair).hex() if keypair else None,
+            'attempts': attempts, 'time_taken': time_taken, 'stages': getattr(result, 'stages', None)}
+
+
+class ComputeDaemon:
+    """
+    Serves a :class:`GenerationService` to front ends over a Unix socket.
+
+    Requests (besides ``id`` and ``op``):
+
+    - ``admit``: user_id; takes one of the user's request tokens
+    - ``admission``: prefix, suffix, case_sensitive, user_id; answers
+      ``admission``, see ``GenerationService.admission``
+    - ``submit``: prefix, suffix, case_sensitive, task_id, user_id, client,
+      context; queues the search and watches it. Resubmitting a task that is
+      still running (or finished but uncollected) only watches it. A new
+      search is refused if admission control rejects it or its expected
+      CPU time exceeds the user's quota.
+    - ``watch``: task_id; answers ``known``
+    - ``position`` / ``progress``: task_id; see the service's methods
+    - ``stats``: active, queued and keys_per_second
+    - ``tasks``: client; the client's unfinished and uncollected tasks
+    - ``metrics``: answers ``text``, the service's metrics in the
+      Prometheus text format
+    - ``profile``: duration; samples the workers' stacks for that many
+      seconds and answers ``profile``, the collapsed stacks. Other requests
+      are answered in the meantime.
+    - ``cancel``: task_id, optionally user_id (which must own the task);
+      answers ``cancelled``. Watchers get a result event with ``cancelled``.
+    """
+
+    def __init__(self, service: GenerationService, path: str = COMPUTE_SOCKET,
+                 keys_per_second: Optional[float] = None):
+        self.service = service
+        self.path = path
+        # Calibrated throughput, reported until the service has measured its own
+        self.keys_per_second = keys_per_second
+        # Tasks submitted and not yet collected, by task id
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._watchers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        # Finished tasks nobody has collected yet: (finish time, result event)
+        self._results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._profiling: Set[asyncio.Task] = set()
+        self._server = None
+        self._loop = None
+        self._housekeeping = None
+
+    async def start(self):
+        """Listen on the socket and resume the searches checkpointed by the last run"""
+        if os.path.exists(self.path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.path)
+                writer.close()
+                raise RuntimeError(f"A compute daemon is already listening on {self.path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+
+        self._loop = asyncio.get_running_loop()
+        self.service.start()
+        self._server = await asyncio.start_unix_server(self._serve, self.path, limit=MAX_MESSAGE)
+        os.chmod(self.path, 0o600)
+        self._housekeeping = asyncio.create_task(self._run_housekeeping())
+
+        for checkpoint in self.service.checkpoints():
+            wrapped = checkpoint.get('context') or {}
+            self._submit(checkpoint['prefix'], checkpoint['suffix'], checkpoint['case_sensitive'],
+                         checkpoint['task_id'], checkpoint['user_id'], wrapped.get('client'),
+                         wrapped.get('context'), checkpoint)
+        logger.info(f"Compute daemon listening on {self.path} ({len(self._tasks)} searches resumed)")
+
+    async def stop(self):
+        """Stop accepting clients and stop the service (checkpointing searches if it has a store)"""
+        if self._housekeeping is not None:
+            self._housekeeping.cancel()
+            await asyncio.gather(self._housekeeping, return_exceptions=True)
+            self._housekeeping = None
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        await asyncio.get_running_loop().run_in_executor(None, self.service.stop)
+        if self.service.quotas is not None:
+            try:
+                self.service.quotas.save()
+            except OSError as e:
+                logger.error(f"Could not save quota state: {e}")
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _submit(self, prefix: str, suffix: str, case_sensitive: bool, task_id: str,
+                user_id: Optional[str], client: Optional[str], context: Optional[Dict[str, Any]],
+                checkpoint: Optional[Dict[str, Any]] = None):
+        """Queue a search and deliver its result to the watchers when it finishes"""
+        # The client name travels in the checkpoint so resumed tasks find their front end
+        future = self.service.submit(prefix, suffix, case_sensitive, task_id, user_id,
+                                     {'client': client, 'context': context}, checkpoint)
+        self._tasks[task_id] = {
+            'task_id': task_id, 'user_id': user_id, 'client': client, 'context': context,
+            'prefix': prefix, 'suffix': suffix, 'case_sensitive': case_sensitive,
+        }
+        future.add_done_callback(lambda done: self._loop.call_soon_threadsafe(self._finished, task_id, done))
+
+    def _finished(self, task_id: str, future: Future):
+        """Push a finished task's result to its watchers, or keep it until someone collects it"""
+        if future.cancelled():
+            # Checkpointed on shutdown; the next run resumes it
+            return
+        event = _result_event(task_id, future)
+        # Nobody needs to collect a cancellation later
+        if self._deliver(task_id, event) or event.get('cancelled'):
+            self._tasks.pop(task_id, None)
+        else:
+            self._results[task_id] = (time.time(), event)
+
+    def _deliver(self, task_id: str, event: Dict[str, Any]) -> bool:
+        """Send a result event to the task's watchers; return whether anyone got it"""
+        delivered = False
+        for writer in self._watchers.pop(task_id, ()):
+            if not writer.is_closing():
+                writer.write(_encode(event))
+                delivered = True
+        return delivered
+
+    def _watch(self, task_id: str, writer: asyncio.StreamWriter) -> bool:
+        """Watch a task for ``writer``; an uncollected result is sent straight away"""
+        if task_id in self._results:
+            _, event = self._results.pop(task_id)
+            self._tasks.pop(task_id, None)
+            writer.write(_encode(event))
+            return True
+        if task_id not in self._tasks:
+            return False
+        self._watchers.setdefault(task_id, set()).add(writer)
+        return True
+
+    async def _run_housekeeping(self):
+        """Periodically drop stale results and save the quota state"""
+        while True:
+            await asyncio.sleep(QUOTA_SAVE_INTERVAL)
+            self._purge_results()
+            if self.service.quotas is not None:
+                await self._loop.run_in_executor(None, self.service.quotas.maybe_save)
+
+    def expected_cpu_seconds(self, prefix: str, suffix: str, case_sensitive: bool) -> Optional[float]:
+        """Return the CPU seconds a search is expected to cost, or None before throughput is known"""
+        keys_per_second = self.service.keys_per_second() or self.keys_per_second
+        if not keys_per_second:
+            return None
+        probability = PatternMatcher(prefix, suffix, case_sensitive).match_probability()
+        attempts = expected_attempts(probability, self.service.max_attempts)
+        # keys_per_second is the whole pool's rate; each worker is one CPU
+        return attempts * self.service.workers / keys_per_second
+
+    def _admission(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Run admission control for a submit or admission request"""
+        return self.service.admission(request.get('prefix', ''), request.get('suffix', ''),
+                                      bool(request.get('case_sensitive', True)), request.get('user_id'),
+                                      self.keys_per_second)
+
+    def _purge_results(self):
+        """Forget results nobody collected in time"""
+        cutoff = time.time() - RESULT_RETENTION
+        for task_id, (finished, _) in list(self._results.items()):
+            if finished < cutoff:
+                del self._results[task_id]
+                self._tasks.pop(task_id, None)
+
+    def _handle(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> Dict[str, Any]:
+        """Run one request and return the response fields"""
+        op = request.get('op')
+        task_id = request.get('task_id')
+        if op == 'submit':
+            if task_id is None:
+                raise ComputeError("submit needs a task_id")
+            if task_id not in self._tasks:
+                user_id = request.get('user_id')
+                admission = self._admission(request)
+                if admission['decision'] == 'reject':
+                    if admission['reason'] == 'unlikely':
+                        message = (f"Only {admission['success_probability']:.1%} chance of a match within "
+                                   f"{self.service.max_attempts:,} attempts")
+                    else:
+                        message = f"Search queue is full (expected wait {format_duration(admission['wait_seconds'])})"
+                    raise AdmissionRejected(message, admission)
+                if self.service.quotas is not None and user_id is not None:
+                    expected = self.expected_cpu_seconds(request.get('prefix', ''), request.get('suffix', ''),
+                                                         bool(request.get('case_sensitive', True)))
+                    self.service.quotas.check_cpu(user_id, expected or 0.0)
+                self._submit(request.get('prefix', ''), request.get('suffix', ''),
+                             bool(request.get('case_sensitive', True)), task_id, request.get('user_id'),
+                             request.get('client'), request.get('context'))
+            # Respond before a result that is already waiting
+            self._loop.call_soon(self._watch, task_id, writer)
+            return {}
+        if op == 'admit':
+            if self.service.quotas is not None:
+                self.service.quotas.check_request(request.get('user_id'))
+            return {}
+        if op == 'admission':
+            return {'admission': self._admission(request)}
+        if op == 'watch':
+            known = task_id in self._tasks
+            if known:
+                self._loop.call_soon(self._watch, task_id, writer)
+            return {'known': known}
+        if op == 'position':
+            return {'position': self.service.queue_position(task_id)}
+        if op == 'progress':
+            return {'progress': self.service.progress(task_id)}
+        if op == 'stats':
+            return {
+                'active': self.service.active_jobs(),
+                'queued': self.service.queued_jobs(),
+                'keys_per_second': self.service.keys_per_second() or self.keys_per_second or 0.0,
+            }
+        if op == 'metrics':
+            return {'text': self.service.metrics_text()}
+        if op == 'cancel':
+            task = self._tasks.get(task_id)
+            if task is None:
+                return {'cancelled': False}
+            user_id = request.get('user_id')
+            if user_id is not None and task['user_id'] != user_id:
+                raise ComputeError("Task belongs to another user")
+            return {'cancelled': self.service.cancel(task_id)}
+        if op == 'tasks':
+            self._purge_results()
+            client = request.get('client')
+            tasks = []
+            for task in self._tasks.values():
+                if task['client'] != client:
+                    continue
+                progress = self.service.progress(task['task_id'])
+                tasks.append({**task, 'attempts': progress['attempts'] if progress else 0,
+                              'finished': task['task_id'] in self._results})
+            return {'tasks': tasks}
+        raise ComputeError(f"Unknown op: {op}")
+
+    async def _profile(self, request: Dict[str, Any], writer: asyncio.StreamWriter):
+        """Profile the workers for the requested seconds and send the collapsed stacks"""
+        request_id = request.get('id')
+        try:
+            text = await self._loop.run_in_executor(None, self.service.profile, float(request.get('duration', 10)))
+            response = {'id': request_id, 'ok': True, 'profile': text}
+        except (RuntimeError, ValueError, TypeError) as e:
+            response = {'id': request_id, 'ok': False, 'error': str(e)}
+        if not writer.is_closing():
+            writer.write(_encode(response))
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer one client's requests until it disconnects"""
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    request_id = request.get('id')
+                    if request.get('op') == 'profile':
+                        # Takes seconds; answered in the background so the client's other requests go on
+                        task = asyncio.create_task(self._profile(request, writer))
+                        self._profiling.add(task)
+                        task.add_done_callback(self._profiling.discard)
+                        continue
+                    response = {'id': request_id, 'ok': True, **self._handle(request, writer)}
+                except AdmissionRejected as e:
+                    response = {'id': request_id, 'ok': False, 'error': str(e), 'admission': e.admission}
+                except QuotaExceeded as e:
+                    response = {'id': request_id, 'ok': False, 'error': str(e),
+                                'quota': {'reason': e.reason, 'retry_after': e.retry_after}}
+                except (ComputeError, ValueError, TypeError) as e:
+                    response = {'id': request_id, 'ok': False, 'error': str(e)}
+                writer.write(_encode(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            logger.warning(f"Client connection dropped: {e}")
+        finally:
+            self._clients.discard(writer)
+            for writers in self._watchers.values():
+                writers.discard(writer)
+            writer.close()
+
+
+class ComputeClient:
+    """
+    A front end's connection to the compute daemon.
+
+    Connects on first use and reconnects in the background when the daemon
+    restarts, re-watching every task it is still waiting for.
+    """
+
+    def __init__(self, path: str = COMPUTE_SOCKET, name: str = "default"):
+        self.path = path
+        self.name = name
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._connect_lock = None
+        self._request_ids = itertools.count(1)
+        self._requests: Dict[int, asyncio.Future] = {}
+        # Futures of submitted or watched tasks, by task id
+        self._results: Dict[str, asyncio.Future] = {}
+        self._closed = False
+
+    async def _connect(self):
+        """Open the connection if it is not open"""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            if self._closed:
+                raise ComputeError("Client is closed")
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE)
+            self._reader_task = asyncio.create_task(self._read())
+            # Results of tasks started before a reconnect still have to arrive
+            for task_id in list(self._results):
+                asyncio.create_task(self._rewatch(task_id))
+
+    async def _read(self):
+        """Route responses and result events until the connection drops"""
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get('event') == 'result':
+                    self._resolve(message)
+                    continue
+                future = self._requests.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError) as e:
+            logger.warning(f"Compute daemon connection failed: {e}")
+        finally:
+            self._writer.close()
+            self._reader = self._writer = None
+            for future in self._requests.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Lost connection to the compute daemon"))
+            self._requests.clear()
+            if self._results and not self._closed:
+                asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """Keep trying to reconnect while tasks are outstanding"""
+        while self._results and not self._closed and self._writer is None:
+            await asyncio.sleep(RECONNECT_DELAY)
+            try:
+                await self._connect()
+            except OSError:
+                continue
+
+    async def _rewatch(self, task_id: str):
+        """Watch a task again after a reconnect; fail it if the daemon no longer knows it"""
+        try:
+            response = await self._request('watch', task_id=task_id)
+        except (ConnectionError, ComputeError):
+            return
+        future = self._results.get(task_id)
+        if not response['known'] and future is not None and not future.done():
+            del self._results[task_id]
+            future.set_exception(ComputeError("The compute daemon lost this search"))
+
+    def _resolve(self, event: Dict[str, Any]):
+        """Complete a task's future from its result event"""
+        future = self._results.pop(event['task_id'], None)
+        if future is None or future.done():
+            return
+        if event.get('cancelled'):
+            future.set_exception(SearchCancelled(f"Search {event['task_id']} was cancelled"))
+            return
+        if 'error' in event:
+            future.set_exception(ComputeError(event['error']))
+            return
+        keypair = Keypair.from_bytes(bytes.fromhex(event['secret'])) if event['secret'] else None
+        future.set_result(SearchResult(keypair, event['attempts'], event['time_taken'], event.get('stages')))
+
+    async def _request(self, op: str, timeout: float = REQUEST_TIMEOUT, **fields) -> Dict[str, Any]:
+        """Send a request and wait up to ``timeout`` seconds for its response"""
+        await self._connect()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._requests[request_id] = future
+        self._writer.write(_encode({'id': request_id, 'op': op, **fields}))
+        await self._writer.drain()
+        try:
+            response = await asyncio.wait_for(future, timeout)
+        finally:
+            self._requests.pop(request_id, None)
+        if not response.get('ok'):
+            if 'admission' in response:
+                raise AdmissionRejected(response.get('error', 'Search rejected'), response['admission'])
+            if 'quota' in response:
+                quota = response['quota']
+                raise QuotaExceeded(response.get('error', 'Quota exceeded'), quota['reason'], quota['retry_after'])
+            raise ComputeError(response.get('error', 'Request failed'))
+        return response
+
+    def _result_future(self, task_id: str) -> asyncio.Future:
+        """Return the future a task's result event will complete"""
+        future = self._results.get(task_id)
+        if future is None:
+            future = self._results[task_id] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def submit(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True,
+                     task_id: Optional[str] = None, user_id: Optional[str] = None,
+                     context: Optional[Dict[str, Any]] = None) -> asyncio.Future:
+        """
+        Queue a search on the daemon.
+
+        Args:
+            prefix (str): The desired (validated) prefix
+            suffix (str): The desired (validated) suffix
+            case_sensitive (bool): Whether letters must match in case
+            task_id (str): Caller's id for the task; resubmitting a running task only watches it
+            user_id (Optional[str]): Who asked, for fair queuing
+            context (Optional[Dict[str, Any]]): JSON-serialisable data needed to deliver the
+                result after a front end restart (e.g. a chat id)
+
+        Returns:
+            asyncio.Future: Resolves to (keypair, attempts, time_taken)
+
+        Raises:
+            AdmissionRejected: If the search is unlikely to finish or the queue is too long
+            QuotaExceeded: If the search would cost more CPU time than the user has left
+        """
+        future = self._result_future(task_id)
+        try:
+            await self._request('submit', prefix=prefix, suffix=suffix, case_sensitive=case_sensitive,
+                                task_id=task_id, user_id=None if user_id is None else str(user_id),
+                                client=self.name, context=context)
+        except (AdmissionRejected, QuotaExceeded):
+            self._results.pop(task_id, None)
+            raise
+        return future
+
+    async def generate(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True,
+                       task_id: Optional[str] = None, user_id: Optional[str] = None,
+                       context: Optional[Dict[str, Any]] = None):
+        """Submit a search and wait for its (keypair, attempts, time_taken)"""
+        return await (await self.submit(prefix, suffix, case_sensitive, task_id, user_id, context))
+
+    async def admit(self, user_id):
+        """
+        Count a request against the user's rate limit.
+
+        Raises:
+            QuotaExceeded: If the user has made too many requests lately
+        """
+        await self._request('admit', user_id=str(user_id))
+
+    async def admission(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True,
+                        user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Return whether a search would be accepted, queued or rejected, with its estimate"""
+        return (await self._request('admission', prefix=prefix, suffix=suffix, case_sensitive=case_sensitive,
+                                    user_id=None if user_id is None else str(user_id)))['admission']
+
+    async def queue_position(self, task_id: str) -> Optional[int]:
+        """Return 0 while the task is searched for, its place in the queue, or None if unknown"""
+        return (await self._request('position', task_id=task_id))['position']
+
+    async def progress(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return the task's live statistics, see ``GenerationService.progress``"""
+        return (await self._request('progress', task_id=task_id))['progress']
+
+    async def stats(self) -> Dict[str, Any]:
+        """Return the daemon's active and queued search counts and its keys per second"""
+        response = await self._request('stats')
+        return {key: response[key] for key in ('active', 'queued', 'keys_per_second')}
+
+    async def profile(self, duration: float) -> str:
+        """
+        Profile the daemon's workers.
+
+        Args:
+            duration (float): Seconds to sample for (capped by the daemon)
+
+        Returns:
+            str: Collapsed stacks of all workers, for flamegraph tools
+        """
+        response = await self._request('profile', timeout=duration + REQUEST_TIMEOUT, duration=duration)
+        return response['profile']
+
+    async def metrics(self) -> str:
+        """Return the daemon's metrics in the Prometheus text format"""
+        return (await self._request('metrics'))['text']
+
+    async def tasks(self) -> List[Dict[str, Any]]:
+        """Return this front end's unfinished (or finished but uncollected) tasks"""
+        return (await self._request('tasks', client=self.name))['tasks']
+
+    async def cancel(self, task_id: str, user_id: Optional[str] = None) -> bool:
+        """
+        Cancel a task; its result future fails with ``SearchCancelled``.
+
+        Args:
+            task_id (str): The task to cancel
+            user_id (Optional[str]): If given, only cancel the task if this user submitted it
+
+        Returns:
+            bool: Whether the task was still pending
+        """
+        response = await self._request('cancel', task_id=task_id,
+                                       user_id=None if user_id is None else str(user_id))
+        return response['cancelled']
+
+    async def close(self):
+        """Close the connection; tasks keep running in the daemon"""
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        for future in self._results.values():
+            future.cancel()
+        self._results.clear()
+
+
+def main():
+    """Run the daemon until SIGINT or SIGTERM"""
+    from calibration import apply_profile, load_or_calibrate
+    from inventory import Inventory
+    from job_store import JobStore
+    from quotas import QuotaManager
+
+    parser = argparse.ArgumentParser(description="Serve vanity searches to the Telegram front ends")
+    parser.add_argument("--socket", default=COMPUTE_SOCKET, help="Unix socket to listen on")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    print("🚀 Solana Vanity Generator - Compute Daemon")
+    print("=" * 50)
+
+    max_attempts = int(os.getenv('MAX_ATTEMPTS', str(MAX_ATTEMPTS)))
+    job_store = JobStore()
+    inventory = Inventory()
+    generator = SolanaVanityGenerator(max_attempts=max_attempts)
+    quotas = QuotaManager()
+    service = GenerationService(max_attempts=max_attempts, store=job_store, name="daemon",
+                                inventory=inventory, quotas=quotas)
+
+    # Calibrate once per host so ETAs reflect this machine
+    profile = load_or_calibrate()
+    apply_profile(profile, generator, service)
+    print(f"⚡ Throughput: {profile['keys_per_second']:,.0f} keys/sec ({profile['best_workers']} workers, {profile['best_backend']})")
+
+    # Fill the short-prefix stock with spare CPU
+    inventory.start_miner()
+    print(f"📦 Inventory: {inventory.size()} keypairs in stock")
+    print(f"🎟️ Quotas: {quotas.requests_per_hour:g} requests/hour, {quotas.cpu_seconds_per_day:,.0f} CPU seconds/day per user")
+
+    daemon = ComputeDaemon(service, args.socket, generator.keys_per_second)
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await daemon.start()
+        print(f"🔌 Listening on {args.socket}")
+        print("🛑 Press Ctrl+C to stop")
+        await stop.wait()
+        print("💾 Checkpointing running searches...")
+        await daemon.stop()
+
+    try:
+        asyncio.run(run())
+    finally:
+        job_store.close()
+        inventory.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
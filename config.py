@@ -23,12 +23,13 @@ Welcome! I can help you generate Solana vanity addresses with custom prefixes.
 
 **Available Commands:**
 • `/start` - Show this welcome message
-• `/generate <prefix>` - Generate a vanity address with custom prefix
+• `/generate <prefix> [suffix]` - Generate a vanity address with custom prefix/suffix
 • `/help` - Show help information
 • `/status` - Check bot status
 
 **Example:**
 `/generate SOL` - Generates an address starting with "SOL"
+`/generate * XYZ` - Generates an address ending with "XYZ"
 
 **Note:** Longer prefixes take more time to generate. Maximum prefix length is 8 characters.
 """
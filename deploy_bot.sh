@@ -43,6 +43,22 @@ fi
 echo "✅ Dependencies check passed"
 echo ""
 
+# Searches run in the compute daemon; start it if it is not already running
+if [ ! -S "${COMPUTE_SOCKET:-compute.sock}" ]; then
+    echo "⚙️ Starting compute daemon..."
+    nohup python3 compute_daemon.py > compute_daemon.log 2>&1 &
+    DAEMON_PID=$!
+    # The daemon calibrates before it listens; wait for its socket
+    for _ in $(seq 1 60); do
+        [ -S "${COMPUTE_SOCKET:-compute.sock}" ] && break
+        if ! kill -0 "$DAEMON_PID" 2>/dev/null; then
+            echo "❌ Compute daemon exited; see compute_daemon.log"
+            exit 1
+        fi
+        sleep 1
+    done
+fi
+
 # Start the bot
 echo "🤖 Starting Solana Vanity Wallet Telegram Bot..."
 echo "�� Bot will be available on Telegram"
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Multi-node vanity search for the Solana Vanity Generator
+
+A coordinator listens on a TCP port; worker nodes on other machines (or
+the same one) connect to it and take a share of every search, split by
+their core counts. Nodes report attempt counts while they search and
+their result when done; the first verified match cancels everyone else.
+
+Both ends prove knowledge of ``CLUSTER_SECRET`` with an HMAC
+challenge-response, and every frame after that is encrypted and
+authenticated with per-connection keys derived from it, since results
+carry private keys.
+
+    python distributed.py worker --host coordinator.example --workers 8
+    python distributed.py search --prefix ABC --nodes 2
+"""
+
+import argparse
+import base58
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import secrets
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from cryptography.fernet import Fernet, InvalidToken
+from solders.keypair import Keypair
+from vanity_generator import POLL_INTERVAL, SEED_LENGTH, PatternMatcher, SolanaVanityGenerator
+
+logger = logging.getLogger(__name__)
+
+# Shared secret of the cluster; coordinator and workers refuse to start without it
+CLUSTER_SECRET = os.getenv('CLUSTER_SECRET', '')
+
+# Address the coordinator listens on and workers connect to
+CLUSTER_HOST = os.getenv('CLUSTER_HOST', '127.0.0.1')
+CLUSTER_PORT = int(os.getenv('CLUSTER_PORT', '7878'))
+
+# Largest frame either side accepts, in bytes
+MAX_FRAME = 64 * 1024
+
+# Random bytes each side contributes to the handshake
+NONCE_LENGTH = 32
+
+# Seconds allowed for connecting and authenticating
+HANDSHAKE_TIMEOUT = 10.0
+
+# Seconds between progress reports from a node
+NODE_PROGRESS_INTERVAL = 1.0
+
+# Seconds the coordinator waits for final counts after cancelling the nodes
+CANCEL_TIMEOUT = 5.0
+
+# Seconds a worker waits before reconnecting to the coordinator
+RECONNECT_DELAY = 5.0
+
+
+class AuthenticationError(ConnectionError):
+    """The peer does not know the cluster secret"""
+
+
+def _cluster_secret(secret: Optional[str]) -> bytes:
+    """Return the secret to use, failing if none is configured"""
+    secret = secret or CLUSTER_SECRET
+    if not secret:
+        raise ValueError("CLUSTER_SECRET must be set to run a cluster")
+    return secret.encode()
+
+
+def _mac(secret: bytes, label: bytes, *parts: bytes) -> bytes:
+    """Return HMAC-SHA256 of ``label`` and ``parts`` under the cluster secret"""
+    return hmac.new(secret, label + b''.join(parts), hashlib.sha256).digest()
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    """Send one length-prefixed frame"""
+    sock.sendall(struct.pack('>I', len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly ``size`` bytes, failing if the peer hangs up first"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    """Read one length-prefixed frame"""
+    (size,) = struct.unpack('>I', _recv_exact(sock, 4))
+    if size > MAX_FRAME:
+        raise ConnectionError(f"Frame of {size} bytes exceeds the {MAX_FRAME} byte limit")
+    return _recv_exact(sock, size)
+
+
+def _send_plain(sock: socket.socket, message: Dict[str, Any]):
+    """Send an unencrypted handshake message"""
+    _send_frame(sock, json.dumps(message).encode())
+
+
+def _recv_plain(sock: socket.socket) -> Dict[str, Any]:
+    """Read an unencrypted handshake message"""
+    try:
+        return json.loads(_recv_frame(sock))
+    except ValueError:
+        raise ConnectionError("Malformed handshake message")
+
+
+class Channel:
+    """
+    An authenticated connection: JSON messages, encrypted with a key per
+    direction and numbered so a recorded frame cannot be replayed or
+    reflected back to its sender.
+    """
+
+    def __init__(self, sock: socket.socket, send_key: bytes, receive_key: bytes):
+        self.sock = sock
+        self._send_fernet = Fernet(base64.urlsafe_b64encode(send_key))
+        self._receive_fernet = Fernet(base64.urlsafe_b64encode(receive_key))
+        self._send_lock = threading.Lock()
+        self._sent = 0
+        self._received = 0
+
+    def send(self, message: Dict[str, Any]):
+        """Encrypt and send a message; safe to call from several threads"""
+        with self._send_lock:
+            self._sent += 1
+            token = self._send_fernet.encrypt(json.dumps({**message, 'seq': self._sent}).encode())
+            _send_frame(self.sock, token)
+
+    def receive(self) -> Dict[str, Any]:
+        """Read, decrypt and check the next message"""
+        try:
+            message = json.loads(self._receive_fernet.decrypt(_recv_frame(self.sock)))
+        except (InvalidToken, ValueError):
+            raise ConnectionError("Message failed authentication")
+        self._received += 1
+        if message.pop('seq', None) != self._received:
+            raise ConnectionError("Message out of sequence")
+        return message
+
+    def close(self):
+        """Shut the connection down, waking any thread blocked in :meth:`receive`"""
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def coordinator_handshake(sock: socket.socket, secret: bytes) -> Channel:
+    """Challenge a connecting worker and return the session channel"""
+    nonce = secrets.token_bytes(NONCE_LENGTH)
+    _send_plain(sock, {'type': 'challenge', 'nonce': nonce.hex()})
+    reply = _recv_plain(sock)
+    try:
+        worker_nonce = bytes.fromhex(reply['nonce'])
+        proof = bytes.fromhex(reply['mac'])
+    except (KeyError, TypeError, ValueError):
+        raise AuthenticationError("Malformed authentication reply")
+    if len(worker_nonce) != NONCE_LENGTH or not hmac.compare_digest(proof, _mac(secret, b'worker', nonce, worker_nonce)):
+        raise AuthenticationError("Worker failed authentication")
+    _send_plain(sock, {'type': 'welcome', 'mac': _mac(secret, b'coordinator', nonce, worker_nonce).hex()})
+    return Channel(sock, _mac(secret, b'to-worker', nonce, worker_nonce),
+                   _mac(secret, b'to-coordinator', nonce, worker_nonce))
+
+
+def worker_handshake(sock: socket.socket, secret: bytes) -> Channel:
+    """Answer the coordinator's challenge, check its proof and return the session channel"""
+    challenge = _recv_plain(sock)
+    try:
+        nonce = bytes.fromhex(challenge['nonce'])
+    except (KeyError, TypeError, ValueError):
+        raise AuthenticationError("Malformed challenge")
+    worker_nonce = secrets.token_bytes(NONCE_LENGTH)
+    _send_plain(sock, {'type': 'auth', 'nonce': worker_nonce.hex(), 'mac': _mac(secret, b'worker', nonce, worker_nonce).hex()})
+    welcome = _recv_plain(sock)
+    try:
+        proof = bytes.fromhex(welcome['mac'])
+    except (KeyError, TypeError, ValueError):
+        raise AuthenticationError("Coordinator rejected the connection")
+    # Never hand keys to a coordinator that cannot prove it knows the secret
+    if not hmac.compare_digest(proof, _mac(secret, b'coordinator', nonce, worker_nonce)):
+        raise AuthenticationError("Coordinator failed authentication")
+    return Channel(sock, _mac(secret, b'to-coordinator', nonce, worker_nonce),
+                   _mac(secret, b'to-worker', nonce, worker_nonce))
+
+
+class _Node:
+    """A connected worker node as seen by the coordinator"""
+
+    def __init__(self, channel: Channel, address: str, workers: int, name: str):
+        self.channel = channel
+        self.address = address
+        self.workers = workers
+        self.name = name
+        # Attempts reported for the current search
+        self.attempts = 0
+
+
+class Coordinator:
+    """
+    Accepts worker nodes and runs searches across them.
+
+    Pass it to ``SolanaVanityGenerator(coordinator=...)`` to have
+    ``generate_vanity_address`` use the connected nodes; searches run one
+    at a time.
+    """
+
+    def __init__(self, host: str = CLUSTER_HOST, port: int = CLUSTER_PORT, secret: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self._secret = _cluster_secret(secret)
+        self._nodes: List[_Node] = []
+        self._lock = threading.Lock()
+        self._search_lock = threading.Lock()
+        self._events: queue.Queue = queue.Queue()
+        self._job = 0
+        self._server = None
+
+    def start(self):
+        """Listen for worker nodes; with port 0 the chosen port is stored in ``self.port``"""
+        self._server = socket.create_server((self.host, self.port))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, name="cluster-accept", daemon=True).start()
+        logger.info(f"Cluster coordinator listening on {self.host}:{self.port}")
+
+    def stop(self):
+        """Stop listening and disconnect every node"""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for node in self.nodes():
+            node.channel.close()
+
+    def nodes(self) -> List[_Node]:
+        """Return the connected nodes"""
+        with self._lock:
+            return list(self._nodes)
+
+    def total_workers(self) -> int:
+        """Return the number of search processes across all nodes"""
+        return sum(node.workers for node in self.nodes())
+
+    def search(self, matcher: PatternMatcher, budget: int, cancel: Optional[threading.Event] = None,
+               progress: Optional[Callable[[int], None]] = None) -> Tuple[Optional[Keypair], int]:
+        """
+        Search on every connected node until one finds a match or the budget is spent.
+
+        Args:
+            matcher (PatternMatcher): The compiled pattern
+            budget (int): Total attempts, split between nodes by their worker counts
+            cancel (Optional[threading.Event]): Stops the search early when set
+            progress (Optional[Callable[[int], None]]): Called with the attempts made so far
+
+        Returns:
+            Tuple[Optional[Keypair], int]: (keypair, attempts across all nodes)
+        """
+        with self._search_lock:
+            # Events from earlier searches no longer matter
+            while not self._events.empty():
+                self._events.get_nowait()
+
+            nodes = self.nodes()
+            if not nodes:
+                raise RuntimeError("No worker nodes connected")
+            self._job += 1
+            job = self._job
+
+            total = sum(node.workers for node in nodes)
+            running = set()
+            assigned = 0
+            for i, node in enumerate(nodes):
+                share = budget - assigned if i == len(nodes) - 1 else budget * node.workers // total
+                assigned += share
+                node.attempts = 0
+                if share <= 0:
+                    continue
+                try:
+                    node.channel.send({'type': 'job', 'job': job, 'prefix': matcher.prefix,
+                                       'suffix': matcher.suffix, 'case_sensitive': matcher.case_sensitive,
+                                       'budget': share})
+                    running.add(node)
+                except OSError as e:
+                    logger.warning(f"Could not send job to node {node.name}: {e}")
+
+            keypair = None
+            deadline = None
+            while running:
+                if deadline is None and cancel is not None and cancel.is_set():
+                    deadline = self._cancel(running, job)
+                if deadline is not None and time.time() > deadline:
+                    logger.warning(f"{len(running)} nodes did not confirm cancellation; using their last counts")
+                    break
+                try:
+                    node, message = self._events.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if progress is not None:
+                        progress(sum(node.attempts for node in nodes))
+                    continue
+
+                if node not in running:
+                    continue
+                if message is None:
+                    logger.warning(f"Node {node.name} disconnected during a search")
+                    running.discard(node)
+                    continue
+                if message.get('job') != job:
+                    continue
+
+                if message.get('type') == 'progress':
+                    node.attempts = max(node.attempts, int(message.get('attempts', 0)))
+                    if progress is not None:
+                        progress(sum(node.attempts for node in nodes))
+                elif message.get('type') == 'result':
+                    node.attempts = int(message.get('attempts', node.attempts))
+                    running.discard(node)
+                    found = self._verify(matcher, node, message.get('secret'))
+                    if found is not None and keypair is None:
+                        keypair = found
+                        deadline = self._cancel(running, job)
+
+            return keypair, sum(node.attempts for node in nodes)
+
+    def _cancel(self, running, job: int) -> float:
+        """Tell the running nodes to stop; return when to stop waiting for them"""
+        for node in running:
+            try:
+                node.channel.send({'type': 'cancel', 'job': job})
+            except OSError:
+                pass
+        return time.time() + CANCEL_TIMEOUT
+
+    def _verify(self, matcher: PatternMatcher, node: _Node, secret: Optional[str]) -> Optional[Keypair]:
+        """Rebuild a reported keypair from its seed and check that it really matches"""
+        if not secret:
+            return None
+        try:
+            seed = bytes.fromhex(secret)
+            keypair = Keypair.from_seed(seed) if len(seed) == SEED_LENGTH else None
+        except (TypeError, ValueError):
+            keypair = None
+        if keypair is None or not matcher.matches(bytes(keypair.pubkey())):
+            logger.warning(f"Node {node.name} reported a key that does not match; ignoring it")
+            return None
+        return keypair
+
+    def _accept(self):
+        """Accept connections until the server socket is closed"""
+        server = self._server
+        while True:
+            try:
+                sock, address = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock, f"{address[0]}:{address[1]}"),
+                             name="cluster-node", daemon=True).start()
+
+    def _serve(self, sock: socket.socket, address: str):
+        """Authenticate one node, then forward its messages to the running search"""
+        node = None
+        try:
+            sock.settimeout(HANDSHAKE_TIMEOUT)
+            channel = coordinator_handshake(sock, self._secret)
+            hello = channel.receive()
+            sock.settimeout(None)
+            node = _Node(channel, address, max(1, int(hello.get('workers', 1))), str(hello.get('name', address)))
+            with self._lock:
+                self._nodes.append(node)
+            logger.info(f"Node {node.name} ({address}) joined with {node.workers} workers")
+
+            while True:
+                self._events.put((node, channel.receive()))
+        except AuthenticationError as e:
+            logger.warning(f"Rejected node {address}: {e}")
+        except (OSError, ValueError) as e:
+            if node is not None:
+                logger.info(f"Node {node.name} left: {e}")
+        finally:
+            if node is not None:
+                with self._lock:
+                    self._nodes.remove(node)
+                self._events.put((node, None))
+            sock.close()
+
+
+class WorkerNode:
+    """
+    Connects to a coordinator and runs the searches it hands out with a
+    local ``SolanaVanityGenerator``, reconnecting whenever the link drops.
+    """
+
+    def __init__(self, host: str = CLUSTER_HOST, port: int = CLUSTER_PORT, secret: Optional[str] = None,
+                 workers: Optional[int] = None, backend: str = "keypair"):
+        self.host = host
+        self.port = port
+        self._secret = _cluster_secret(secret)
+        self.workers = SolanaVanityGenerator(workers=workers, backend=backend).workers
+        self.backend = backend
+        self._stopped = threading.Event()
+        self._channel = None
+
+    def run(self):
+        """Serve the coordinator until :meth:`stop` is called"""
+        while not self._stopped.is_set():
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=HANDSHAKE_TIMEOUT)
+                self._channel = worker_handshake(sock, self._secret)
+                sock.settimeout(None)
+                self._channel.send({'type': 'hello', 'workers': self.workers, 'name': socket.gethostname()})
+                logger.info(f"Connected to coordinator {self.host}:{self.port} with {self.workers} workers")
+                self._serve(self._channel)
+            except (OSError, ValueError) as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Coordinator connection lost: {e}")
+            finally:
+                if self._channel is not None:
+                    self._channel.close()
+                    self._channel = None
+            self._stopped.wait(RECONNECT_DELAY)
+
+    def stop(self):
+        """Disconnect and stop reconnecting"""
+        self._stopped.set()
+        if self._channel is not None:
+            self._channel.close()
+
+    def _serve(self, channel: Channel):
+        """Handle job and cancel messages until the connection drops"""
+        job, cancel = None, threading.Event()
+        try:
+            while True:
+                message = channel.receive()
+                if message.get('type') == 'job':
+                    cancel.set()
+                    job, cancel = message['job'], threading.Event()
+                    threading.Thread(target=self._run_job, args=(channel, message, cancel),
+                                     name=f"cluster-job-{job}", daemon=True).start()
+                elif message.get('type') == 'cancel' and message.get('job') == job:
+                    cancel.set()
+        finally:
+            cancel.set()
+
+    def _run_job(self, channel: Channel, message: Dict[str, Any], cancel: threading.Event):
+        """Run one search and report its progress and result"""
+        job = message['job']
+        last_report = 0.0
+
+        def report(attempts: int):
+            nonlocal last_report
+            now = time.time()
+            if now - last_report >= NODE_PROGRESS_INTERVAL:
+                last_report = now
+                channel.send({'type': 'progress', 'job': job, 'attempts': attempts})
+
+        generator = SolanaVanityGenerator(max_attempts=int(message['budget']), workers=self.workers,
+                                          backend=self.backend)
+        try:
+            keypair, attempts, _ = generator.generate_vanity_address(
+                message.get('prefix', ''), message.get('suffix', ''),
+                bool(message.get('case_sensitive', True)), cancel, report
+            )
+            channel.send({'type': 'result', 'job': job, 'attempts': attempts,
+                          'secret': bytes(keypair)[:SEED_LENGTH].hex() if keypair else None})
+        except OSError as e:
+            cancel.set()
+            logger.warning(f"Could not report job {job}: {e}")
+        except Exception as e:
+            # Report an empty result so the coordinator is not left waiting for this node
+            logger.error(f"Job {job} failed: {e}")
+            try:
+                channel.send({'type': 'result', 'job': job, 'secret': None})
+            except OSError:
+                pass
+
+
+def run_worker(host: str = CLUSTER_HOST, port: int = CLUSTER_PORT, secret: Optional[str] = None,
+               workers: Optional[int] = None, backend: str = "keypair"):
+    """Process entry point: run a worker node until interrupted"""
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    try:
+        WorkerNode(host, port, secret, workers, backend).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """Run a worker node, or a coordinator that performs one search"""
+    parser = argparse.ArgumentParser(description="Distributed Solana vanity search")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="serve searches from a coordinator")
+    worker.add_argument("--host", default=CLUSTER_HOST, help="coordinator address")
+    worker.add_argument("--port", type=int, default=CLUSTER_PORT, help="coordinator port")
+    worker.add_argument("--workers", type=int, help="search processes on this node")
+    worker.add_argument("--backend", default="keypair", help="key backend")
+
+    search = commands.add_parser("search", help="coordinate one search across connected workers")
+    search.add_argument("--host", default=CLUSTER_HOST, help="address to listen on")
+    search.add_argument("--port", type=int, default=CLUSTER_PORT, help="port to listen on")
+    search.add_argument("--prefix", default="", help="address prefix")
+    search.add_argument("--suffix", default="", help="address suffix")
+    search.add_argument("--any-case", action="store_true", help="match letters in either case")
+    search.add_argument("--nodes", type=int, default=1, help="nodes to wait for before starting")
+    search.add_argument("--attempts", type=int, default=100000000, help="total attempt budget")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker(args.host, args.port, workers=args.workers, backend=args.backend)
+        return 0
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    coordinator = Coordinator(args.host, args.port)
+    coordinator.start()
+    print(f"⏳ Waiting for {args.nodes} node(s) on {args.host}:{coordinator.port}...")
+    while len(coordinator.nodes()) < args.nodes:
+        time.sleep(POLL_INTERVAL)
+
+    generator = SolanaVanityGenerator(max_attempts=args.attempts, coordinator=coordinator)
+    keypair, attempts, time_taken = generator.generate_vanity_address(args.prefix, args.suffix, not args.any_case)
+    coordinator.stop()
+    if keypair is None:
+        return 1
+    print(f"📍 Address: {keypair.pubkey()}")
+    print(f"🔐 Private key: {base58.b58encode(bytes(keypair)).decode()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Throttled, coalesced Telegram message edits.
+
+Progress updates for a message replace each other while they wait, so only
+the newest text is ever sent. One sender task paces them per message, per
+chat and across the whole bot to stay inside Telegram's rate limits.
+Final edits (results) skip the queue: they are sent at once, drop any
+waiting progress for the message, and use up rate budget so progress
+edits back off instead.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress edits of one message
+MESSAGE_EDIT_INTERVAL = 5.0
+
+# Seconds between progress edits in one chat (Telegram allows about one message per second per chat)
+CHAT_EDIT_INTERVAL = 1.0
+
+# Progress edits per second across all chats; below Telegram's ~30/s so results always have room
+PROGRESS_EDITS_PER_SECOND = 20
+
+# Seconds a finished message is remembered, so a late progress edit cannot overwrite its result
+FINISHED_MEMORY = 60.0
+
+
+def _message_key(message) -> Tuple[Optional[int], int]:
+    """Identify a message by chat and message id"""
+    return getattr(message, 'chat_id', None), message.message_id
+
+
+class EditScheduler:
+    """
+    Paces ``edit_text`` calls for many messages.
+
+    :meth:`update` queues a progress edit and returns immediately;
+    :meth:`finish` sends a message's final text right away.
+    """
+
+    def __init__(self, message_interval: float = MESSAGE_EDIT_INTERVAL,
+                 chat_interval: float = CHAT_EDIT_INTERVAL,
+                 edits_per_second: float = PROGRESS_EDITS_PER_SECOND):
+        self.message_interval = message_interval
+        self.chat_interval = chat_interval
+        self.edits_per_second = edits_per_second
+        # Newest waiting progress edit per message: (message, text, kwargs)
+        self._pending: Dict[Hashable, Tuple[Any, str, Dict[str, Any]]] = {}
+        self._message_ready: Dict[Hashable, float] = {}
+        self._chat_ready: Dict[Hashable, float] = {}
+        # Send times of the last second's edits, progress and final alike
+        self._sent: deque = deque()
+        self._paused_until = 0.0
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._finished: Dict[Hashable, float] = {}
+        self._sending = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, message, text: str, **kwargs):
+        """Queue a progress edit, replacing any older one still waiting for the message"""
+        key = _message_key(message)
+        if key in self._finished:
+            return
+        self._pending[key] = (message, text, kwargs)
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+
+    async def finish(self, message, text: str, **kwargs):
+        """Send a message's final text now; later progress edits for it are ignored"""
+        key = _message_key(message)
+        now = time.monotonic()
+        self._finished[key] = now
+        self._pending.pop(key, None)
+        self._record(now, key[0])
+        # Waits only for a progress edit already on the wire, so the result lands last
+        async with self._lock(key):
+            await message.edit_text(text, **kwargs)
+        self._message_ready.pop(key, None)
+        self._locks.pop(key, None)
+        for old_key, finished in list(self._finished.items()):
+            if finished < now - FINISHED_MEMORY:
+                del self._finished[old_key]
+
+    async def stop(self):
+        """Stop the sender task, dropping waiting progress edits"""
+        self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def pending(self) -> int:
+        """Return the number of messages with a progress edit waiting"""
+        return len(self._pending)
+
+    def _lock(self, key: Hashable) -> asyncio.Lock:
+        """Return the lock serialising edits of one message"""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def _record(self, now: float, chat_id):
+        """Count an edit against the global and per-chat budgets"""
+        while self._sent and self._sent[0] <= now - 1.0:
+            self._sent.popleft()
+        self._sent.append(now)
+        self._chat_ready[chat_id] = now + self.chat_interval
+
+    def _next_edit(self, now: float) -> Tuple[Optional[Hashable], float]:
+        """Return the progress edit to send now (or None) and how long to wait otherwise"""
+        while self._sent and self._sent[0] <= now - 1.0:
+            self._sent.popleft()
+        wait = float('inf')
+        if now < self._paused_until:
+            return None, self._paused_until - now
+        if len(self._sent) >= self.edits_per_second:
+            wait = self._sent[0] + 1.0 - now
+
+        best, best_ready = None, float('inf')
+        for key in self._pending:
+            ready = max(self._message_ready.get(key, 0.0), self._chat_ready.get(key[0], 0.0))
+            if ready < best_ready:
+                best, best_ready = key, ready
+        if best is None:
+            return None, float('inf')
+        if best_ready > now:
+            return None, best_ready - now
+        if wait != float('inf'):
+            return None, wait
+        return best, 0.0
+
+    async def _run(self):
+        """Send waiting progress edits as the budgets allow"""
+        while True:
+            now = time.monotonic()
+            key, wait = self._next_edit(now)
+            if key is not None:
+                message, text, kwargs = self._pending.pop(key)
+                self._message_ready[key] = now + self.message_interval
+                self._record(now, key[0])
+                # Sent concurrently so one slow request does not hold up other chats
+                task = asyncio.create_task(self._send(key, message, text, kwargs))
+                self._sending.add(task)
+                task.add_done_callback(self._sending.discard)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), None if wait == float('inf') else wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, key: Hashable, message, text: str, kwargs: Dict[str, Any]):
+        """Send one progress edit unless the message has been finished meanwhile"""
+        async with self._lock(key):
+            if key in self._finished:
+                return
+            try:
+                await message.edit_text(text, **kwargs)
+            except Exception as e:
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after:
+                    # Flood control: hold every progress edit back until Telegram allows more
+                    retry_after = getattr(retry_after, 'total_seconds', lambda: retry_after)()
+                    self._paused_until = time.monotonic() + float(retry_after)
+                    logger.warning(f"Telegram flood control; pausing progress edits for {retry_after}s")
+                else:
+                    logger.debug(f"Progress edit failed: {e}")
@@ -0,0 +1,1091 @@
+"""
+Shared key stream for concurrent vanity address jobs.
+
+Instead of one brute-force loop per request, a fixed set of worker
+processes draws a single stream of candidate keys and checks every key
+against all pending jobs at once. A match is routed to the job that owns
+the pattern, so each job sees the full throughput of the stream no matter
+how many other jobs are running. A fair scheduler bounds how many jobs
+are searched at once and decides who goes next when a slot frees up.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+from solders.keypair import Keypair
+from metrics import Registry
+from profiler import PROFILE_INTERVAL, PROFILE_MAX_DURATION, SamplingProfiler, collapsed, merge
+from vanity_generator import (
+    BOOKKEEPING,
+    DERIVE,
+    EXTRACT,
+    KEY_BACKENDS,
+    MATCH,
+    PUBKEY_LENGTH,
+    STAGE_TIMING,
+    STAGES,
+    WORKER_BATCH_SIZE,
+    KeySource,
+    PatternMatcher,
+    SearchResult,
+    StageTimer,
+    address_tail,
+    stage_seconds,
+    usable_cpu_count,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds the monitor thread waits for a match before re-checking budgets
+MONITOR_INTERVAL = 0.2
+
+# Seconds over which the stream's keys-per-second rate is measured
+RATE_WINDOW = 1.0
+
+# Jobs searched at once; further jobs wait in the scheduler's queue
+MAX_ACTIVE_JOBS = 16
+
+# Of the active jobs, how many may be heavy
+MAX_HEAVY_JOBS = 2
+
+# Expected attempts above which a job counts as heavy (a 4-character prefix)
+HEAVY_JOB_ATTEMPTS = 58 ** 4
+
+# Seconds between checkpoints of unfinished jobs
+CHECKPOINT_INTERVAL = 30.0
+
+# Seconds between refreshes of the prefixes harvested into the inventory
+HARVEST_REFRESH_INTERVAL = 30.0
+
+# Smallest chance of a match within max_attempts for a search to be admitted
+ADMISSION_MIN_SUCCESS = float(os.getenv('ADMISSION_MIN_SUCCESS', '0.1'))
+
+# Longest expected wait for a slot, in seconds, before new searches are turned away
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', '1800'))
+
+
+class AdmissionRejected(Exception):
+    """A search was turned away up front; ``admission`` holds the decision and its estimate"""
+
+    def __init__(self, message: str, admission: Dict[str, Any]):
+        super().__init__(message)
+        self.admission = admission
+
+
+class SearchCancelled(Exception):
+    """A search was cancelled before it finished"""
+
+
+def expected_attempts(probability: float, budget: float) -> float:
+    """
+    Return the expected attempts of a search that gives up after ``budget``.
+
+    The attempts until a match are geometric, so capping them at ``budget``
+    gives ``(1 - (1 - p) ** budget) / p``: the chance of success over ``p``.
+    """
+    if probability >= 1:
+        return 1.0
+    return -math.expm1(max(budget, 0) * math.log1p(-probability)) / probability
+
+
+class PatternIndex:
+    """
+    Maps a raw public key to every job whose pattern it matches.
+
+    The prefix ranges of all jobs are cut into disjoint segments, each
+    tagged with the jobs covering it, so a prefix lookup is one bisect no
+    matter how many jobs are pending. Suffix-only jobs are grouped by suffix
+    length: one modulo per distinct length and a dict lookup on the residue.
+    Jobs with both only have their suffix checked after a prefix hit.
+    """
+
+    def __init__(self, patterns: Dict[int, PatternMatcher]):
+        events = []
+        self._patterns = patterns
+        self._suffix_only: Dict[int, Dict[int, List[int]]] = {}
+        for job_id, pattern in patterns.items():
+            if pattern.suffix and not pattern.prefix:
+                residues = self._suffix_only.setdefault(pattern.modulus, {})
+                for residue in pattern.residues:
+                    residues.setdefault(residue, []).append(job_id)
+            for low, high in pattern.intervals:
+                events.append((low, job_id))
+                events.append((high + 1, -1 - job_id))
+        events.sort()
+
+        self._lows: List[bytes] = []
+        self._highs: List[bytes] = []
+        self._jobs: List[Tuple[int, ...]] = []
+
+        active = set()
+        for i, (point, tag) in enumerate(events):
+            if tag >= 0:
+                active.add(tag)
+            else:
+                active.discard(-1 - tag)
+            # Emit a segment once all events at this point have been applied
+            if i + 1 < len(events) and events[i + 1][0] == point:
+                continue
+            if active and i + 1 < len(events):
+                self._lows.append(point.to_bytes(PUBKEY_LENGTH, 'big'))
+                self._highs.append((events[i + 1][0] - 1).to_bytes(PUBKEY_LENGTH, 'big'))
+                self._jobs.append(tuple(sorted(active)))
+
+    def __bool__(self) -> bool:
+        return bool(self._lows or self._suffix_only)
+
+    def lookup(self, pubkey_bytes: bytes) -> Tuple[int, ...]:
+        """
+        Return the ids of the jobs whose pattern the key matches.
+
+        Args:
+            pubkey_bytes (bytes): The 32-byte public key
+
+        Returns:
+            Tuple[int, ...]: Matching job ids (empty if none)
+        """
+        matched = ()
+        i = bisect_right(self._lows, pubkey_bytes) - 1
+        if i >= 0 and pubkey_bytes <= self._highs[i]:
+            matched = tuple(
+                job_id for job_id in self._jobs[i]
+                if not self._patterns[job_id].suffix or self._patterns[job_id].matches(pubkey_bytes)
+            )
+
+        if self._suffix_only:
+            value = int.from_bytes(pubkey_bytes, 'big')
+            for modulus, residues in self._suffix_only.items():
+                job_ids = residues.get(value % modulus)
+                if job_ids:
+                    tail = address_tail(pubkey_bytes, len(self._patterns[job_ids[0]].suffix))
+                    matched += tuple(job_id for job_id in job_ids if tail in self._patterns[job_id].suffixes)
+        return matched
+
+
+def _stream_worker(index: int, backend: str, control, counters, cpu_times, result_queue, profile_queue,
+                   stage_ns=None):
+    """
+    Worker process body for the shared stream.
+
+    Receives ``("jobs", {job_id: PatternMatcher})`` on ``control`` whenever the
+    pending jobs change (``None`` stops the worker) and idles while there are
+    none. Every match is reported as ``(job_ids, keypair_bytes)`` with the
+    single, oldest job it is for, as no two jobs may share a key; the
+    cumulative number of keys tried and the CPU time spent searching are
+    published to ``counters[index]`` and ``cpu_times[index]`` after each batch.
+
+    ``("harvest", {i: PatternMatcher})`` sets secondary patterns: a key that
+    matches no job but one of them is reported with empty ``job_ids``, to be
+    kept for later requests.
+
+    ``("profile", (round_id, duration, interval))`` samples the worker's
+    stacks for ``duration`` seconds and then puts
+    ``(round_id, index, {stack: count})`` on ``profile_queue``. A new round
+    replaces one still running, whose samples are dropped.
+
+    With ``stage_ns``, each batch's time is split between ``STAGES`` and the
+    worker's cumulative nanoseconds per stage are published to
+    ``stage_ns[index * len(STAGES):(index + 1) * len(STAGES)]`` after each batch.
+    """
+    source = KeySource(backend)
+    patterns: Dict[int, PatternMatcher] = {}
+    lookup = PatternIndex(patterns)
+    harvest: Optional[PatternIndex] = None
+    profiler: Optional[SamplingProfiler] = None
+    profile_round = None
+    timer = StageTimer() if stage_ns is not None else None
+    stage_slots = slice(index * len(STAGES), (index + 1) * len(STAGES))
+    busy = False
+    # Start-up (imports, spawning) is not charged to any job
+    cpu_start = time.process_time()
+
+    try:
+        while True:
+            try:
+                while True:
+                    if patterns:
+                        message = control.get_nowait()
+                    else:
+                        # Idle, but wake up in time to hand in a running profile
+                        message = control.get(timeout=profiler.remaining() if profiler else None)
+                    if message is None:
+                        return
+                    kind, value = message
+                    if kind == "jobs":
+                        patterns = value
+                        lookup = PatternIndex(patterns)
+                    elif kind == "profile":
+                        if profiler is not None:
+                            profiler.stop()
+                        profile_round, duration, interval = value
+                        profiler = SamplingProfiler(duration, interval, root=_stream_worker.__code__)
+                        profiler.start()
+                    else:
+                        harvest = PatternIndex(value) or None
+            except queue.Empty:
+                pass
+            if profiler is not None and profiler.done():
+                profile_queue.put((profile_round, index, profiler.stop()))
+                profiler = None
+            if not patterns:
+                busy = False
+                continue
+            if timer is not None:
+                # Polling for control messages is bookkeeping, waiting for jobs is not
+                if busy:
+                    timer.lap(BOOKKEEPING)
+                else:
+                    timer.restart()
+            busy = True
+
+            batch = source.derive(WORKER_BATCH_SIZE)
+            if timer is not None:
+                timer.lap(DERIVE)
+            raws = [keypair.to_bytes() for keypair in batch]
+            if timer is not None:
+                timer.lap(EXTRACT)
+            for raw in raws:
+                pubkey = raw[32:]
+                job_ids = lookup.lookup(pubkey)
+                if job_ids:
+                    # A private key goes to one job only: the oldest, the others keep searching
+                    job_id = min(job_ids)
+                    result_queue.put(((job_id,), raw))
+                    # Don't report the same job again before the parent's update arrives
+                    patterns.pop(job_id, None)
+                    lookup = PatternIndex(patterns)
+                elif harvest is not None and harvest.lookup(pubkey):
+                    result_queue.put(((), raw))
+            if timer is not None:
+                timer.lap(MATCH)
+            counters[index] += len(batch)
+            cpu_times[index] = time.process_time() - cpu_start
+            if timer is not None:
+                stage_ns[stage_slots] = timer.ns
+    except KeyboardInterrupt:
+        pass
+
+
+class _Job:
+    def __init__(self, job_id: int, task_id: str, user_id: str, pattern: PatternMatcher,
+                 context: Optional[Dict[str, Any]] = None, checkpoint: Optional[Dict[str, Any]] = None):
+        self.job_id = job_id
+        self.task_id = task_id
+        self.user_id = user_id
+        self.pattern = pattern
+        self.context = context or {}
+        self.probability = pattern.match_probability()
+        # Characters to match, the label jobs are grouped by in metrics
+        self.length = len(pattern.prefix) + len(pattern.suffix)
+        # Expected number of attempts, the job's cost for scheduling
+        self.cost = 1 / self.probability
+        self.heavy = False
+        self.submit_time = time.time()
+        self.start_time: Optional[float] = None
+        self.start_attempts = 0
+        # Work done before the last restart, if resumed from a checkpoint
+        self.prior_attempts = checkpoint['attempts'] if checkpoint else 0
+        self.prior_elapsed = checkpoint['elapsed'] if checkpoint else 0.0
+        self.cpu_seconds = checkpoint['cpu_seconds'] if checkpoint else 0.0
+        # Stream nanoseconds per stage (summed over workers) while the job ran, if timed
+        self.stage_ns = list((checkpoint or {}).get('stage_ns') or [0] * len(STAGES))
+        self.future: Future = Future()
+
+    def attempts(self, total: int) -> int:
+        """Attempts spent on the job, given the stream's total"""
+        if self.start_time is None:
+            return self.prior_attempts
+        return self.prior_attempts + total - self.start_attempts
+
+    def elapsed(self) -> float:
+        """Seconds the job has been searched for"""
+        if self.start_time is None:
+            return self.prior_elapsed
+        return self.prior_elapsed + time.time() - self.start_time
+
+    def checkpoint(self, total: int) -> Dict[str, Any]:
+        """Everything needed to continue the job after a restart"""
+        return {
+            'task_id': self.task_id,
+            'user_id': self.user_id,
+            'prefix': self.pattern.prefix,
+            'suffix': self.pattern.suffix,
+            'case_sensitive': self.pattern.case_sensitive,
+            'attempts': self.attempts(total),
+            'elapsed': self.elapsed(),
+            'cpu_seconds': self.cpu_seconds,
+            'stage_ns': self.stage_ns,
+            'context': self.context,
+        }
+
+
+class FairScheduler:
+    """
+    Decides which queued jobs run next.
+
+    At most ``max_active`` jobs run at once, and at most ``max_heavy`` of
+    them may be heavy (expected attempts above ``heavy_attempts``). When a
+    slot frees up, the next job comes from the user with the fewest running
+    jobs, and each user's cheapest job goes first; ties go to the earlier
+    submission. A short prefix never waits behind a multi-hour one, and a
+    user submitting many jobs can't crowd out everyone else.
+    """
+
+    def __init__(self, max_active: int = MAX_ACTIVE_JOBS, max_heavy: int = MAX_HEAVY_JOBS,
+                 heavy_attempts: float = HEAVY_JOB_ATTEMPTS):
+        self.max_active = max(1, max_active)
+        self.max_heavy = max(1, min(max_heavy, self.max_active))
+        self.heavy_attempts = heavy_attempts
+        self._queues: Dict[str, List[_Job]] = {}
+        self._running: Dict[str, int] = {}
+        self._active = 0
+        self._heavy = 0
+
+    def __len__(self) -> int:
+        return sum(len(jobs) for jobs in self._queues.values())
+
+    def push(self, job: _Job):
+        """Queue a job"""
+        job.heavy = job.cost > self.heavy_attempts
+        jobs = self._queues.setdefault(job.user_id, [])
+        jobs.append(job)
+        jobs.sort(key=lambda queued: (queued.cost, queued.job_id))
+
+    def remove(self, job: _Job) -> bool:
+        """Drop a queued job; returns False if it was not queued"""
+        jobs = self._queues.get(job.user_id)
+        if not jobs or job not in jobs:
+            return False
+        jobs.remove(job)
+        if not jobs:
+            del self._queues[job.user_id]
+        return True
+
+    def finished(self, job: _Job):
+        """Release the slot of a job that was running"""
+        self._active -= 1
+        self._heavy -= job.heavy
+        self._running[job.user_id] -= 1
+        if not self._running[job.user_id]:
+            del self._running[job.user_id]
+
+    def pop_ready(self) -> List[_Job]:
+        """Take the queued jobs that may start now, in start order"""
+        ready = []
+        while self._active < self.max_active:
+            job = self._next(self._queues, self._running, self._heavy)
+            if job is None:
+                break
+            self._take(self._queues, job)
+            self._running[job.user_id] = self._running.get(job.user_id, 0) + 1
+            self._active += 1
+            self._heavy += job.heavy
+            ready.append(job)
+        return ready
+
+    def order(self) -> List[_Job]:
+        """
+        Return the queued jobs in the order they are expected to start.
+
+        Simulates the scheduler as if slots freed up one at a time, with a
+        heavy slot freeing up whenever only blocked heavy jobs are left.
+        """
+        queues = {user_id: list(jobs) for user_id, jobs in self._queues.items()}
+        running = dict(self._running)
+        heavy = self._heavy
+        ordered = []
+        while queues:
+            job = self._next(queues, running, heavy)
+            if job is None:
+                heavy -= 1
+                continue
+            self._take(queues, job)
+            running[job.user_id] = running.get(job.user_id, 0) + 1
+            heavy += job.heavy
+            ordered.append(job)
+        return ordered
+
+    def _next(self, queues: Dict[str, List[_Job]], running: Dict[str, int], heavy: int) -> Optional[_Job]:
+        candidates = [
+            jobs[0] for jobs in queues.values()
+            if not (jobs[0].heavy and heavy >= self.max_heavy)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda job: (running.get(job.user_id, 0), job.cost, job.job_id))
+
+    @staticmethod
+    def _take(queues: Dict[str, List[_Job]], job: _Job):
+        jobs = queues[job.user_id]
+        jobs.pop(0)
+        if not jobs:
+            del queues[job.user_id]
+
+
+class GenerationService:
+    """
+    Runs every pending job against one shared stream of candidate keys.
+
+    Jobs are submitted with :meth:`submit`, which returns a future that
+    resolves to the same ``(keypair, attempts, time_taken)`` tuple as
+    ``SolanaVanityGenerator.generate_vanity_address``; async callers use
+    :meth:`generate`, which awaits it without blocking the event loop.
+    Workers publish their key counts to shared-memory counters once per
+    batch, which :meth:`progress` turns into live per-job statistics. ``attempts`` counts
+    the keys drawn while the job was being searched for and is capped per job by
+    ``max_attempts``.
+
+    Jobs are admitted to the stream by a :class:`FairScheduler`; the rest
+    wait in its queue, and :meth:`queue_position` tells callers where.
+
+    With a ``store``, unfinished jobs are checkpointed every
+    ``CHECKPOINT_INTERVAL`` seconds and on :meth:`stop`, under the service's
+    ``name``; :meth:`checkpoints` returns them after a restart. The stream's
+    CPU time is split evenly between the jobs running at the time.
+
+    With an ``inventory``, every candidate is also checked against the
+    prefixes the inventory is short of, and matches are stocked there.
+    With ``quotas`` (a ``QuotaManager``), each job's CPU share is charged to
+    its user as it is spent.
+
+    ``metrics`` holds the service's Prometheus metrics (throughput overall
+    and per worker, queue waits and times to result by pattern length, and
+    finished jobs by outcome); :meth:`metrics_text` renders them.
+
+    With ``stage_timing``, workers split each batch's time between
+    ``STAGES`` and every job is credited with the stream's stage times while
+    it runs; they come back in :meth:`progress` and in the result's
+    ``stages``. As each job sees every key, dividing by its attempts gives
+    the time per key spent in each stage.
+    """
+
+    def __init__(self, max_attempts: int = 1000000, workers: Optional[int] = None,
+                 backend: str = "keypair", scheduler: Optional[FairScheduler] = None,
+                 store=None, name: str = "default", inventory=None, quotas=None,
+                 stage_timing: bool = STAGE_TIMING):
+        if backend not in KEY_BACKENDS:
+            raise ValueError(f"Unknown key backend: {backend}")
+        self.max_attempts = max_attempts
+        self.workers = max(1, workers if workers is not None else usable_cpu_count())
+        self.backend = backend
+        self.scheduler = scheduler if scheduler is not None else FairScheduler()
+        self.store = store
+        self.name = name
+        self.inventory = inventory
+        self.quotas = quotas
+        self.stage_timing = stage_timing
+
+        self._lock = threading.Lock()
+        # Running jobs by job id; _tasks also holds queued ones
+        self._jobs: Dict[int, _Job] = {}
+        self._tasks: Dict[str, _Job] = {}
+        self._job_ids = itertools.count()
+        self._rate = 0.0
+        self._rate_sample = (time.time(), 0)
+        self._processes = []
+        self._controls = []
+        self._counters = None
+        self._cpu_times = None
+        self._cpu_sample = 0.0
+        self._stage_ns = None
+        self._stage_sample: List[int] = []
+        self._last_checkpoint = time.time()
+        # Keypairs still wanted by the inventory, by prefix
+        self._harvest: Dict[str, int] = {}
+        self._last_harvest_refresh = 0.0
+        self._results = None
+        self._profiles = None
+        self._profile_lock = threading.Lock()
+        self._profile_rounds = itertools.count(1)
+        self._monitor_thread = None
+        self._running = False
+        self._worker_sample: List[int] = []
+        self._keys_sample = 0
+
+        self.metrics = Registry()
+        self._keys_per_second_metric = self.metrics.gauge(
+            'vanity_keys_per_second', 'Keys per second drawn by the shared stream')
+        self._worker_keys_per_second_metric = self.metrics.gauge(
+            'vanity_worker_keys_per_second', 'Keys per second drawn by each worker process', ('worker',))
+        self._keys_metric = self.metrics.counter('vanity_keys_total', 'Keys drawn by the shared stream')
+        self._active_metric = self.metrics.gauge('vanity_jobs_active', 'Jobs being searched for')
+        self._queued_metric = self.metrics.gauge('vanity_jobs_queued', 'Jobs waiting for a slot')
+        self._queue_wait_metric = self.metrics.histogram(
+            'vanity_queue_wait_seconds', 'Seconds from submission to the start of the search', ('length',))
+        self._time_to_result_metric = self.metrics.histogram(
+            'vanity_time_to_result_seconds', 'Seconds from submission to a found keypair', ('length',))
+        self._finished_metric = self.metrics.counter(
+            'vanity_jobs_finished_total',
+            'Jobs finished, by outcome (found, exhausted, cancelled or stopped)', ('outcome',))
+
+    def start(self):
+        """Start the worker processes and the monitor thread"""
+        with self._lock:
+            if self._running:
+                return
+            # spawn rather than fork: the service lives inside threaded asyncio apps
+            ctx = multiprocessing.get_context("spawn")
+            self._counters = ctx.Array('Q', self.workers, lock=False)
+            self._cpu_times = ctx.Array('d', self.workers, lock=False)
+            self._cpu_sample = 0.0
+            self._stage_ns = ctx.Array('Q', self.workers * len(STAGES), lock=False) if self.stage_timing else None
+            self._stage_sample = [0] * len(STAGES)
+            self._worker_sample = [0] * self.workers
+            self._keys_sample = 0
+            self._worker_keys_per_second_metric.clear()
+            self._results = ctx.Queue()
+            self._profiles = ctx.Queue()
+            self._controls = [ctx.Queue() for _ in range(self.workers)]
+            self._processes = [
+                ctx.Process(
+                    target=_stream_worker,
+                    args=(i, self.backend, self._controls[i], self._counters, self._cpu_times, self._results,
+                          self._profiles, self._stage_ns),
+                    daemon=True,
+                )
+                for i in range(self.workers)
+            ]
+            for process in self._processes:
+                process.start()
+
+            self._running = True
+            self._harvest = {}
+            self._refresh_harvest()
+            self._monitor_thread = threading.Thread(target=self._monitor, name="generation-monitor", daemon=True)
+            self._monitor_thread.start()
+            logger.info(f"Generation service started with {self.workers} workers")
+
+    def stop(self):
+        """
+        Stop the workers.
+
+        Without a store, pending jobs resolve as failed. With one, they are
+        checkpointed and their futures are cancelled, to be resubmitted
+        after a restart (see :meth:`checkpoints`).
+        """
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            for control in self._controls:
+                control.put(None)
+            total = self.total_attempts()
+            if self.store is not None:
+                self._save_checkpoints(total)
+            for job in list(self._tasks.values()):
+                if self.store is not None:
+                    self._release(job)
+                    job.future.cancel()
+                else:
+                    self._finish(job, None, total)
+
+        self._monitor_thread.join()
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+
+    def submit(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True,
+               task_id: Optional[str] = None, user_id: Optional[str] = None,
+               context: Optional[Dict[str, Any]] = None,
+               checkpoint: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a pattern for the shared stream.
+
+        Args:
+            prefix (str): The desired (validated) prefix
+            suffix (str): The desired (validated) suffix
+            case_sensitive (bool): Whether letters must match in case
+            task_id (Optional[str]): Caller's id for the job, used by :meth:`progress`
+            user_id (Optional[str]): Who asked, for fair queuing (defaults to the task id)
+            context (Optional[Dict[str, Any]]): JSON-serialisable data the caller
+                needs to deliver the result after a restart (e.g. a chat id)
+            checkpoint (Optional[Dict[str, Any]]): Stored state to continue from
+
+        Returns:
+            Future: Resolves to (keypair, attempts, time_taken)
+        """
+        pattern = PatternMatcher(prefix, suffix, case_sensitive)
+        self.start()
+        with self._lock:
+            job_id = next(self._job_ids)
+            task_id = task_id or str(job_id)
+            job = _Job(job_id, task_id, str(user_id) if user_id is not None else task_id,
+                       pattern, context, checkpoint)
+            self._tasks[job.task_id] = job
+            self.scheduler.push(job)
+            total = self.total_attempts()
+            if self._dispatch(total):
+                self._broadcast()
+            if self.store is not None and checkpoint is None:
+                self.store.save_checkpoints(self.name, [job.checkpoint(total)])
+        return job.future
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Cancel a pending job; its future fails with :class:`SearchCancelled`.
+
+        A running job's slot is handed to the next queued job at once, and
+        the workers drop its pattern before their next batch.
+
+        Args:
+            task_id (str): The id the job was submitted with
+
+        Returns:
+            bool: Whether the job was pending
+        """
+        with self._lock:
+            job = self._tasks.get(task_id)
+            if job is None:
+                return False
+            if self._release(job):
+                self._dispatch(self.total_attempts())
+                self._broadcast()
+            if self.store is not None:
+                self.store.delete_checkpoint(self.name, task_id)
+            self._finished_metric.inc('cancelled')
+        if not job.future.done():
+            job.future.set_exception(SearchCancelled(f"Search {task_id} was cancelled"))
+        return True
+
+    def checkpoints(self) -> List[Dict[str, Any]]:
+        """
+        Return the checkpoints of jobs an earlier run left unfinished.
+
+        Callers resubmit each one with ``checkpoint=`` (and its ``task_id``,
+        ``user_id`` and ``context``) to continue where it stopped.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per job, see ``_Job.checkpoint``
+        """
+        if self.store is None:
+            return []
+        return [
+            checkpoint for checkpoint in self.store.checkpoints(self.name)
+            if checkpoint['task_id'] not in self._tasks
+        ]
+
+    async def generate(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True,
+                       task_id: Optional[str] = None, user_id: Optional[str] = None,
+                       context: Optional[Dict[str, Any]] = None,
+                       checkpoint: Optional[Dict[str, Any]] = None):
+        """
+        Submit a pattern and wait for its result without blocking the event loop.
+
+        Args:
+            prefix (str): The desired (validated) prefix
+            suffix (str): The desired (validated) suffix
+            case_sensitive (bool): Whether letters must match in case
+            task_id (Optional[str]): Caller's id for the job, used by :meth:`progress`
+            user_id (Optional[str]): Who asked, for fair queuing
+            context (Optional[Dict[str, Any]]): Data needed to deliver the result after a restart
+            checkpoint (Optional[Dict[str, Any]]): Stored state to continue from
+
+        Returns:
+            Tuple[Optional[Keypair], int, float]: (keypair, attempts, time_taken)
+        """
+        return await asyncio.wrap_future(
+            self.submit(prefix, suffix, case_sensitive, task_id, user_id, context, checkpoint)
+        )
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """
+        Return where a job stands: 0 while it is searched for, 1 for the next
+        job to start and so on, or None if the job is unknown or finished.
+        """
+        with self._lock:
+            job = self._tasks.get(task_id)
+            if job is None:
+                return None
+            if job.start_time is not None:
+                return 0
+            return self.scheduler.order().index(job) + 1
+
+    def progress(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return live statistics for a pending job.
+
+        Args:
+            task_id (str): The id the job was submitted with
+
+        Returns:
+            Optional[Dict[str, Any]]: attempts, keys_per_second, elapsed,
+            cpu_seconds, probability (chance a match would have been found by
+            now), position (see :meth:`queue_position`) and stages (seconds
+            per stage, or None without ``stage_timing``), or None if the job
+            is not pending
+        """
+        position = self.queue_position(task_id)
+        job = self._tasks.get(task_id)
+        if position is None or job is None:
+            return None
+        attempts = max(0, min(job.attempts(self.total_attempts()), self.max_attempts))
+        return {
+            'attempts': attempts,
+            'keys_per_second': self._rate,
+            'elapsed': job.elapsed(),
+            'cpu_seconds': job.cpu_seconds,
+            'probability': -math.expm1(attempts * math.log1p(-job.probability)) if job.probability < 1 else 1.0,
+            'position': position,
+            'stages': self._stages(job),
+        }
+
+    def admission(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True,
+                  user_id: Optional[str] = None, keys_per_second: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Decide up front whether a search is worth running.
+
+        A search is rejected if it has less than ``ADMISSION_MIN_SUCCESS``
+        chance of a match within ``max_attempts`` (reason ``"unlikely"``), or
+        if it would wait longer than ``ADMISSION_MAX_WAIT`` for a slot
+        (reason ``"busy"``). Otherwise it is accepted, to start at once or at
+        a queue position. The wait is simulated from the scheduler's start
+        order and the expected remaining attempts of every job ahead.
+
+        Args:
+            prefix (str): The desired (validated) prefix
+            suffix (str): The desired (validated) suffix
+            case_sensitive (bool): Whether letters must match in case
+            user_id (Optional[str]): Who asks, since the queue is fair per user
+            keys_per_second (Optional[float]): Throughput to assume before the
+                stream has measured its own
+
+        Returns:
+            Dict[str, Any]: decision (``"accept"``, ``"queue"`` or
+            ``"reject"``), reason, position, success_probability,
+            expected_attempts (capped by ``max_attempts``), expected_seconds,
+            wait_seconds and keys_per_second; times are None while the
+            throughput is unknown
+        """
+        pattern = PatternMatcher(prefix, suffix, case_sensitive)
+        rate = self._rate or keys_per_second or 0.0
+        with self._lock:
+            candidate = _Job(next(self._job_ids), "", str(user_id) if user_id is not None else "",
+                             pattern)
+            self.scheduler.push(candidate)
+            try:
+                heavy_running = sum(job.heavy for job in self._jobs.values())
+                # Queued jobs are always blocked (free slots are filled on submit), so only slots matter
+                if len(self._jobs) < self.scheduler.max_active and not (
+                        candidate.heavy and heavy_running >= self.scheduler.max_heavy):
+                    position, wait = 0, 0.0
+                else:
+                    order = self.scheduler.order()
+                    position = order.index(candidate) + 1
+                    wait = self._simulate_wait(order[:position], rate) if rate else None
+            finally:
+                self.scheduler.remove(candidate)
+
+        attempts = expected_attempts(candidate.probability, self.max_attempts)
+        admission = {
+            'decision': 'queue' if position else 'accept',
+            'reason': None,
+            'position': position,
+            'success_probability': attempts * candidate.probability,
+            'expected_attempts': attempts,
+            'expected_seconds': attempts / rate if rate else None,
+            'wait_seconds': wait,
+            'keys_per_second': rate,
+        }
+        if admission['success_probability'] < ADMISSION_MIN_SUCCESS:
+            admission.update(decision='reject', reason='unlikely')
+        elif wait is not None and wait > ADMISSION_MAX_WAIT:
+            admission.update(decision='reject', reason='busy')
+        return admission
+
+    def _simulate_wait(self, order: List[_Job], rate: float) -> float:
+        """
+        Return the expected seconds until the last of ``order`` (queued jobs in start order) starts.
+
+        Called with the lock held. Running jobs hold their slots for their
+        expected remaining attempts; each queued job takes the first slot
+        (and heavy slot, if heavy) that frees up.
+        """
+        total = self.total_attempts()
+        # Expected end time and heaviness of each occupied slot
+        slots = [
+            (expected_attempts(job.probability, self.max_attempts - job.attempts(total)) / rate, job.heavy)
+            for job in self._jobs.values()
+        ]
+        start = 0.0
+        for job in order:
+            while True:
+                slots = [slot for slot in slots if slot[0] > start]
+                heavy_ends = [end for end, heavy in slots if heavy]
+                if len(slots) >= self.scheduler.max_active:
+                    start = min(end for end, _ in slots)
+                elif job.heavy and len(heavy_ends) >= self.scheduler.max_heavy:
+                    start = min(heavy_ends)
+                else:
+                    break
+            remaining = expected_attempts(job.probability, self.max_attempts - job.prior_attempts)
+            slots.append((start + remaining / rate, job.heavy))
+        return start
+
+    def profile(self, duration: float, interval: float = PROFILE_INTERVAL) -> str:
+        """
+        Sample every worker's stacks for ``duration`` seconds, blocking until done.
+
+        Workers only take samples while they use CPU, so an idle service
+        returns an empty profile.
+
+        Args:
+            duration (float): Seconds to profile for, capped by ``PROFILE_MAX_DURATION``
+            interval (float): Seconds of CPU time between samples
+
+        Returns:
+            str: The merged samples as collapsed stacks, for flamegraph tools
+
+        Raises:
+            RuntimeError: If the service is not running or a profile is already being taken
+        """
+        duration = min(duration, PROFILE_MAX_DURATION)
+        if not self._profile_lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already being taken")
+        try:
+            with self._lock:
+                if not self._running:
+                    raise RuntimeError("Generation service is not running")
+                # Profiles of an earlier round that came in after its deadline are told apart by the round id
+                profile_round = next(self._profile_rounds)
+                for control in self._controls:
+                    control.put(("profile", (profile_round, duration, interval)))
+                workers = len(self._controls)
+            profiles: Dict[int, Dict[str, int]] = {}
+            deadline = time.monotonic() + duration + MONITOR_INTERVAL + 5.0
+            while len(profiles) < workers:
+                try:
+                    received_round, index, counts = self._profiles.get(
+                        timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    logger.warning(f"Only {len(profiles)} of {workers} workers returned a profile")
+                    break
+                if received_round == profile_round:
+                    profiles[index] = counts
+            return collapsed(merge(profiles.values()))
+        finally:
+            self._profile_lock.release()
+
+    def metrics_text(self) -> str:
+        """Return the service's metrics in the Prometheus text format"""
+        with self._lock:
+            self._active_metric.set(len(self._jobs))
+            self._queued_metric.set(len(self.scheduler))
+        return self.metrics.render()
+
+    def keys_per_second(self) -> float:
+        """Return the stream's last measured throughput (0.0 before any job has run)"""
+        return self._rate
+
+    def total_attempts(self) -> int:
+        """Return the number of keys drawn by the stream so far"""
+        return sum(self._counters) if self._counters is not None else 0
+
+    def active_jobs(self) -> int:
+        """Return the number of jobs currently being searched for"""
+        return len(self._jobs)
+
+    def queued_jobs(self) -> int:
+        """Return the number of jobs waiting for a slot"""
+        return len(self.scheduler)
+
+    def _dispatch(self, total: int) -> bool:
+        """Start every job the scheduler admits; returns whether any started"""
+        ready = self.scheduler.pop_ready()
+        for job in ready:
+            job.start_time = time.time()
+            job.start_attempts = total
+            self._jobs[job.job_id] = job
+            self._queue_wait_metric.observe(job.start_time - job.submit_time, job.length)
+        return bool(ready)
+
+    def _broadcast(self):
+        patterns = {job_id: job.pattern for job_id, job in self._jobs.items()}
+        for control in self._controls:
+            control.put(("jobs", patterns))
+
+    def _refresh_harvest(self):
+        """Re-read what the inventory is short of"""
+        if self.inventory is None:
+            return
+        self._last_harvest_refresh = time.time()
+        try:
+            shortfall = self.inventory.shortfall()
+        except Exception as e:
+            logger.error(f"Could not read inventory stock: {e}")
+            return
+        previous, self._harvest = self._harvest, shortfall
+        if set(previous) != set(shortfall):
+            self._send_harvest()
+
+    def _send_harvest(self):
+        patterns = {i: PatternMatcher(prefix) for i, prefix in enumerate(self._harvest)}
+        for control in self._controls:
+            control.put(("harvest", patterns))
+
+    def _claim(self, job_ids: Tuple[int, ...], raw: bytes) -> Optional[_Job]:
+        """
+        Pick the one job a reported keypair is handed to.
+
+        The job it was reported for, or if that one has already been finished
+        by another worker's key, the oldest running job it also matches.
+
+        Args:
+            job_ids (Tuple[int, ...]): Job ids the worker reported the key for
+            raw (bytes): The 64-byte keypair
+
+        Returns:
+            Optional[_Job]: The job to finish, or None if no running job wants the key
+        """
+        for job_id in job_ids:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job
+        pubkey = raw[32:]
+        for job_id in sorted(self._jobs):
+            job = self._jobs[job_id]
+            if job.start_time is not None and job.pattern.matches(pubkey):
+                return job
+        return None
+
+    def _stock(self, raw: bytes):
+        """Add a harvested keypair to the inventory if its prefix is still wanted"""
+        keypair = Keypair.from_bytes(raw)
+        address = str(keypair.pubkey())
+        wanted = [prefix for prefix in self._harvest if address.startswith(prefix)]
+        if not wanted:
+            # Reported before the workers learned the prefix is stocked
+            return
+        try:
+            self.inventory.add(keypair)
+        except Exception as e:
+            logger.error(f"Could not stock harvested keypair: {e}")
+            return
+        for prefix in wanted:
+            self._harvest[prefix] -= 1
+            if not self._harvest[prefix]:
+                del self._harvest[prefix]
+        if any(prefix not in self._harvest for prefix in wanted):
+            self._send_harvest()
+
+    def _release(self, job: _Job) -> bool:
+        """Forget a job and free its slot or queue entry; returns whether it was running"""
+        self._tasks.pop(job.task_id, None)
+        if self._jobs.pop(job.job_id, None) is not None:
+            self.scheduler.finished(job)
+            return True
+        self.scheduler.remove(job)
+        return False
+
+    def _stages(self, job: _Job) -> Optional[Dict[str, float]]:
+        return stage_seconds(job.stage_ns) if self.stage_timing else None
+
+    def _finish(self, job: _Job, keypair: Optional[Keypair], total: int):
+        running = self._release(job)
+        attempts = min(job.attempts(total), self.max_attempts)
+        if running:
+            attempts = max(1, attempts)
+        if keypair is not None:
+            self._finished_metric.inc('found')
+            self._time_to_result_metric.observe(time.time() - job.submit_time, job.length)
+        else:
+            self._finished_metric.inc('exhausted' if attempts >= self.max_attempts else 'stopped')
+        if self.store is not None:
+            self.store.delete_checkpoint(self.name, job.task_id)
+        if not job.future.done():
+            job.future.set_result(SearchResult(keypair, attempts, job.elapsed(), self._stages(job)))
+
+    def _save_checkpoints(self, total: int):
+        checkpoints = [job.checkpoint(total) for job in self._tasks.values()]
+        if checkpoints:
+            self.store.save_checkpoints(self.name, checkpoints)
+        self._last_checkpoint = time.time()
+
+    def _monitor(self):
+        """Route matches to their jobs, fail jobs that ran out of attempts and checkpoint the rest"""
+        while self._running:
+            try:
+                results = [self._results.get(timeout=MONITOR_INTERVAL)]
+            except queue.Empty:
+                results = []
+            # Take everything queued since, so a burst of harvest hits doesn't hold up job matches a tick each
+            while results:
+                try:
+                    results.append(self._results.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                if not self._running:
+                    break
+                total = self.total_attempts()
+                now = time.time()
+                sample_time, sample_total = self._rate_sample
+                self._keys_metric.inc(amount=total - self._keys_sample)
+                self._keys_sample = total
+                if not self._jobs:
+                    # Idle workers: keep the last rate rather than measuring zero
+                    self._rate_sample = (now, total)
+                    self._worker_sample = list(self._counters)
+                elif now - sample_time >= RATE_WINDOW:
+                    self._rate = (total - sample_total) / (now - sample_time)
+                    self._rate_sample = (now, total)
+                    self._keys_per_second_metric.set(self._rate)
+                    counts = list(self._counters)
+                    for worker, (count, previous) in enumerate(zip(counts, self._worker_sample)):
+                        self._worker_keys_per_second_metric.set((count - previous) / (now - sample_time), str(worker))
+                    self._worker_sample = counts
+
+                # Split the CPU time spent since the last tick between the running jobs
+                cpu = sum(self._cpu_times)
+                if self._jobs:
+                    share = (cpu - self._cpu_sample) / len(self._jobs)
+                    for job in self._jobs.values():
+                        job.cpu_seconds += share
+                        if self.quotas is not None:
+                            self.quotas.charge(job.user_id, share)
+                self._cpu_sample = cpu
+
+                # Every running job saw every key, so each gets the stream's whole stage time
+                if self._stage_ns is not None:
+                    stage_ns = [sum(self._stage_ns[stage::len(STAGES)]) for stage in range(len(STAGES))]
+                    deltas = [ns - previous for ns, previous in zip(stage_ns, self._stage_sample)]
+                    for job in self._jobs.values():
+                        job.stage_ns = [ns + delta for ns, delta in zip(job.stage_ns, deltas)]
+                    self._stage_sample = stage_ns
+
+                changed = False
+                for job_ids, raw in results:
+                    if job_ids:
+                        job = self._claim(job_ids, raw)
+                        if job is not None:
+                            self._finish(job, Keypair.from_bytes(raw), total)
+                            changed = True
+                for job_ids, raw in results:
+                    if not job_ids:
+                        # Incidental match for the inventory
+                        self._stock(raw)
+                if self.inventory is not None and now - self._last_harvest_refresh >= HARVEST_REFRESH_INTERVAL:
+                    self._refresh_harvest()
+                for job in list(self._jobs.values()):
+                    if job.attempts(total) >= self.max_attempts:
+                        self._finish(job, None, total)
+                        changed = True
+                if changed:
+                    self._dispatch(total)
+                    self._broadcast()
+
+                if self.store is not None and now - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+                    try:
+                        self._save_checkpoints(total)
+                    except Exception as e:
+                        logger.error(f"Checkpoint failed: {e}")
@@ -0,0 +1,268 @@
+"""
+Pre-mined stock of short-prefix vanity addresses.
+
+A low-priority miner process fills a bounded stock of keypairs for the
+prefixes users ask for most (plus any configured ones) while the machine
+has CPU to spare. Secret keys are encrypted at rest with Fernet; public
+addresses are stored in clear so a request can be matched with an index
+range scan. Every keypair is handed out at most once: it is deleted in the
+same transaction that reads it.
+"""
+
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from cryptography.fernet import Fernet
+from solders.keypair import Keypair
+from generation_service import PatternIndex
+from vanity_generator import WORKER_BATCH_SIZE, KeySource, PatternMatcher, case_variants
+
+logger = logging.getLogger(__name__)
+
+# Database file and encryption key (a Fernet key; generated into a file next to the database if unset)
+INVENTORY_PATH = os.getenv(
+    'INVENTORY_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inventory.db')
+)
+INVENTORY_KEY = os.getenv('INVENTORY_KEY')
+
+# Prefixes always kept in stock, comma separated
+INVENTORY_PREFIXES = [prefix for prefix in os.getenv('INVENTORY_PREFIXES', '').split(',') if prefix]
+
+# Keypairs kept per prefix, and in total
+INVENTORY_PER_PREFIX = int(os.getenv('INVENTORY_PER_PREFIX', '5'))
+INVENTORY_MAX_SIZE = int(os.getenv('INVENTORY_MAX_SIZE', '500'))
+
+# Only prefixes up to this length are stocked; longer ones take too long to mine speculatively
+INVENTORY_MAX_PREFIX_LENGTH = 4
+
+# Most-requested prefixes stocked besides the configured ones
+INVENTORY_POPULAR_PREFIXES = 20
+
+# Seconds the miner waits before re-checking the stock when nothing is missing
+INVENTORY_IDLE_SECONDS = 10.0
+
+# Seconds the miner searches before re-reading which prefixes are missing
+INVENTORY_REFRESH_SECONDS = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory (
+    id INTEGER PRIMARY KEY,
+    address TEXT NOT NULL,
+    secret BLOB NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS inventory_address ON inventory (address);
+CREATE TABLE IF NOT EXISTS demand (
+    prefix TEXT PRIMARY KEY,
+    requests INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+def load_key(path: str = INVENTORY_PATH) -> bytes:
+    """
+    Return the inventory's Fernet key.
+
+    Uses ``INVENTORY_KEY`` if set; otherwise reads (or creates) ``<path>.key``
+    with owner-only permissions. Keep the key out of backups of the database.
+    """
+    if INVENTORY_KEY:
+        return INVENTORY_KEY.encode()
+    key_path = f"{path}.key"
+    if os.path.exists(key_path):
+        with open(key_path, 'rb') as f:
+            return f.read().strip()
+    logger.warning(f"INVENTORY_KEY not set; storing a generated key in {key_path}")
+    key = Fernet.generate_key()
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(key)
+    return key
+
+
+class Inventory:
+    """
+    Encrypted stock of ready-made vanity keypairs.
+
+    :meth:`take` hands out a stored keypair matching a request (or None);
+    :meth:`record_demand` counts requested prefixes so the miner started by
+    :meth:`start_miner` knows what to stock.
+    """
+
+    def __init__(self, path: str = INVENTORY_PATH, key: Optional[bytes] = None,
+                 per_prefix: int = INVENTORY_PER_PREFIX, max_size: int = INVENTORY_MAX_SIZE,
+                 prefixes: Optional[List[str]] = None):
+        self.path = path
+        self.per_prefix = per_prefix
+        self.max_size = max_size
+        self.prefixes = list(INVENTORY_PREFIXES if prefixes is None else prefixes)
+        self._key = key or load_key(path)
+        self._fernet = Fernet(self._key)
+
+        new_file = not os.path.exists(path)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        if new_file:
+            os.chmod(path, 0o600)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._miners = []
+        self._stop_event = None
+
+    def add(self, keypair: Keypair):
+        """Store a keypair"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO inventory (address, secret, created) VALUES (?, ?, ?)",
+                (str(keypair.pubkey()), self._fernet.encrypt(bytes(keypair)), time.time())
+            )
+
+    def take(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True) -> Optional[Keypair]:
+        """
+        Hand out a stored keypair matching the pattern and delete it.
+
+        Args:
+            prefix (str): The desired (validated) prefix
+            suffix (str): The desired (validated) suffix
+            case_sensitive (bool): Whether letters must match in case
+
+        Returns:
+            Optional[Keypair]: The keypair, or None if nothing in stock matches
+        """
+        prefixes = [prefix] if case_sensitive else case_variants(prefix)
+        suffixes = PatternMatcher(prefix, suffix, case_sensitive).suffixes
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for variant in prefixes:
+                    rows = self._db.execute(
+                        "SELECT id, address, secret FROM inventory WHERE address >= ? AND address < ? ORDER BY id",
+                        (variant, variant + '\x7f')
+                    )
+                    for row_id, address, secret in rows:
+                        if suffixes and address[-len(suffix):] not in suffixes:
+                            continue
+                        self._db.execute("DELETE FROM inventory WHERE id = ?", (row_id,))
+                        self._db.execute("COMMIT")
+                        return Keypair.from_bytes(self._fernet.decrypt(secret))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return None
+
+    def record_demand(self, prefix: str):
+        """Count a request for a prefix, so popular short prefixes get stocked"""
+        if not prefix or len(prefix) > INVENTORY_MAX_PREFIX_LENGTH:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO demand (prefix, requests, updated) VALUES (?, 1, ?) "
+                "ON CONFLICT (prefix) DO UPDATE SET requests = requests + 1, updated = excluded.updated",
+                (prefix, time.time())
+            )
+
+    def stock(self) -> Dict[str, int]:
+        """Return how many keypairs are stored for each stocked prefix"""
+        with self._lock:
+            popular = [
+                prefix for prefix, in self._db.execute(
+                    "SELECT prefix FROM demand ORDER BY requests DESC, updated DESC LIMIT ?",
+                    (INVENTORY_POPULAR_PREFIXES,)
+                )
+            ]
+            stock = {}
+            for prefix in dict.fromkeys(self.prefixes + popular):
+                stock[prefix] = self._db.execute(
+                    "SELECT COUNT(*) FROM inventory WHERE address >= ? AND address < ?", (prefix, prefix + '\x7f')
+                ).fetchone()[0]
+        return stock
+
+    def shortfall(self) -> Dict[str, int]:
+        """Return how many keypairs each stocked prefix is missing, within the ``max_size`` cap"""
+        with self._lock:
+            room = self.max_size - self._db.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+        shortfall = {}
+        for prefix, count in self.stock().items():
+            needed = min(self.per_prefix - count, room)
+            if needed > 0:
+                shortfall[prefix] = needed
+                room -= needed
+        return shortfall
+
+    def missing(self) -> List[str]:
+        """Return the stocked prefixes that are short of keypairs"""
+        return list(self.shortfall())
+
+    def size(self) -> int:
+        """Return the number of stored keypairs"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+
+    def start_miner(self, workers: int = 1):
+        """Start ``workers`` low-priority miner processes"""
+        if self._miners:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._stop_event = ctx.Event()
+        self._miners = [
+            ctx.Process(target=_mine, args=(self.path, self._key, self.per_prefix, self.max_size,
+                                            self.prefixes, self._stop_event), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self._miners:
+            process.start()
+        logger.info(f"Inventory miner started with {workers} workers")
+
+    def stop_miner(self):
+        """Stop the miner processes"""
+        if not self._miners:
+            return
+        self._stop_event.set()
+        for process in self._miners:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._miners = []
+
+    def close(self):
+        """Stop the miner and close the database"""
+        self.stop_miner()
+        with self._lock:
+            self._db.close()
+
+
+def _mine(path: str, key: bytes, per_prefix: int, max_size: int, prefixes: List[str], stop_event):
+    """
+    Miner process body: search for every missing prefix at once until the
+    stock is full, then idle. Runs at the lowest CPU priority so live
+    searches always come first.
+    """
+    os.nice(19)
+    inventory = Inventory(path, key, per_prefix, max_size, prefixes)
+    source = KeySource()
+    try:
+        while not stop_event.is_set():
+            missing = inventory.missing()
+            if not missing:
+                stop_event.wait(INVENTORY_IDLE_SECONDS)
+                continue
+
+            lookup = PatternIndex({i: PatternMatcher(prefix) for i, prefix in enumerate(missing)})
+            deadline = time.time() + INVENTORY_REFRESH_SECONDS
+            found = False
+            while not found and time.time() < deadline and not stop_event.is_set():
+                for keypair in source.derive(WORKER_BATCH_SIZE):
+                    if lookup.lookup(keypair.to_bytes()[32:]):
+                        inventory.add(keypair)
+                        found = True
+    except KeyboardInterrupt:
+        pass
+    finally:
+        inventory.close()
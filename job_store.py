@@ -0,0 +1,287 @@
+"""
+Persistent store for generation tasks.
+
+Task records live in a SQLite database in WAL mode, so status reads never
+wait on writers and records survive restarts. Writes are buffered and
+flushed in one transaction every ``FLUSH_INTERVAL`` seconds by a
+background thread; reads see buffered records immediately. Finished tasks
+are purged once they are older than the store's TTL.
+
+Private keys in records are encrypted at rest with the inventory's Fernet
+key (``INVENTORY_KEY``), so a copy of the database alone doesn't give
+away finished wallets.
+
+The same database holds checkpoints of unfinished searches, which a
+generation service writes periodically and resumes from after a restart.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from cryptography.fernet import Fernet
+from inventory import load_key
+
+logger = logging.getLogger(__name__)
+
+# Database file, shared by the front ends of one deployment
+JOB_STORE_PATH = os.getenv(
+    'JOB_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db')
+)
+
+# Seconds a finished task stays readable before it is purged
+JOB_TTL = float(os.getenv('JOB_TTL_HOURS', '24')) * 3600
+
+# Seconds between flushes of buffered writes
+FLUSH_INTERVAL = 0.5
+
+# Seconds between purges of expired tasks
+PURGE_INTERVAL = 300.0
+
+# Statuses after which a task never changes again
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Record fields encrypted on disk; stored under ``_encrypted`` as Fernet tokens
+SECRET_FIELDS = ('private_key',)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    task_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    finished REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, created);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished) WHERE finished IS NOT NULL;
+CREATE TABLE IF NOT EXISTS checkpoints (
+    service TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    user_id TEXT,
+    updated REAL NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (service, task_id)
+);
+"""
+
+
+class JobStore:
+    """
+    SQLite-backed map of task id to task record.
+
+    A record is the JSON-serialisable dict the front ends return from
+    their status endpoints; its ``status`` key decides when the task counts
+    as finished.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, ttl: float = JOB_TTL,
+                 flush_interval: float = FLUSH_INTERVAL, key: Optional[bytes] = None):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        # Shared with the inventory, so every process of a deployment can read the records
+        self._fernet = Fernet(key or load_key())
+
+        new_file = path != ':memory:' and not os.path.exists(path)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if new_file:
+            # Records may hold private keys
+            os.chmod(path, 0o600)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, tuple] = {}
+        self._closed = threading.Event()
+        self._last_purge = 0.0
+        self._flusher = threading.Thread(target=self._run, name="job-store-flusher", daemon=True)
+        self._flusher.start()
+
+    def put(self, task_id: str, record: Dict[str, Any], user_id: Optional[str] = None):
+        """
+        Store a task's record; it is written to disk on the next flush.
+
+        Args:
+            task_id (str): The task's id
+            record (Dict[str, Any]): The task's full status record
+            user_id (Optional[str]): Who owns the task (kept from earlier writes if None)
+        """
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(task_id)
+            if user_id is None and pending is not None:
+                user_id = pending[0]
+            self._pending[task_id] = (None if user_id is None else str(user_id), dict(record), now)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a task's record.
+
+        Args:
+            task_id (str): The task's id
+
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if unknown or purged
+        """
+        with self._lock:
+            pending = self._pending.get(task_id)
+            if pending is not None:
+                return dict(pending[1])
+            row = self._db.execute("SELECT data FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def owner(self, task_id: str) -> Optional[str]:
+        """Return the user id a task was stored with, or None if unknown or stored without one"""
+        with self._lock:
+            pending = self._pending.get(task_id)
+            # A buffered write without an owner keeps the one already on disk
+            if pending is not None and pending[0] is not None:
+                return pending[0]
+            row = self._db.execute("SELECT user_id FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def by_user(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Return a user's most recent tasks, newest first.
+
+        Args:
+            user_id (str): The owner
+            limit (int): Maximum number of records
+
+        Returns:
+            List[Dict[str, Any]]: Records with their ``task_id`` added
+        """
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT task_id, data FROM jobs WHERE user_id = ? ORDER BY created DESC LIMIT ?",
+                (str(user_id), limit)
+            ).fetchall()
+        return [{**self._decode(data), 'task_id': task_id} for task_id, data in rows]
+
+    def save_checkpoints(self, service: str, checkpoints: List[Dict[str, Any]]):
+        """
+        Store the state of a service's unfinished jobs in one transaction.
+
+        Args:
+            service (str): Name of the generation service the jobs belong to
+            checkpoints (List[Dict[str, Any]]): One dict per job, with at least
+                ``task_id`` and ``user_id``
+        """
+        now = time.time()
+        rows = [
+            (service, checkpoint['task_id'], checkpoint.get('user_id'), now, json.dumps(checkpoint))
+            for checkpoint in checkpoints
+        ]
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO checkpoints (service, task_id, user_id, updated, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+
+    def delete_checkpoint(self, service: str, task_id: str):
+        """Forget a job's checkpoint once it has finished"""
+        with self._lock:
+            self._db.execute("DELETE FROM checkpoints WHERE service = ? AND task_id = ?", (service, task_id))
+
+    def checkpoints(self, service: str) -> List[Dict[str, Any]]:
+        """Return a service's stored checkpoints, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM checkpoints WHERE service = ? ORDER BY updated", (service,)
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def flush(self):
+        """Write all buffered records in one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [
+                (task_id, user_id, record.get('status', ''), updated,
+                 updated if record.get('status') in FINISHED_STATUSES else None, self._encode(record))
+                for task_id, (user_id, record, updated) in self._pending.items()
+            ]
+            self._pending.clear()
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    """
+                    INSERT INTO jobs (task_id, user_id, status, created, updated, finished, data)
+                    VALUES (?1, ?2, ?3, ?4, ?4, ?5, ?6)
+                    ON CONFLICT (task_id) DO UPDATE SET
+                        user_id = COALESCE(excluded.user_id, jobs.user_id),
+                        status = excluded.status,
+                        updated = excluded.updated,
+                        finished = excluded.finished,
+                        data = excluded.data
+                    """,
+                    rows
+                )
+
+    def _encode(self, record: Dict[str, Any]) -> str:
+        """Serialise a record for the database, encrypting its secret fields"""
+        record = dict(record)
+        secrets = {field: record.pop(field) for field in SECRET_FIELDS if record.get(field)}
+        if secrets:
+            record['_encrypted'] = {
+                field: self._fernet.encrypt(value.encode()).decode() for field, value in secrets.items()
+            }
+        return json.dumps(record)
+
+    def _decode(self, data: str) -> Dict[str, Any]:
+        """Parse a stored record, decrypting its secret fields"""
+        record = json.loads(data)
+        for field, token in record.pop('_encrypted', {}).items():
+            record[field] = self._fernet.decrypt(token.encode()).decode()
+        return record
+
+    def purge(self) -> int:
+        """
+        Delete tasks that finished more than ``ttl`` seconds ago.
+
+        Returns:
+            int: Number of tasks deleted
+        """
+        self.flush()
+        with self._lock:
+            with self._db:
+                cursor = self._db.execute(
+                    "DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?", (time.time() - self.ttl,)
+                )
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} expired tasks")
+        return cursor.rowcount
+
+    def close(self):
+        """Flush buffered records and close the database"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self._db.close()
+
+    def _run(self):
+        """Flush buffered writes periodically and purge expired tasks"""
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.time() - self._last_purge >= PURGE_INTERVAL:
+                    self._last_purge = time.time()
+                    self.purge()
+            except sqlite3.Error as e:
+                logger.error(f"Job store write failed: {e}")
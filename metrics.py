@@ -0,0 +1,142 @@
+"""
+Prometheus text-format metrics without a client library.
+
+Counters, gauges and histograms keep their values in plain dicts keyed by
+label values, so an update is a dict lookup and an addition (plus a bisect
+for histograms), cheap enough for the service's monitor loop. Updates are
+not locked: callers already update under their own locks, or tolerate a
+scrape seeing a half-finished tick. :meth:`Registry.render` produces the
+exposition format served on ``/metrics``.
+"""
+
+import math
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds, in seconds, of the default histogram buckets
+DEFAULT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 14400.0)
+
+# Content type of the text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    """Escape a label value for the text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _label_text(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def clear(self):
+        """Drop every label combination (e.g. for workers that no longer exist)"""
+        self._values.clear()
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return '\n'.join(lines + self._samples())
+
+
+class Counter(_Metric):
+    """A value that only goes up"""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        """Add ``amount`` to the counter for ``labels`` (values in ``labelnames`` order)"""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that is set to the latest reading"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *labels):
+        """Set the gauge for ``labels`` (values in ``labelnames`` order)"""
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, with their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + ((math.inf,) if math.inf not in buckets else ())
+        # Per label combination: [count per bucket (not cumulative)..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, *labels):
+        """Record one observation for ``labels``"""
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def _samples(self) -> List[str]:
+        samples = []
+        names = self.labelnames + ('le',)
+        for labels, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                samples.append(f"{self.name}_bucket{_label_text(names, labels + (_format_value(bound),))} "
+                               f"{cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            samples.append(f"{self.name}_sum{label_text} {_format_value(state[-2])}")
+            samples.append(f"{self.name}_count{label_text} {state[-1]}")
+        return samples
+
+
+class Registry:
+    """A set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Return every metric in the text exposition format"""
+        return ''.join(metric.render() + '\n' for metric in self._metrics)
@@ -0,0 +1,102 @@
+"""
+Sampling profiler for the key-grinding workers.
+
+A :class:`SamplingProfiler` runs inside a worker process for a bounded
+window: ``setitimer(ITIMER_PROF)`` interrupts the process every
+``interval`` seconds of CPU time and the signal handler counts the Python
+stack it interrupted. Calls into C (``Keypair()``, ``pubkey()``, ``str()``)
+show up as the Python line that made them. Counts from every worker are
+merged with :func:`merge` and written by :func:`collapsed` in the
+collapsed-stack format read by flamegraph.pl, speedscope and similar tools.
+
+Unix only (``signal.setitimer``).
+"""
+
+import os
+import signal
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+# Seconds of CPU time between samples
+PROFILE_INTERVAL = 0.005
+
+# Longest profiling window, in seconds
+PROFILE_MAX_DURATION = 60.0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """
+    Counts the interrupted stacks of the current process for ``duration`` seconds.
+
+    With a ``root`` code object, stacks start at its frame, leaving out the
+    process start-up frames below it.
+    """
+
+    def __init__(self, duration: float, interval: float = PROFILE_INTERVAL, root=None):
+        if not hasattr(signal, 'setitimer'):
+            raise RuntimeError("Sampling profiler needs signal.setitimer (Unix only)")
+        self.duration = min(max(duration, 0.0), PROFILE_MAX_DURATION)
+        self.interval = interval
+        self.root = root
+        self.counts: Counter = Counter()
+        self._end = 0.0
+        self._previous_handler = None
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            if frame.f_code is self.root:
+                break
+            frame = frame.f_back
+        self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        """Start sampling; must be called from the main thread"""
+        self._end = time.monotonic() + self.duration
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def remaining(self) -> float:
+        """Return the seconds left in the window"""
+        return max(0.0, self._end - time.monotonic())
+
+    def done(self) -> bool:
+        """Return whether the window has passed"""
+        return time.monotonic() >= self._end
+
+    def stop(self) -> Dict[str, int]:
+        """Stop sampling and return the sample count per collapsed stack"""
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        return dict(self.counts)
+
+
+def merge(profiles: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Add up the stack counts of several processes"""
+    merged: Counter = Counter()
+    for counts in profiles:
+        merged.update(counts)
+    return dict(merged)
+
+
+def collapsed(counts: Dict[str, int]) -> str:
+    """Format stack counts as collapsed stacks (``frame;frame;frame count`` per line), most samples first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def hottest_frames(collapsed_text: str, limit: int = 5) -> List[Tuple[str, float]]:
+    """Return the innermost frames with the largest share of samples, from collapsed stacks"""
+    own: Counter = Counter()
+    for line in collapsed_text.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack:
+            own[stack.rsplit(';', 1)[-1]] += int(count)
+    total = sum(own.values())
+    return [(frame, count / total) for frame, count in own.most_common(limit)]
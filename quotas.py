@@ -0,0 +1,217 @@
+"""
+Per-user request rate limits and CPU-second quotas.
+
+Each user has two token buckets: one for requests (``RATE_LIMIT_PER_USER``
+per hour, bursts of ``RATE_LIMIT_BURST``) and one of CPU seconds
+(``CPU_QUOTA_SECONDS`` per day). The generation service charges the CPU
+bucket with the worker time actually spent on the user's searches; a
+search whose expected cost exceeds the user's balance is refused with the
+time until enough has refilled.
+
+State lives in memory; with ``QUOTA_PATH`` set it is loaded at start and
+saved periodically, so a restart does not hand out fresh budgets.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Requests per user per hour, and how many may come at once
+RATE_LIMIT_PER_USER = float(os.getenv('RATE_LIMIT_PER_USER', '10'))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', '3'))
+
+# CPU seconds of search per user per day (one core-hour by default)
+CPU_QUOTA_SECONDS = float(os.getenv('CPU_QUOTA_SECONDS', '3600'))
+
+# JSON file the quota state is kept in; unset keeps it in memory only
+QUOTA_PATH = os.getenv('QUOTA_PATH')
+
+# Seconds between saves of the quota state
+QUOTA_SAVE_INTERVAL = 60.0
+
+
+class QuotaExceeded(Exception):
+    """
+    A user is over a limit.
+
+    ``reason`` is ``"rate"`` or ``"cpu"``; ``retry_after`` is the number of
+    seconds until the request would be allowed, or None if it never will be
+    (the search costs more than the whole daily budget).
+    """
+
+    def __init__(self, message: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """A bucket of ``capacity`` tokens refilled at ``rate`` tokens per second"""
+
+    def __init__(self, capacity: float, rate: float, tokens: Optional[float] = None,
+                 updated: Optional[float] = None):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity if tokens is None else tokens
+        self.updated = time.time() if updated is None else updated
+
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float) -> Optional[float]:
+        """Return seconds until ``amount`` tokens are available (0 if they are), None if never"""
+        if amount > self.capacity:
+            return None
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else None
+
+    def full(self, now: float) -> bool:
+        """Return whether the bucket has refilled completely"""
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class QuotaManager:
+    """
+    Tracks every user's request and CPU buckets.
+
+    Safe to call from several threads: the service charges CPU from its
+    monitor thread while front end requests are checked elsewhere.
+    """
+
+    def __init__(self, requests_per_hour: float = RATE_LIMIT_PER_USER, burst: float = RATE_LIMIT_BURST,
+                 cpu_seconds_per_day: float = CPU_QUOTA_SECONDS, path: Optional[str] = QUOTA_PATH):
+        self.requests_per_hour = requests_per_hour
+        self.burst = burst
+        self.cpu_seconds_per_day = cpu_seconds_per_day
+        self.path = path
+        self._lock = threading.Lock()
+        self._requests: Dict[str, TokenBucket] = {}
+        self._cpu: Dict[str, TokenBucket] = {}
+        self._last_save = time.time()
+        if path:
+            self.load()
+
+    def _request_bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._requests.get(user_id)
+        if bucket is None:
+            bucket = self._requests[user_id] = TokenBucket(self.burst, self.requests_per_hour / 3600)
+        return bucket
+
+    def _cpu_bucket(self, user_id: str) -> TokenBucket:
+        bucket = self._cpu.get(user_id)
+        if bucket is None:
+            bucket = self._cpu[user_id] = TokenBucket(self.cpu_seconds_per_day, self.cpu_seconds_per_day / 86400)
+        return bucket
+
+    def check_request(self, user_id: str):
+        """
+        Take one request token.
+
+        Raises:
+            QuotaExceeded: If the user has no token left
+        """
+        now = time.time()
+        with self._lock:
+            bucket = self._request_bucket(str(user_id))
+            bucket.refill(now)
+            wait = bucket.wait_time(1)
+            if wait is None:
+                raise QuotaExceeded("Requests are disabled", "rate", None)
+            if wait:
+                raise QuotaExceeded(f"Too many requests; try again in {wait:.0f}s", "rate", wait)
+            bucket.tokens -= 1
+
+    def check_cpu(self, user_id: str, expected_seconds: float):
+        """
+        Check that the user can afford a search expected to take ``expected_seconds`` of CPU.
+
+        Nothing is taken: searches are charged as they run (see :meth:`charge`).
+
+        Raises:
+            QuotaExceeded: If the balance is short; ``retry_after`` is None
+                if the search costs more than the whole budget
+        """
+        now = time.time()
+        with self._lock:
+            bucket = self._cpu_bucket(str(user_id))
+            bucket.refill(now)
+            # Even a cheap search needs a positive balance: running searches may have overdrawn it
+            wait = bucket.wait_time(max(expected_seconds, 1e-9))
+        if wait is None:
+            raise QuotaExceeded(
+                f"Search needs ~{expected_seconds:,.0f} CPU seconds, more than the "
+                f"{self.cpu_seconds_per_day:,.0f}s daily quota", "cpu", None
+            )
+        if wait:
+            raise QuotaExceeded(f"CPU quota used up; try again in {wait:.0f}s", "cpu", wait)
+
+    def charge(self, user_id: str, cpu_seconds: float):
+        """Deduct CPU time spent on a user's search; the balance may go negative"""
+        now = time.time()
+        with self._lock:
+            bucket = self._cpu_bucket(str(user_id))
+            bucket.refill(now)
+            bucket.tokens -= cpu_seconds
+
+    def usage(self, user_id: str) -> Dict[str, float]:
+        """Return a user's remaining requests and CPU seconds"""
+        now = time.time()
+        with self._lock:
+            requests = self._request_bucket(str(user_id))
+            cpu = self._cpu_bucket(str(user_id))
+            requests.refill(now)
+            cpu.refill(now)
+            return {'requests': requests.tokens, 'cpu_seconds': cpu.tokens}
+
+    def load(self):
+        """Read saved buckets, keeping the time that passed since as refill"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for user_id, (tokens, updated) in state.get('requests', {}).items():
+                self._requests[user_id] = TokenBucket(self.burst, self.requests_per_hour / 3600, tokens, updated)
+            for user_id, (tokens, updated) in state.get('cpu', {}).items():
+                self._cpu[user_id] = TokenBucket(self.cpu_seconds_per_day, self.cpu_seconds_per_day / 86400,
+                                                 tokens, updated)
+
+    def save(self):
+        """Drop the buckets that are full again (the default) and write the rest to ``path``"""
+        now = time.time()
+        with self._lock:
+            state = {
+                'requests': {user_id: [bucket.tokens, bucket.updated]
+                             for user_id, bucket in self._requests.items() if not bucket.full(now)},
+                'cpu': {user_id: [bucket.tokens, bucket.updated]
+                        for user_id, bucket in self._cpu.items() if not bucket.full(now)},
+            }
+            # Users back at their full allowance need no state
+            self._requests = {user_id: self._requests[user_id] for user_id in state['requests']}
+            self._cpu = {user_id: self._cpu[user_id] for user_id in state['cpu']}
+            self._last_save = now
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def maybe_save(self):
+        """Save (and forget idle users) if ``QUOTA_SAVE_INTERVAL`` has passed since the last save"""
+        if time.time() - self._last_save >= QUOTA_SAVE_INTERVAL:
+            try:
+                self.save()
+            except OSError as e:
+                logger.error(f"Could not save quota state: {e}")
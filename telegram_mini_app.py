@@ -1,13 +1,25 @@
 import asyncio
+import hashlib
+import hmac
 import logging
 import json
 import os
+import secrets
+import time
 from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
 from aiohttp import web, ClientSession
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, SOLANA_NETWORK, MAX_ATTEMPTS, MAX_PREFIX_LENGTH
 from vanity_generator import SolanaVanityGenerator
+from compute_daemon import ComputeClient, ComputeError
+from generation_service import AdmissionRejected, SearchCancelled
+from quotas import QuotaExceeded
+from job_store import JobStore
+from inventory import Inventory
+from metrics import CONTENT_TYPE, Registry
 
 # Configure logging
 logging.basicConfig(
@@ -19,12 +31,91 @@ logger = logging.getLogger(__name__)
 # Initialize the vanity generator
 vanity_generator = SolanaVanityGenerator(max_attempts=MAX_ATTEMPTS)
 
-# Store active generations
-active_generations = {}
+# Task records, persisted so results survive restarts
+job_store = JobStore()
+
+# Pre-mined short-prefix keypairs, handed out before starting a live search
+inventory = Inventory()
+
+# Searches run in the compute daemon (compute_daemon.py), so they survive app restarts
+compute = ComputeClient(name="mini_app")
+
+# The mini app's own metrics; /metrics adds the compute daemon's
+metrics = Registry()
+requests_metric = metrics.counter(
+    'vanity_frontend_requests_total',
+    'Generate requests, by outcome (invalid, rate_limited, inventory, rejected or search)',
+    ('outcome',)
+)
+compute_up_metric = metrics.gauge('vanity_compute_up', 'Whether the compute daemon answered the scrape')
+
+# Bearer token for the admin API (/api/admin/...); unset disables it
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Seconds without a status poll after which a search is taken as abandoned and cancelled
+ABANDONED_TASK_TIMEOUT = float(os.getenv('ABANDONED_TASK_TIMEOUT', '60'))
+
+# Seconds between attempts to reach the compute daemon when resuming searches at start-up
+RESUME_RETRY_INTERVAL = 5.0
+
+# Seconds a Telegram WebApp initData signature is accepted after it was issued
+INIT_DATA_MAX_AGE = float(os.getenv('INIT_DATA_MAX_AGE', '86400'))
+
+# Request header carrying the WebApp's raw initData string
+INIT_DATA_HEADER = 'X-Telegram-Init-Data'
+
+def verify_init_data(init_data: str, bot_token: str, max_age: float = INIT_DATA_MAX_AGE) -> Optional[Dict[str, Any]]:
+    """
+    Check a Telegram WebApp ``initData`` string the way Telegram specifies.
+    
+    The ``hash`` field is the HMAC-SHA256 of the other fields as sorted
+    ``key=value`` lines, keyed with HMAC-SHA256 of the bot token under the
+    key ``WebAppData``.
+    
+    Args:
+        init_data (str): The query string from ``Telegram.WebApp.initData``
+        bot_token (str): The bot's token
+        max_age (float): Seconds after ``auth_date`` the data is still accepted
+        
+    Returns:
+        Optional[Dict[str, Any]]: The fields, with ``user`` decoded, or None if
+        the data is missing, forged or expired
+    """
+    if not init_data or not bot_token:
+        return None
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received = fields.pop('hash', '')
+    data_check = '\n'.join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret, data_check.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, received):
+        return None
+    try:
+        if time.time() - int(fields.get('auth_date', 0)) > max_age:
+            return None
+        if 'user' in fields:
+            fields['user'] = json.loads(fields['user'])
+    except ValueError:
+        return None
+    return fields
+
+def caller_id(request) -> str:
+    """
+    Return who is calling: the Telegram user id from the request's verified
+    initData, or the client address without valid initData. Ids sent by the
+    client itself are never trusted.
+    """
+    init_data = verify_init_data(request.headers.get(INIT_DATA_HEADER, ''), TELEGRAM_TOKEN)
+    user = init_data.get('user') if init_data else None
+    if isinstance(user, dict) and user.get('id') is not None:
+        return str(user['id'])
+    return request.remote
 
 class TelegramMiniApp:
     def __init__(self):
         self.app = web.Application()
+        # When each running search was last polled, by task id
+        self.last_polled = {}
         self.setup_routes()
         
     def setup_routes(self):
@@ -32,6 +123,9 @@ class TelegramMiniApp:
         self.app.router.add_get('/', self.index_handler)
         self.app.router.add_post('/api/generate', self.generate_api_handler)
         self.app.router.add_get('/api/status/{task_id}', self.status_api_handler)
+        self.app.router.add_delete('/api/task/{task_id}', self.cancel_api_handler)
+        self.app.router.add_get('/metrics', self.metrics_handler)
+        self.app.router.add_post('/api/admin/profile', self.profile_api_handler)
         self.app.router.add_static('/static', path='./static', name='static')
         
     async def index_handler(self, request):
@@ -43,26 +137,97 @@ class TelegramMiniApp:
         """Handle vanity address generation API requests"""
         try:
             data = await request.json()
-            prefix = data.get('prefix', '').upper()
+            prefix = data.get('prefix', '')
+            suffix = data.get('suffix', '')
+            case_sensitive = bool(data.get('case_sensitive', True))
+            # Used to queue users fairly and for their quotas; taken only from signed initData
+            user_id = caller_id(request)
             
-            # Validate prefix
-            is_valid, error_message = vanity_generator.validate_prefix(prefix)
+            # Validate prefix and suffix
+            is_valid, error_message = vanity_generator.validate_pattern(prefix, suffix, case_sensitive)
             if not is_valid:
+                requests_metric.inc('invalid')
                 return web.json_response({
                     'success': False,
                     'error': error_message
                 })
             
             # Create task ID
-            task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{prefix}"
+            task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4)}"
+            
+            # Per-user rate limit, then (for a search) the CPU quota; both kept by the daemon
+            try:
+                await compute.admit(user_id)
+            except QuotaExceeded as e:
+                requests_metric.inc('rate_limited')
+                return web.json_response({
+                    'success': False,
+                    'error': str(e),
+                    'retry_after': e.retry_after
+                }, status=429)
+            
+            # Short prefixes are often already in stock
+            inventory.record_demand(prefix)
+            keypair = inventory.take(prefix, suffix, case_sensitive)
+            if keypair:
+                record = {
+                    'status': 'completed',
+                    'prefix': prefix,
+                    'suffix': suffix,
+                    'attempts': 0,
+                    'time_taken': 0.0,
+                    'from_inventory': True,
+                    'public_key': str(keypair.pubkey()),
+                    'private_key': vanity_generator.format_private_key(keypair),
+                    'completion_time': datetime.now().isoformat()
+                }
+                job_store.put(task_id, record, user_id)
+                requests_metric.inc('inventory')
+                return web.json_response({'success': True, 'task_id': task_id, **record})
+            
+            # Accept, queue or reject up front; the submit re-checks in case the queue filled meanwhile
+            try:
+                admission = await compute.admission(prefix, suffix, case_sensitive, user_id)
+                if admission['decision'] == 'reject':
+                    raise AdmissionRejected(f"Search rejected: {admission['reason']}", admission)
+                future = await compute.submit(prefix, suffix, case_sensitive, task_id=task_id, user_id=user_id)
+            except AdmissionRejected as e:
+                requests_metric.inc('rejected')
+                # Too busy is temporary; an unlikely pattern will never be accepted
+                return web.json_response({
+                    'success': False,
+                    'error': 'Search queue is full' if e.admission['reason'] == 'busy'
+                    else 'Pattern is too unlikely to be found within the attempt limit',
+                    'admission': e.admission
+                }, status=503 if e.admission['reason'] == 'busy' else 422)
+            except QuotaExceeded as e:
+                requests_metric.inc('rate_limited')
+                return web.json_response({
+                    'success': False,
+                    'error': str(e),
+                    'retry_after': e.retry_after
+                }, status=429)
+            requests_metric.inc('search')
             
-            # Start generation in background
-            asyncio.create_task(self.generate_vanity_address_async(task_id, prefix))
+            # Wait for the result in background
+            self.last_polled[task_id] = time.monotonic()
+            asyncio.create_task(
+                self.generate_vanity_address_async(task_id, prefix, suffix, case_sensitive, user_id,
+                                                   future=future)
+            )
             
+            # Median/p90/p99 from the pattern's exact odds and the workers' measured rate;
+            # None until the daemon knows its rate, as measuring here would block the loop
+            keys_per_second = admission['keys_per_second']
             return web.json_response({
                 'success': True,
                 'task_id': task_id,
-                'estimated_time': vanity_generator.estimate_generation_time(prefix)
+                'admission': admission,
+                'estimated_time': vanity_generator.estimate_generation_time(
+                    prefix, suffix, case_sensitive, keys_per_second
+                ) if keys_per_second else None,
+                'estimate': vanity_generator.estimate(prefix, suffix, case_sensitive, keys_per_second)
+                if keys_per_second else None
             })
             
         except Exception as e:
@@ -76,8 +241,19 @@ class TelegramMiniApp:
         """Handle status check API requests"""
         task_id = request.match_info['task_id']
         
-        if task_id in active_generations:
-            status = active_generations[task_id]
+        status = job_store.get(task_id)
+        if status is not None:
+            if task_id in self.last_polled:
+                self.last_polled[task_id] = time.monotonic()
+            if status['status'] == 'generating':
+                # Live numbers straight from the workers' shared counters
+                try:
+                    progress = await compute.progress(task_id)
+                except (OSError, ComputeError) as e:
+                    logger.warning(f"No live progress for {task_id}: {e}")
+                    progress = None
+                if progress:
+                    status = {**status, **progress, 'progress': round(progress['probability'] * 100, 1)}
             return web.json_response(status)
         else:
             return web.json_response({
@@ -85,51 +261,167 @@ class TelegramMiniApp:
                 'error': 'Task not found'
             })
     
-    async def generate_vanity_address_async(self, task_id: str, prefix: str):
-        """Generate vanity address asynchronously"""
+    async def metrics_handler(self, request):
+        """Serve the mini app's and the compute daemon's metrics in the Prometheus text format"""
         try:
-            # Initialize task status
-            active_generations[task_id] = {
-                'status': 'generating',
-                'prefix': prefix,
-                'attempts': 0,
-                'start_time': datetime.now().isoformat(),
-                'progress': 0
-            }
+            daemon_text = await compute.metrics()
+            compute_up_metric.set(1)
+        except (OSError, ComputeError) as e:
+            logger.warning(f"No metrics from the compute daemon: {e}")
+            daemon_text = ''
+            compute_up_metric.set(0)
+        return web.Response(body=(metrics.render() + daemon_text).encode(), headers={'Content-Type': CONTENT_TYPE})
+    
+    async def profile_api_handler(self, request):
+        """Profile the compute workers for ?seconds= and return collapsed stacks (admin token required)"""
+        authorization = request.headers.get('Authorization', '')
+        if not ADMIN_TOKEN or not secrets.compare_digest(authorization, f"Bearer {ADMIN_TOKEN}"):
+            return web.json_response({'success': False, 'error': 'Forbidden'}, status=403)
+        try:
+            duration = float(request.query.get('seconds', '10'))
+            profile = await compute.profile(duration)
+        except ValueError:
+            return web.json_response({'success': False, 'error': 'seconds must be a number'}, status=400)
+        except (OSError, ComputeError, asyncio.TimeoutError) as e:
+            logger.error(f"Profiling failed: {e}")
+            return web.json_response({'success': False, 'error': str(e)}, status=503)
+        # Collapsed stacks, e.g. `curl ... | flamegraph.pl > workers.svg`
+        return web.Response(text=profile, content_type='text/plain')
+    
+    async def cancel_api_handler(self, request):
+        """Handle search cancellation API requests"""
+        task_id = request.match_info['task_id']
+        
+        status = job_store.get(task_id)
+        if status is None:
+            return web.json_response({
+                'success': False,
+                'error': 'Task not found'
+            }, status=404)
+        # Only whoever started the search may stop it
+        if job_store.owner(task_id) != caller_id(request):
+            return web.json_response({'success': False, 'error': 'Forbidden'}, status=403)
+        if status['status'] != 'generating':
+            return web.json_response({
+                'success': False,
+                'error': f"Task already {status['status']}"
+            }, status=409)
+        
+        try:
+            # The background task records the cancellation when the daemon confirms it
+            cancelled = await compute.cancel(task_id)
+        except (OSError, ComputeError) as e:
+            logger.error(f"Could not cancel {task_id}: {e}")
+            return web.json_response({
+                'success': False,
+                'error': 'Compute daemon unavailable'
+            }, status=503)
+        return web.json_response({'success': cancelled, 'task_id': task_id, 'status': 'cancelled'})
+    
+    async def cancel_abandoned(self):
+        """Cancel searches whose client stopped polling for their status"""
+        while True:
+            await asyncio.sleep(ABANDONED_TASK_TIMEOUT / 4)
+            cutoff = time.monotonic() - ABANDONED_TASK_TIMEOUT
+            for task_id, polled in list(self.last_polled.items()):
+                if polled >= cutoff:
+                    continue
+                del self.last_polled[task_id]
+                try:
+                    if await compute.cancel(task_id):
+                        logger.info(f"Cancelled abandoned search {task_id}")
+                except (OSError, ComputeError) as e:
+                    logger.warning(f"Could not cancel abandoned search {task_id}: {e}")
+    
+    async def generate_vanity_address_async(self, task_id: str, prefix: str, suffix: str = '',
+                                            case_sensitive: bool = True, user_id: str = None,
+                                            resumed: bool = False, future: asyncio.Future = None):
+        """Generate vanity address asynchronously, or wait for the already submitted ``future``"""
+        try:
+            # Initialize task status; a resumed task keeps the record it already has
+            if not resumed:
+                job_store.put(task_id, {
+                    'status': 'generating',
+                    'prefix': prefix,
+                    'suffix': suffix,
+                    'case_sensitive': case_sensitive,
+                    'attempts': 0,
+                    'start_time': datetime.now().isoformat(),
+                    'progress': 0
+                }, user_id)
             
-            # Generate the vanity address
-            keypair, attempts, time_taken = vanity_generator.generate_vanity_address(prefix)
+            # Generate the vanity address in the compute daemon
+            if future is None:
+                future = await compute.submit(prefix, suffix, case_sensitive, task_id=task_id, user_id=user_id)
+            result = await future
+            keypair, attempts, time_taken = result
             
             if keypair:
                 # Success
-                active_generations[task_id] = {
+                job_store.put(task_id, {
                     'status': 'completed',
                     'prefix': prefix,
+                    'suffix': suffix,
                     'attempts': attempts,
                     'time_taken': time_taken,
-                    'public_key': str(keypair.public_key),
+                    'stages': result.stages,
+                    'public_key': str(keypair.pubkey()),
                     'private_key': vanity_generator.format_private_key(keypair),
                     'completion_time': datetime.now().isoformat()
-                }
+                }, user_id)
             else:
                 # Failed
-                active_generations[task_id] = {
+                job_store.put(task_id, {
                     'status': 'failed',
                     'prefix': prefix,
+                    'suffix': suffix,
                     'attempts': attempts,
                     'time_taken': time_taken,
+                    'stages': result.stages,
                     'error': 'Could not find vanity address within maximum attempts',
                     'completion_time': datetime.now().isoformat()
-                }
+                }, user_id)
                 
+        except SearchCancelled:
+            job_store.put(task_id, {
+                'status': 'cancelled',
+                'prefix': prefix,
+                'suffix': suffix,
+                'error': 'Search was cancelled',
+                'completion_time': datetime.now().isoformat()
+            }, user_id)
         except Exception as e:
             logger.error(f"Error in async generation: {e}")
-            active_generations[task_id] = {
+            job_store.put(task_id, {
                 'status': 'failed',
                 'prefix': prefix,
+                'suffix': suffix,
                 'error': str(e),
                 'completion_time': datetime.now().isoformat()
-            }
+            }, user_id)
+        finally:
+            self.last_polled.pop(task_id, None)
+    
+    async def resume_generations(self):
+        """
+        Wait again for the searches the daemon kept running while the app was down.
+        
+        Retries until the daemon answers, as it may still be calibrating when the app starts.
+        """
+        while True:
+            try:
+                tasks = await compute.tasks()
+                break
+            except (OSError, ComputeError) as e:
+                logger.error(f"Compute daemon unavailable, retrying in {RESUME_RETRY_INTERVAL:g}s: {e}")
+                await asyncio.sleep(RESUME_RETRY_INTERVAL)
+        for task in tasks:
+            # Clients get a fresh grace period to resume polling
+            self.last_polled[task['task_id']] = time.monotonic()
+            asyncio.create_task(self.generate_vanity_address_async(
+                task['task_id'], task['prefix'], task['suffix'],
+                task['case_sensitive'], task['user_id'], resumed=True
+            ))
     
     def get_mini_app_html(self):
         """Generate the HTML content for the mini app"""
@@ -205,6 +497,17 @@ class TelegramMiniApp:
             transition: border-color 0.3s;
         }}
         
+        .form-group .checkbox {{
+            display: flex;
+            align-items: center;
+            gap: 8px;
+            font-weight: normal;
+        }}
+        
+        .form-group .checkbox input {{
+            width: auto;
+        }}
+        
         .form-group input:focus {{
             outline: none;
             border-color: #667eea;
@@ -311,12 +614,12 @@ class TelegramMiniApp:
         <div class="card">
             <div class="header">
                 <h1>🚀 Solana Vanity Generator</h1>
-                <p>Generate custom Solana addresses with your desired prefix</p>
+                <p>Generate custom Solana addresses with your desired prefix or suffix</p>
             </div>
             
             <div class="info">
-                <strong>💡 Tips:</strong> Shorter prefixes (2-4 chars) generate faster. 
-                Maximum length is {MAX_PREFIX_LENGTH} characters.
+                <strong>💡 Tips:</strong> Shorter patterns (2-4 chars in total) generate faster. 
+                Prefix and suffix together can be at most {MAX_PREFIX_LENGTH} characters.
             </div>
             
             <form id="generateForm">
@@ -324,7 +627,21 @@ class TelegramMiniApp:
                     <label for="prefix">Desired Prefix:</label>
                     <input type="text" id="prefix" name="prefix" 
                            placeholder="e.g., SOL, 123, ABC" 
-                           maxlength="{MAX_PREFIX_LENGTH}" required>
+                           maxlength="{MAX_PREFIX_LENGTH}">
+                </div>
+                
+                <div class="form-group">
+                    <label for="suffix">Desired Suffix (optional):</label>
+                    <input type="text" id="suffix" name="suffix" 
+                           placeholder="e.g., XYZ" 
+                           maxlength="{MAX_PREFIX_LENGTH}">
+                </div>
+                
+                <div class="form-group">
+                    <label class="checkbox" for="anyCase">
+                        <input type="checkbox" id="anyCase" name="anyCase">
+                        Ignore letter case (much faster)
+                    </label>
                 </div>
                 
                 <button type="submit" class="btn" id="generateBtn">
@@ -338,6 +655,7 @@ class TelegramMiniApp:
                     <div class="progress-fill" id="progressFill"></div>
                 </div>
                 <div id="progressText"></div>
+                <button type="button" class="copy-btn" id="cancelBtn" style="display: none;">🛑 Cancel</button>
             </div>
             
             <div id="result" class="result" style="display: none;">
@@ -365,13 +683,15 @@ class TelegramMiniApp:
         document.getElementById('generateForm').addEventListener('submit', async (e) => {{
             e.preventDefault();
             
-            const prefix = document.getElementById('prefix').value.trim().toUpperCase();
+            const prefix = document.getElementById('prefix').value.trim();
+            const suffix = document.getElementById('suffix').value.trim();
+            const case_sensitive = !document.getElementById('anyCase').checked;
             const generateBtn = document.getElementById('generateBtn');
             const status = document.getElementById('status');
             const statusText = document.getElementById('statusText');
             
-            if (!prefix) {{
-                alert('Please enter a prefix');
+            if (!prefix && !suffix) {{
+                alert('Please enter a prefix or suffix');
                 return;
             }}
             
@@ -386,16 +706,23 @@ class TelegramMiniApp:
                 const response = await fetch('/api/generate', {{
                     method: 'POST',
                     headers: {{
-                        'Content-Type': 'application/json'
+                        'Content-Type': 'application/json',
+                        // Signed by Telegram; the server takes the user id from it
+                        '{INIT_DATA_HEADER}': tg.initData
                     }},
-                    body: JSON.stringify({{ prefix }})
+                    body: JSON.stringify({{ prefix, suffix, case_sensitive }})
                 }});
                 
                 const data = await response.json();
                 
-                if (data.success) {{
+                if (data.success && data.status === 'completed') {{
+                    // Served from the pre-mined stock
+                    showResult(data);
+                }} else if (data.success) {{
                     currentTaskId = data.task_id;
-                    statusText.textContent = `Generating address with prefix "${prefix}"...`;
+                    document.getElementById('cancelBtn').style.display = 'inline-block';
+                    const eta = data.estimated_time ? ` (est. ${{data.estimated_time}})` : '';
+                    statusText.textContent = `Generating address matching "${{prefix}}...${{suffix}}"${{eta}}...`;
                     
                     // Start polling for status
                     startStatusPolling();
@@ -431,7 +758,7 @@ class TelegramMiniApp:
                     
                     updateStatus(data);
                     
-                    if (data.status === 'completed' || data.status === 'failed') {{
+                    if (data.status === 'completed' || data.status === 'failed' || data.status === 'cancelled') {{
                         clearInterval(statusCheckInterval);
                         showResult(data);
                     }}
@@ -447,10 +774,17 @@ class TelegramMiniApp:
             const progressFill = document.getElementById('progressFill');
             const progressText = document.getElementById('progressText');
             
-            if (data.status === 'generating') {{
-                statusText.textContent = `Generating... (Attempts: ${{data.attempts || 0}})`;
-                progressFill.style.width = '50%';
-                progressText.textContent = 'Searching for matching address...';
+            if (data.status === 'generating' && data.position > 0) {{
+                statusText.textContent = `Waiting in queue (position ${{data.position}})`;
+                progressFill.style.width = '0%';
+                progressText.textContent = 'Starts when a search slot frees up';
+            }} else if (data.status === 'generating') {{
+                const attempts = (data.attempts || 0).toLocaleString();
+                const rate = Math.round(data.keys_per_second || 0).toLocaleString();
+                const elapsed = (data.elapsed || 0).toFixed(0);
+                statusText.textContent = `Generating... (Attempts: ${{attempts}})`;
+                progressFill.style.width = `${{data.progress || 0}}%`;
+                progressText.textContent = `${{rate}} keys/sec • ${{elapsed}}s elapsed • ${{data.progress || 0}}% chance found by now`;
             }}
         }}
         
@@ -463,10 +797,20 @@ class TelegramMiniApp:
             
             generateBtn.disabled = false;
             generateBtn.textContent = '🔍 Generate Vanity Address';
+            document.getElementById('cancelBtn').style.display = 'none';
+            currentTaskId = null;
+            
+            if (data.status === 'cancelled') {{
+                status.className = 'status failed';
+                statusText.textContent = '🛑 Search cancelled';
+                return;
+            }}
             
             if (data.status === 'completed') {{
                 status.className = 'status completed';
-                statusText.textContent = `✅ Generated successfully in ${{data.time_taken.toFixed(2)}}s (${{data.attempts.toLocaleString()}} attempts)`;
+                statusText.textContent = data.from_inventory
+                    ? '⚡ Delivered instantly from pre-mined stock'
+                    : `✅ Generated successfully in ${{data.time_taken.toFixed(2)}}s (${{data.attempts.toLocaleString()}} attempts)`;
                 
                 resultContent.innerHTML = `
                     <strong>🔑 Public Key:</strong><br>
@@ -496,10 +840,23 @@ class TelegramMiniApp:
             
             status.className = 'status failed';
             statusText.textContent = `Error: ${{message}}`;
+            document.getElementById('cancelBtn').style.display = 'none';
             generateBtn.disabled = false;
             generateBtn.textContent = '🔍 Generate Vanity Address';
         }}
         
+        function cancelSearch(keepalive) {{
+            if (!currentTaskId) return;
+            fetch(`/api/task/${{currentTaskId}}`, {{
+                method: 'DELETE', keepalive, headers: {{ '{INIT_DATA_HEADER}': tg.initData }}
+            }});
+        }}
+        
+        // Stop the search on request, and when the mini app is closed (the server also
+        // cancels searches nobody polls any more)
+        document.getElementById('cancelBtn').addEventListener('click', () => cancelSearch(false));
+        window.addEventListener('pagehide', () => cancelSearch(true));
+        
         async function copyToClipboard(text) {{
             try {{
                 await navigator.clipboard.writeText(text);
@@ -587,6 +944,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode='Markdown'
     )
 
+async def shutdown(application: Application):
+    """Disconnect from the compute daemon and flush the job store when the bot shuts down"""
+    await compute.close()
+    job_store.close()
+    inventory.close()
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors"""
     logger.error(f"Update {update} caused error {context.error}")
@@ -603,7 +966,7 @@ def main():
         return
     
     # Create the Application
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    application = Application.builder().token(TELEGRAM_TOKEN).post_shutdown(shutdown).build()
     
     # Add command handlers
     application.add_handler(CommandHandler("start", start_command))
@@ -631,6 +994,10 @@ def main():
         await site.start()
         logger.info("Web server started on http://localhost:8080")
         
+        # Pick up searches that finished or kept running while the app was down
+        asyncio.create_task(mini_app.resume_generations())
+        asyncio.create_task(mini_app.cancel_abandoned())
+        
         # Start bot
         await application.run_polling(allowed_updates=Update.ALL_TYPES)
     
@@ -3,9 +3,15 @@
 Test script for Solana Vanity Wallet Telegram Bot
 """
 
+import asyncio
+import itertools
+import json
 import os
 import sys
+import time
 from dotenv import load_dotenv
+from telegram import Update
+from telegram.request import BaseRequest
 
 def test_environment():
     """Test environment configuration"""
@@ -102,6 +108,283 @@ def test_vanity_generator():
         print(f"❌ Error testing vanity generator: {e}")
         return False
 
+def test_seeded_generation():
+    """Test that a fixed seed makes searches reproducible"""
+    print("\n🔍 Testing seeded generation...")
+    
+    from vanity_generator import SolanaVanityGenerator
+    
+    results = []
+    for _ in range(2):
+        generator = SolanaVanityGenerator(max_attempts=100000, workers=1, seed=bytes(32))
+        keypair, attempts, _ = generator.generate_vanity_address("AB")
+        results.append((str(keypair.pubkey()) if keypair else None, attempts))
+    
+    assert results[0][0] and results[0] == results[1], f"Seeded runs differ: {results}"
+    print(f"✅ Same seed, same result: {results[0][0]} after {results[0][1]:,} attempts")
+    
+    # Another backend would silently drop the seed
+    try:
+        SolanaVanityGenerator(seed=bytes(32), backend="os")
+        raise AssertionError("Seed accepted with the os backend")
+    except ValueError:
+        pass
+    print("✅ Seed with a non-replayable backend is rejected")
+
+def test_key_backends():
+    """Test that the os and chacha20 backends derive valid, distinct keypairs"""
+    print("\n🔍 Testing key backends...")
+    
+    from solders.keypair import Keypair
+    from vanity_generator import KeySource, SolanaVanityGenerator
+    
+    for backend in ("os", "chacha20"):
+        batch = KeySource(backend).derive(256)
+        for keypair in batch:
+            # The public half must be the one derived from the secret half
+            assert Keypair.from_seed(bytes(keypair.secret())).pubkey() == keypair.pubkey(), \
+                f"{backend}: public key does not belong to the secret"
+            signature = keypair.sign_message(b"vanity")
+            assert signature.verify(keypair.pubkey(), b"vanity"), f"{backend}: signature does not verify"
+        assert len({bytes(keypair) for keypair in batch}) == len(batch), f"{backend}: repeated keys"
+        
+        keypair, _, _ = SolanaVanityGenerator(max_attempts=100000, workers=1, backend=backend).generate_vanity_address("A")
+        assert keypair is not None and str(keypair.pubkey()).startswith("A"), f"{backend}: search returned {keypair}"
+    
+    # chacha20 replays from its key; os draws fresh randomness each time
+    replayed = [str(KeySource("chacha20", bytes(32)).derive(4)[-1].pubkey()) for _ in range(2)]
+    fresh = [str(KeySource("os").derive(4)[-1].pubkey()) for _ in range(2)]
+    assert replayed[0] == replayed[1] and fresh[0] != fresh[1], f"Unexpected streams: {replayed}, {fresh}"
+    print("✅ os and chacha20 derive valid keypairs; chacha20 replays from its key")
+
+def random_pubkey(rng):
+    """Random 32-byte public key; some start with zero bytes, i.e. '1's in the address, down to one digit"""
+    zeros = rng.choice((0, 0, 0, 1, 2, 3, 31))
+    return bytes(zeros) + rng.randbytes(32 - zeros)
+
+def pattern_samples(rng, address):
+    """Prefixes to check ``address`` against: its own, one character off and random ones, from 1 to the maximum length"""
+    from vanity_generator import BASE58_ALPHABET, MAX_PATTERN_LENGTH
+    
+    samples = []
+    for length in (1, MAX_PATTERN_LENGTH, rng.randint(2, MAX_PATTERN_LENGTH - 1)):
+        own = address[:length]
+        i = rng.randrange(length)
+        samples.append(own)
+        samples.append(own[:i] + rng.choice(BASE58_ALPHABET.replace(own[i], '')) + own[i + 1:])
+        random_text = '1' * rng.randint(0, 2) + ''.join(rng.choice(BASE58_ALPHABET) for _ in range(length))
+        samples.append(random_text[:length])
+    return samples
+
+def test_prefix_matching():
+    """Test PatternMatcher prefixes against the encoded address"""
+    print("\n🔍 Testing prefix matching...")
+    
+    import random
+    from solders.pubkey import Pubkey
+    from vanity_generator import PatternMatcher
+    
+    rng = random.Random(2)
+    checked = matched = 0
+    for _ in range(2000):
+        raw = random_pubkey(rng)
+        address = str(Pubkey(raw))
+        for prefix in pattern_samples(rng, address):
+            expected = address.startswith(prefix)
+            assert PatternMatcher(prefix).matches(raw) == expected, \
+                f"Prefix {prefix!r} on {address}: expected {expected}"
+            checked += 1
+            matched += expected
+    print(f"✅ {checked:,} prefixes agree with the address ({matched:,} matches)")
+
+def test_suffix_matching():
+    """Test PatternMatcher suffixes against the encoded address, and suffix searches end to end"""
+    print("\n🔍 Testing suffix matching...")
+    
+    import random
+    from solders.pubkey import Pubkey
+    from generation_service import GenerationService
+    from vanity_generator import MAX_PATTERN_LENGTH, PatternMatcher, SolanaVanityGenerator
+    
+    rng = random.Random(5)
+    checked = matched = 0
+    for _ in range(2000):
+        raw = random_pubkey(rng)
+        address = str(Pubkey(raw))
+        prefixes = pattern_samples(rng, address)
+        suffixes = [sample[::-1] for sample in pattern_samples(rng, address[::-1])]
+        for prefix, suffix in zip(prefixes, suffixes):
+            prefix = prefix[:max(1, MAX_PATTERN_LENGTH - len(suffix))]
+            for pattern, expected in (
+                (PatternMatcher(suffix=suffix), address.endswith(suffix)),
+                (PatternMatcher(prefix, suffix), address.startswith(prefix) and address.endswith(suffix)),
+            ):
+                assert pattern.matches(raw) == expected, \
+                    f"Pattern {pattern.describe()!r} on {address}: expected {expected}"
+                checked += 1
+                matched += expected
+    print(f"✅ {checked:,} suffix patterns agree with the address ({matched:,} matches)")
+    
+    keypair, _, _ = SolanaVanityGenerator(max_attempts=200000, workers=1).generate_vanity_address(suffix="ab")
+    assert keypair is not None and str(keypair.pubkey()).endswith("ab"), f"Suffix search returned {keypair}"
+    
+    # The shared stream indexes suffix-only and prefix+suffix jobs separately
+    service = GenerationService(max_attempts=10**6, workers=1)
+    try:
+        suffix_only = service.submit(suffix="b", task_id="suffix")
+        both = service.submit("A", "b", task_id="both")
+        addresses = [str(future.result(timeout=60)[0].pubkey()) for future in (suffix_only, both)]
+    finally:
+        service.stop()
+    assert addresses[0].endswith("b") and addresses[1].startswith("A") and addresses[1].endswith("b"), \
+        f"Service suffix searches returned {addresses}"
+    print(f"✅ Suffix searches found {keypair.pubkey()}, {addresses[0]} and {addresses[1]}")
+
+def test_case_insensitive_matching():
+    """Test any-case PatternMatchers against the lower-cased address"""
+    print("\n🔍 Testing case-insensitive matching...")
+    
+    import random
+    from solders.pubkey import Pubkey
+    from vanity_generator import PatternMatcher
+    
+    def recase(text):
+        # Letters in either case; I, l and O are base58 only in the other one, which the matcher must accept
+        return ''.join(char.swapcase() if rng.random() < 0.5 else char for char in text)
+    
+    rng = random.Random(6)
+    checked = matched = 0
+    for _ in range(1000):
+        raw = random_pubkey(rng)
+        address = str(Pubkey(raw))
+        lowered = address.lower()
+        prefixes = [recase(sample) for sample in pattern_samples(rng, address)]
+        suffixes = [recase(sample[::-1]) for sample in pattern_samples(rng, address[::-1])]
+        for prefix, suffix in zip(prefixes, suffixes):
+            for pattern, expected in (
+                (PatternMatcher(prefix, case_sensitive=False), lowered.startswith(prefix.lower())),
+                (PatternMatcher(suffix=suffix, case_sensitive=False), lowered.endswith(suffix.lower())),
+            ):
+                assert pattern.matches(raw) == expected, \
+                    f"Pattern {pattern.describe()!r} on {address}: expected {expected}"
+                checked += 1
+                matched += expected
+    print(f"✅ {checked:,} any-case patterns agree with the address ({matched:,} matches)")
+
+def test_parallel_generation():
+    """Test the multi-process search: budget split and summed, first match stops the others, cancel"""
+    print("\n🔍 Testing parallel generation...")
+    
+    import threading
+    from vanity_generator import KeySource, SolanaVanityGenerator, seed_key
+    
+    # An odd budget, so the workers' shares differ; the shared counters feed progress
+    progress = []
+    generator = SolanaVanityGenerator(max_attempts=20001, workers=2)
+    keypair, attempts, _ = generator.generate_vanity_address("zzzzzz", on_progress=progress.append)
+    assert keypair is None and attempts == 20001, f"Budget not split and summed: {attempts:,} attempts"
+    assert progress == sorted(progress) and all(done <= 20001 for done in progress), f"Bad progress: {progress}"
+    
+    # Seeded, so the 500th key of worker 0 is known and worker 1 never matches it: the stop
+    # event set by worker 0 must keep worker 1 from using up its share
+    seed = bytes(range(32))
+    target = str(KeySource("chacha20", seed_key(seed, 0)).derive(500)[-1].pubkey())
+    generator = SolanaVanityGenerator(max_attempts=200000, workers=2, seed=seed)
+    keypair, attempts, _ = generator.generate_vanity_address(target[:8])
+    assert keypair is not None and str(keypair.pubkey()) == target, f"Parallel search returned {keypair}"
+    assert attempts < 100000, f"The other worker used up its share: {attempts:,} attempts"
+    
+    # Cancelled once the workers are under way
+    generator = SolanaVanityGenerator(max_attempts=10**9, workers=2)
+    cancel = threading.Event()
+    start = time.perf_counter()
+    keypair, attempts, _ = generator.generate_vanity_address(
+        "zzzzzzzz", cancel=cancel, on_progress=lambda done: done and cancel.set()
+    )
+    stopped = time.perf_counter() - start
+    assert keypair is None and 0 < attempts < 10**9 and stopped < 10, \
+        f"Cancel did not stop the workers: {attempts:,} attempts in {stopped:.1f}s"
+    print(f"✅ Two workers: budget summed, first match stops the other, cancelled after {attempts:,} attempts")
+
+def test_estimate():
+    """Test the ETA quantiles against the geometric distribution for a known rate"""
+    print("\n🔍 Testing time estimates...")
+    
+    import math
+    from vanity_generator import PatternMatcher, SolanaVanityGenerator
+    
+    generator = SolanaVanityGenerator(max_attempts=10000, workers=1)
+    estimate = generator.estimate("AB", keys_per_second=1000)
+    p = estimate['probability']
+    
+    # The pattern's probability matches how often random keys actually hit it
+    matcher = PatternMatcher("AB")
+    samples = 300000
+    hits = sum(matcher.matches(os.urandom(32)) for _ in range(samples))
+    assert abs(hits - samples * p) < 5 * math.sqrt(samples * p), f"{hits} hits in {samples:,}, expected {samples * p:.0f}"
+    
+    # Each quantile t is where the chance of a match within t * rate attempts reaches q
+    for key, q in (('median_seconds', 0.5), ('p90_seconds', 0.9), ('p99_seconds', 0.99)):
+        reached = 1 - (1 - p) ** (estimate[key] * 1000)
+        assert math.isclose(reached, q, rel_tol=1e-9), f"{key}: P(match) = {reached}, expected {q}"
+    assert estimate['median_seconds'] < estimate['p90_seconds'] < estimate['p99_seconds']
+    assert math.isclose(estimate['expected_attempts'], 1 / p)
+    assert math.isclose(estimate['success_probability'], 1 - (1 - p) ** 10000, rel_tol=1e-9)
+    
+    # Twice the rate, half the time; no rate, no estimate
+    faster = generator.estimate("AB", keys_per_second=2000)
+    assert math.isclose(faster['p90_seconds'] * 2, estimate['p90_seconds']), f"Not scaled by rate: {faster}"
+    try:
+        generator.estimate("AB", keys_per_second=0)
+        raise AssertionError("Estimate made without a throughput")
+    except ValueError:
+        pass
+    print(f"✅ 1 in {1 / p:,.0f} at 1,000 keys/sec: median {estimate['median_seconds']:.2f}s, "
+          f"p90 {estimate['p90_seconds']:.2f}s, p99 {estimate['p99_seconds']:.2f}s")
+
+def test_calibration_profile():
+    """Test that a calibration profile round-trips through its file and configures the engines"""
+    print("\n🔍 Testing calibration profile...")
+    
+    import tempfile
+    from calibration import PROFILE_MAX_AGE, apply_profile, calibrate, load_or_calibrate, load_profile, save_profile
+    from generation_service import GenerationService
+    from vanity_generator import SolanaVanityGenerator
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calibration_profile.json")
+        with open(path, 'w') as f:
+            json.dump({'other-host': {'keys_per_second': 1.0}}, f)
+        
+        profile = calibrate(duration=0.05)
+        save_profile(profile, path)
+        loaded = load_profile(path)
+        with open(path) as f:
+            hosts = json.load(f)
+        assert loaded == profile, f"Profile changed on the way through the file: {loaded} != {profile}"
+        assert 'other-host' in hosts, "Other hosts' profiles were dropped"
+        # A valid stored profile is used without re-calibrating
+        assert load_or_calibrate(path)['created'] == profile['created'], "Fresh profile was re-calibrated"
+        
+        save_profile({**profile, 'created': time.time() - PROFILE_MAX_AGE - 1}, path)
+        assert load_profile(path) is None, "Stale profile was loaded"
+        save_profile({**profile, 'versions': {**profile['versions'], 'solders': '0.0.0'}}, path)
+        assert load_profile(path) is None, "Profile measured with other versions was loaded"
+    
+    generator = SolanaVanityGenerator(workers=1)
+    service = GenerationService(workers=1)
+    apply_profile(loaded, generator, service)
+    assert (generator.backend, generator.workers, generator.keys_per_second) == \
+        (loaded['best_backend'], loaded['best_workers'], loaded['keys_per_second']), "Generator not configured"
+    assert (service.backend, service.workers) == (loaded['best_backend'], loaded['best_workers']), \
+        "Service not configured"
+    
+    seeded = SolanaVanityGenerator(workers=1, seed=bytes(32))
+    apply_profile({**loaded, 'best_backend': 'os'}, seeded)
+    assert seeded.backend == "chacha20", f"Seeded generator switched to {seeded.backend}"
+    print(f"✅ Profile round-trips: {loaded['best_backend']} with {loaded['best_workers']} workers, "
+          f"{loaded['keys_per_second']:,.0f} keys/sec")
+
 def test_bot_module():
     """Test bot module imports"""
     print("\n🔍 Testing bot module...")
@@ -119,6 +402,963 @@ def test_bot_module():
         print(f"❌ Error testing bot module: {e}")
         return False
 
+class FakeMessage:
+    """Stands in for a Telegram message; records what the bot sends"""
+    
+    def __init__(self):
+        self.message_id = id(self)
+        self.texts = []
+    
+    async def reply_text(self, text, **kwargs):
+        self.texts.append(text)
+        return self
+    
+    async def edit_text(self, text, **kwargs):
+        self.texts.append(text)
+        return self
+
+class FakeEntity:
+    """Stands in for a Telegram chat or user"""
+    
+    def __init__(self, entity_id):
+        self.id = entity_id
+
+class FakeUpdate:
+    def __init__(self, user_id=1):
+        self.message = FakeMessage()
+        self.effective_chat = FakeEntity(user_id)
+        self.effective_user = FakeEntity(user_id)
+
+class FakeContext:
+    def __init__(self, args):
+        self.args = args
+
+class FakeBotAPI(BaseRequest):
+    """Stands in for the Bot API behind a real Application; records what the bot sends per chat"""
+    
+    def __init__(self):
+        self.sent = {}
+        self._message_ids = itertools.count(1000)
+    
+    @property
+    def read_timeout(self):
+        return None
+    
+    async def initialize(self):
+        pass
+    
+    async def shutdown(self):
+        pass
+    
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        method_name = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data else {}
+        if method_name == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Vanity', 'username': 'vanity_test_bot'}
+        elif method_name in ('sendMessage', 'editMessageText'):
+            chat_id = int(params['chat_id'])
+            self.sent.setdefault(chat_id, []).append(params['text'])
+            result = {'message_id': int(params.get('message_id') or next(self._message_ids)),
+                      'date': int(time.time()), 'chat': {'id': chat_id, 'type': 'private'},
+                      'text': params['text']}
+        else:
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+def command_update(application, update_id, user_id, text):
+    """A private-chat command update from ``user_id``, as Telegram would deliver it"""
+    command = text.split()[0]
+    return Update.de_json({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': int(time.time()), 'text': text,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f"user{user_id}"},
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}],
+        },
+    }, application.bot)
+
+def test_handler_latency():
+    """Test that searches don't hold up the Application's other updates"""
+    print("\n🔍 Testing handler latency during searches...")
+    
+    import tempfile
+    import bot
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    
+    async def run(path):
+        daemon = ComputeDaemon(GenerationService(max_attempts=10**12, workers=1), path)
+        await daemon.start()
+        bot.compute = ComputeClient(path, name="bot")
+        api = FakeBotAPI()
+        application = bot.build_application(request=api)
+        await application.initialize()
+        await application.start()
+        try:
+            # Two users' patterns that won't be found before the daemon is stopped
+            await application.update_queue.put(command_update(application, 1, 1, "/generate zzzzzz"))
+            await application.update_queue.put(command_update(application, 2, 2, "/generate yyyyyy"))
+            deadline = time.monotonic() + 10
+            while (await bot.compute.stats())['active'] < 2:
+                assert time.monotonic() < deadline, f"Searches not running side by side: {await bot.compute.stats()}"
+                await asyncio.sleep(0.05)
+            
+            latencies = []
+            for update_id in range(3, 8):
+                replies = len(api.sent.get(3, []))
+                start = time.perf_counter()
+                await application.update_queue.put(command_update(application, update_id, 3, "/status"))
+                while len(api.sent.get(3, [])) == replies:
+                    assert time.perf_counter() - start < 5, "/status got no reply while searches ran"
+                    await asyncio.sleep(0.005)
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.1)
+            
+            still_searching = (await bot.compute.stats())['active'] == 2
+        finally:
+            # Dropping the daemon ends the searches, so the handlers waiting on them return
+            await daemon.stop()
+            await bot.compute.close()
+            await application.stop()
+            await application.shutdown()
+        return max(latencies), still_searching
+    
+    # The fresh daemon has no measured rate yet; the bot must not benchmark on its event loop
+    measured = []
+    original_client = bot.compute
+    original_token = bot.TELEGRAM_TOKEN
+    original_measure = bot.vanity_generator.measure_keys_per_second
+    bot.TELEGRAM_TOKEN = "123456:TEST"
+    bot.vanity_generator.measure_keys_per_second = lambda *args: measured.append(args) or 1.0
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            worst, still_searching = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    finally:
+        bot.compute = original_client
+        bot.TELEGRAM_TOKEN = original_token
+        bot.vanity_generator.measure_keys_per_second = original_measure
+    
+    assert not measured, "Throughput was measured on the event loop"
+    print(f"✅ Worst /status latency during two searches: {worst * 1000:.1f} ms")
+    assert still_searching, "Searches finished before latency was measured"
+    assert worst <= 0.1, "/status was blocked by the running searches"
+
+def test_daemon_unavailable():
+    """Test that /status and searches report an unavailable daemon instead of failing"""
+    print("\n🔍 Testing bot without a compute daemon...")
+    
+    import tempfile
+    import bot
+    from compute_daemon import ComputeClient
+    
+    async def run(path):
+        bot.compute = ComputeClient(path, name="bot")
+        try:
+            status = FakeUpdate()
+            await bot.status_command(status, FakeContext([]))
+            message = FakeMessage()
+            await bot.run_generation(message, "AB", "", True, task_id="down", user_id=1, chat_id=1,
+                                     keys_per_second=30000.0)
+            return status.message.texts[-1], message.texts[-1]
+        finally:
+            await bot.compute.close()
+    
+    original_client = bot.compute
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            status_text, search_text = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    finally:
+        bot.compute = original_client
+    
+    assert "tidak tersedia" in status_text, f"/status did not report the daemon as unavailable: {status_text!r}"
+    assert "tidak tersedia" in search_text, f"Search did not report the daemon as unavailable: {search_text!r}"
+    print("✅ /status and searches report the search engine as unavailable")
+
+def test_progress_edits():
+    """Test that progress edits are coalesced and paced, and results are never held back"""
+    print("\n🔍 Testing progress edit pacing...")
+    
+    from edit_scheduler import EditScheduler
+    
+    async def run():
+        edits = EditScheduler(message_interval=0.5, chat_interval=0.0, edits_per_second=5)
+        
+        # Ten updates before the sender runs: only the newest is sent
+        message = FakeMessage()
+        for i in range(10):
+            edits.update(message, f"progress {i}")
+        await asyncio.sleep(0.1)
+        coalesced = list(message.texts)
+        
+        # Twenty busy messages: no more than five edits a second
+        others = [FakeMessage() for _ in range(20)]
+        for other in others:
+            edits.update(other, "progress")
+        await asyncio.sleep(0.5)
+        paced = sum(len(other.texts) for other in others)
+        
+        # A result goes out at once even with the budget used up, and stays last
+        edits.update(message, "progress 10")
+        start = time.perf_counter()
+        await edits.finish(message, "result")
+        result_latency = time.perf_counter() - start
+        edits.update(message, "late progress")
+        await asyncio.sleep(1.0)
+        await edits.stop()
+        return coalesced, paced, result_latency, message.texts
+    
+    coalesced, paced, result_latency, texts = asyncio.run(run())
+    assert coalesced == ["progress 9"], f"Updates not coalesced: {coalesced}"
+    assert paced <= 5, f"{paced} edits in half a second despite a limit of 5/sec"
+    assert result_latency <= 0.05 and texts[-1] == "result", f"Result delayed ({result_latency * 1000:.1f} ms) or overwritten: {texts}"
+    print(f"✅ Coalesced to {coalesced}, {paced} paced edits, result sent in {result_latency * 1000:.1f} ms")
+
+def test_admission():
+    """Test that searches are accepted, queued or rejected up front"""
+    print("\n🔍 Testing admission control...")
+    
+    import generation_service
+    from generation_service import FairScheduler, GenerationService
+    
+    service = GenerationService(max_attempts=10**7, workers=1, scheduler=FairScheduler(max_active=1))
+    hopeless = service.admission("zzzzzz", keys_per_second=10000)
+    assert hopeless['decision'] == 'reject' and hopeless['reason'] == 'unlikely', f"Hopeless pattern not rejected: {hopeless}"
+    print(f"✅ 6 characters rejected ({hopeless['success_probability']:.2%} chance within 10,000,000 attempts)")
+    
+    cheap = service.admission("a", keys_per_second=10000)
+    assert cheap['decision'] == 'accept' and cheap['position'] == 0, f"Cheap pattern not accepted on an idle service: {cheap}"
+    
+    try:
+        # Takes the only slot for minutes
+        service.submit("zzzz", task_id="long", user_id="alice")
+        queued = service.admission("a", user_id="bob", keys_per_second=10000)
+        assert queued['decision'] == 'queue' and queued['position'] == 1 and queued['wait_seconds'], f"Pattern behind a running search not queued: {queued}"
+        print(f"✅ Queued at #{queued['position']} (expected wait {queued['wait_seconds']:.0f}s)")
+        
+        max_wait = generation_service.ADMISSION_MAX_WAIT
+        generation_service.ADMISSION_MAX_WAIT = queued['wait_seconds'] / 2
+        try:
+            busy = service.admission("a", user_id="bob", keys_per_second=10000)
+        finally:
+            generation_service.ADMISSION_MAX_WAIT = max_wait
+        assert busy['decision'] == 'reject' and busy['reason'] == 'busy', f"Pattern not rejected when the wait is too long: {busy}"
+        assert service.queued_jobs() == 0, "Admission checks left jobs in the queue"
+        print("✅ Rejected with an estimate when the queue is too long")
+    finally:
+        service.stop()
+
+def test_cancellation():
+    """Test that a cancelled search frees its slot at once, in the service and from the bot"""
+    print("\n🔍 Testing cancellation...")
+    
+    import tempfile
+    import bot
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import FairScheduler, GenerationService, SearchCancelled
+    
+    service = GenerationService(max_attempts=10**12, workers=1, scheduler=FairScheduler(max_active=1))
+    try:
+        running = service.submit("zzzzzz", task_id="running", user_id="alice")
+        service.submit("zzzzzz", task_id="queued", user_id="bob")
+        start = time.perf_counter()
+        assert service.cancel("running"), "Running search could not be cancelled"
+        freed = time.perf_counter() - start
+        assert service.queue_position("queued") == 0, "Queued search did not take the freed slot"
+        try:
+            running.result(timeout=1)
+            raise AssertionError("Cancelled search produced a result")
+        except SearchCancelled:
+            pass
+        assert not service.cancel("running"), "Search cancelled twice"
+    finally:
+        service.stop()
+    print(f"✅ Slot handed to the next search {freed * 1000:.1f} ms after cancelling")
+    
+    async def run(path):
+        daemon = ComputeDaemon(GenerationService(max_attempts=10**12, workers=1), path)
+        await daemon.start()
+        bot.compute = ComputeClient(path, name="bot")
+        api = FakeBotAPI()
+        application = bot.build_application(request=api)
+        await application.initialize()
+        await application.start()
+        try:
+            await application.update_queue.put(command_update(application, 1, 7, "/generate zzzzzz"))
+            while not (await bot.compute.stats())['active']:
+                await asyncio.sleep(0.05)
+            
+            # Another user cannot cancel it
+            other = ComputeClient(path, name="bot")
+            task_id = (await other.tasks())[0]['task_id']
+            try:
+                await other.cancel(task_id, user_id=8)
+                return "another user cancelled the search"
+            except Exception:
+                pass
+            await other.close()
+            
+            # The user's /cancel goes through the dispatcher while their /generate is still waiting
+            await application.update_queue.put(command_update(application, 2, 7, "/cancel"))
+            deadline = time.monotonic() + 5
+            while not any("Pencarian dibatalkan" in text for text in api.sent.get(7, [])):
+                if time.monotonic() > deadline:
+                    return f"search not reported cancelled: {api.sent.get(7)}"
+                await asyncio.sleep(0.05)
+            if (await bot.compute.stats())['active']:
+                return "search still running after /cancel"
+            if not any("1 pencarian dibatalkan" in text for text in api.sent[7]):
+                return f"/cancel did not confirm: {api.sent[7]}"
+            return None
+        finally:
+            await daemon.stop()
+            await bot.compute.close()
+            await application.stop()
+            await application.shutdown()
+    
+    original_client = bot.compute
+    original_token = bot.TELEGRAM_TOKEN
+    bot.TELEGRAM_TOKEN = "123456:TEST"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            error = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    finally:
+        bot.compute = original_client
+        bot.TELEGRAM_TOKEN = original_token
+    assert not error, f"/cancel: {error}"
+    print("✅ /cancel reaches the user's running search and stops it")
+    
+    # Cancelled records expire like other finished ones
+    from job_store import JobStore
+    store = JobStore(':memory:', ttl=0)
+    try:
+        store.put("done", {'status': 'completed'})
+        store.put("stopped", {'status': 'cancelled'})
+        store.flush()
+        time.sleep(0.01)
+        store.purge()
+        assert "stopped" not in store and "done" not in store, "Cancelled task record was not purged"
+    finally:
+        store.close()
+    print("✅ Cancelled task records are purged after the TTL")
+    
+    # Status updates without an owner keep the one already flushed, so the owner check holds
+    store = JobStore(':memory:', flush_interval=3600)
+    try:
+        store.put("task", {'status': 'running'}, user_id=7)
+        store.flush()
+        store.put("task", {'status': 'running', 'attempts': 1000})
+        before_flush = store.owner("task")
+        store.flush()
+        after_flush = store.owner("task")
+    finally:
+        store.close()
+    assert before_flush == after_flush == "7", f"Owner lost: {before_flush!r} before, {after_flush!r} after the flush"
+    print("✅ Task owner survives owner-less updates")
+
+def test_job_store_secrets():
+    """Test that stored task records keep private keys encrypted on disk"""
+    print("\n🔍 Testing job store encryption...")
+    
+    from cryptography.fernet import Fernet
+    from job_store import JobStore
+    
+    secret = "5" * 88
+    store = JobStore(':memory:', key=Fernet.generate_key())
+    try:
+        store.put("done", {'status': 'completed', 'public_key': "Abc", 'private_key': secret}, user_id=7)
+        store.flush()
+        raw = store._db.execute("SELECT data FROM jobs WHERE task_id = 'done'").fetchone()[0]
+        record = store.get("done")
+        listed = store.by_user("7")
+    finally:
+        store.close()
+    
+    assert secret not in raw, "Private key stored in plaintext"
+    assert record['private_key'] == secret and record['public_key'] == "Abc", f"Record not restored: {record}"
+    assert listed[0]['private_key'] == secret, f"Listed record not decrypted: {listed}"
+    print("✅ Private keys are encrypted at rest and decrypted on read")
+
+def test_fair_scheduler():
+    """Test that queued jobs are ordered by user fairness and cost"""
+    print("\n🔍 Testing fair scheduler...")
+    
+    from generation_service import FairScheduler, GenerationService
+    
+    service = GenerationService(max_attempts=10**12, workers=1, scheduler=FairScheduler(max_active=1))
+    try:
+        service.submit("zzzzzzzz", task_id="running", user_id="alice")
+        service.submit("zzzzzzz", task_id="alice-heavy", user_id="alice")
+        service.submit("zzzzzz", task_id="alice-lighter", user_id="alice")
+        service.submit("zzz", task_id="bob-cheap", user_id="bob")
+        positions = {task_id: service.queue_position(task_id)
+                     for task_id in ("running", "bob-cheap", "alice-lighter", "alice-heavy")}
+    finally:
+        service.stop()
+    
+    expected = {"running": 0, "bob-cheap": 1, "alice-lighter": 2, "alice-heavy": 3}
+    assert positions == expected, f"Unexpected queue positions: {positions}"
+    print(f"✅ Queue positions: {positions}")
+
+def test_shared_matches():
+    """Test that two jobs with the same pattern never get the same keypair"""
+    print("\n🔍 Testing jobs with the same pattern...")
+    
+    from generation_service import GenerationService
+    
+    service = GenerationService(max_attempts=10**7, workers=1)
+    try:
+        futures = [service.submit("AB", task_id=task_id, user_id=task_id) for task_id in ("first", "second")]
+        keypairs = [future.result(timeout=60)[0] for future in futures]
+    finally:
+        service.stop()
+    
+    assert all(keypairs), f"Searches failed: {keypairs}"
+    addresses = [str(keypair.pubkey()) for keypair in keypairs]
+    assert all(address.startswith("AB") for address in addresses), f"Wrong addresses: {addresses}"
+    assert addresses[0] != addresses[1], f"Both jobs got {addresses[0]}"
+    print(f"✅ Each job got its own keypair: {addresses}")
+
+def test_checkpoint_resume():
+    """Test that an interrupted search is checkpointed and continues after a restart"""
+    print("\n🔍 Testing checkpoint and resume...")
+    
+    from generation_service import GenerationService
+    from job_store import JobStore
+    
+    store = JobStore(':memory:')
+    service = GenerationService(max_attempts=10**12, workers=1, store=store, name="test")
+    service.submit("zzzzzzzz", task_id="long", user_id="alice")
+    while not service.progress("long")['attempts']:
+        time.sleep(0.1)
+    service.stop()
+    
+    checkpoints = service.checkpoints()
+    assert len(checkpoints) == 1 and checkpoints[0]['attempts'], f"Expected one checkpoint with progress, got {checkpoints}"
+    checkpoint = checkpoints[0]
+    print(f"✅ Checkpointed after {checkpoint['attempts']:,} attempts")
+    
+    restarted = GenerationService(max_attempts=10**12, workers=1, store=store, name="test")
+    try:
+        restarted.submit(checkpoint['prefix'], checkpoint['suffix'], checkpoint['case_sensitive'],
+                         checkpoint['task_id'], checkpoint['user_id'], checkpoint=checkpoint)
+        resumed_attempts = restarted.progress("long")['attempts']
+    finally:
+        restarted.stop()
+        store.close()
+    
+    assert resumed_attempts >= checkpoint['attempts'], f"Resumed job lost its progress: {resumed_attempts:,} attempts"
+    print(f"✅ Resumed with {resumed_attempts:,} attempts already counted")
+
+def test_inventory():
+    """Test that stocked keypairs are encrypted at rest and handed out once"""
+    print("\n🔍 Testing inventory...")
+    
+    import sqlite3
+    import tempfile
+    from cryptography.fernet import Fernet
+    from inventory import Inventory
+    from vanity_generator import SolanaVanityGenerator
+    
+    keypair, _, _ = SolanaVanityGenerator(max_attempts=100000, workers=1).generate_vanity_address("AB")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "inventory.db")
+        inventory = Inventory(path, key=Fernet.generate_key(), prefixes=["AB"])
+        inventory.add(keypair)
+        
+        secret = sqlite3.connect(path).execute("SELECT secret FROM inventory").fetchone()[0]
+        assert bytes(keypair)[:32] not in secret, "Secret key stored in clear"
+        
+        first = inventory.take("ab", case_sensitive=False)
+        second = inventory.take("AB")
+        inventory.close()
+    
+    assert first is not None and first.pubkey() == keypair.pubkey() and second is None, f"Expected one hand-out of {keypair.pubkey()}, got {first} then {second}"
+    print(f"✅ Handed out {first.pubkey()} once")
+
+def test_harvest():
+    """Test that a long search stocks incidental short-prefix matches"""
+    print("\n🔍 Testing match harvesting...")
+    
+    import tempfile
+    from cryptography.fernet import Fernet
+    from generation_service import GenerationService
+    from inventory import Inventory
+    
+    with tempfile.TemporaryDirectory() as directory:
+        inventory = Inventory(os.path.join(directory, "inventory.db"), key=Fernet.generate_key(),
+                              per_prefix=3, prefixes=["A", "B"])
+        service = GenerationService(max_attempts=10**12, workers=1, inventory=inventory)
+        service.submit("zzzzzzzz")
+        deadline = time.time() + 30
+        while inventory.missing() and time.time() < deadline:
+            time.sleep(0.2)
+        service.stop()
+        stock = inventory.stock()
+        inventory.close()
+    
+    assert stock == {"A": 3, "B": 3}, f"Inventory not filled by the search: {stock}"
+    print(f"✅ Harvested while searching: {stock}")
+
+def test_distributed_search():
+    """Test a coordinator with two worker nodes on localhost"""
+    print("\n🔍 Testing distributed search...")
+    
+    import multiprocessing
+    import socket
+    from distributed import Coordinator, run_worker, worker_handshake
+    from vanity_generator import SolanaVanityGenerator
+    
+    secret = "test-cluster-secret"
+    coordinator = Coordinator("127.0.0.1", 0, secret)
+    coordinator.start()
+    ctx = multiprocessing.get_context("spawn")
+    nodes = [
+        ctx.Process(target=run_worker, args=("127.0.0.1", coordinator.port, secret, 1), daemon=True)
+        for _ in range(2)
+    ]
+    try:
+        for node in nodes:
+            node.start()
+        deadline = time.time() + 30
+        while len(coordinator.nodes()) < 2 and time.time() < deadline:
+            time.sleep(0.1)
+        assert len(coordinator.nodes()) == 2, f"Only {len(coordinator.nodes())} of 2 nodes joined"
+        
+        # A node with the wrong secret is turned away
+        with socket.create_connection(("127.0.0.1", coordinator.port), timeout=5) as sock:
+            try:
+                worker_handshake(sock, b"wrong-secret")
+                raise AssertionError("Coordinator accepted a node with the wrong secret")
+            except ConnectionError:
+                pass
+        
+        generator = SolanaVanityGenerator(max_attempts=20000, coordinator=coordinator)
+        keypair, attempts, _ = generator.generate_vanity_address("zzzzzzzz")
+        assert keypair is None and attempts == 20000, f"Budget not split and summed across nodes: {attempts:,} attempts"
+        
+        generator.max_attempts = 10**9
+        keypair, attempts, _ = generator.generate_vanity_address("AB")
+        assert keypair is not None and str(keypair.pubkey()).startswith("AB"), "Distributed search did not return a matching keypair"
+        
+        # Both nodes were cancelled and accept the next search straight away
+        keypair, _, time_taken = generator.generate_vanity_address("B")
+        assert keypair is not None and str(keypair.pubkey()).startswith("B") and time_taken <= 5, "Nodes were not free for the next search"
+    finally:
+        coordinator.stop()
+        for node in nodes:
+            node.terminate()
+            node.join()
+    
+    print(f"✅ Distributed search found {keypair.pubkey()} across 2 nodes")
+
+def test_compute_daemon():
+    """Test that a search outlives the front end that started it"""
+    print("\n🔍 Testing compute daemon...")
+    
+    import tempfile
+    import generation_service
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    
+    async def run(path):
+        daemon = ComputeDaemon(GenerationService(max_attempts=100000, workers=1), path)
+        await daemon.start()
+        try:
+            # The front end starts a search, then restarts
+            first = ComputeClient(path, name="bot")
+            await first.submit("zzzzzzzz", task_id="long", user_id="alice", context={'chat_id': 1})
+            await first.close()
+            
+            second = ComputeClient(path, name="bot")
+            tasks = await second.tasks()
+            others = await ComputeClient(path, name="mini_app").tasks()
+            assert [task['task_id'] for task in tasks] == ["long"] and not others, \
+                f"Restarted front end sees the wrong tasks: {tasks}, {others}"
+            assert tasks[0]['context'] == {'chat_id': 1}, f"Task context lost: {tasks[0]['context']}"
+            
+            task = tasks[0]
+            result = await second.generate(task['prefix'], task['suffix'], task['case_sensitive'],
+                                           task['task_id'], task['user_id'])
+            await second.close()
+            return result
+        finally:
+            await daemon.stop()
+    
+    # The search is meant to run out of attempts, which admission control would refuse
+    min_success = generation_service.ADMISSION_MIN_SUCCESS
+    generation_service.ADMISSION_MIN_SUCCESS = 0.0
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            result = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    finally:
+        generation_service.ADMISSION_MIN_SUCCESS = min_success
+    
+    keypair, attempts, _ = result
+    assert keypair is None and attempts == 100000, f"Unexpected result after restart: {attempts:,} attempts"
+    print(f"✅ Search kept running across a front end restart ({attempts:,} attempts)")
+
+def test_quotas():
+    """Test per-user rate limits and CPU quotas, in memory, on disk and through the daemon"""
+    print("\n🔍 Testing quotas...")
+    
+    import tempfile
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    from quotas import QuotaExceeded, QuotaManager
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quotas.json")
+        quotas = QuotaManager(requests_per_hour=10, burst=3, cpu_seconds_per_day=100, path=path)
+        for _ in range(3):
+            quotas.check_request("alice")
+        try:
+            quotas.check_request("alice")
+            raise AssertionError("Fourth request in a burst of three was allowed")
+        except QuotaExceeded as e:
+            assert e.reason == "rate" and 0 < e.retry_after <= 360, f"Unexpected rate rejection: {e.reason}, {e.retry_after}"
+        quotas.check_request("bob")
+        
+        quotas.check_cpu("alice", 50)
+        quotas.charge("alice", 80)
+        try:
+            quotas.check_cpu("alice", 50)
+            raise AssertionError("Search allowed beyond the CPU balance")
+        except QuotaExceeded as e:
+            assert e.reason == "cpu" and e.retry_after, f"Unexpected CPU rejection: {e.reason}, {e.retry_after}"
+        try:
+            quotas.check_cpu("bob", 1000)
+            raise AssertionError("Search costing more than the whole budget allowed")
+        except QuotaExceeded as e:
+            assert e.retry_after is None, f"Unaffordable search given a retry time: {e.retry_after}"
+        
+        quotas.save()
+        restored = QuotaManager(requests_per_hour=10, burst=3, cpu_seconds_per_day=100, path=path)
+        usage = restored.usage("alice")
+        assert usage['requests'] < 1 and usage['cpu_seconds'] <= 21, f"Quota state lost on restart: {usage}"
+    print("✅ Bursts, CPU balances and saved state are enforced")
+    
+    async def run(path):
+        service = GenerationService(max_attempts=100000, workers=1,
+                                    quotas=QuotaManager(requests_per_hour=10, burst=1,
+                                                        cpu_seconds_per_day=3, path=None))
+        daemon = ComputeDaemon(service, path, keys_per_second=10000)
+        await daemon.start()
+        client = ComputeClient(path, name="bot")
+        try:
+            await client.admit(42)
+            try:
+                await client.admit(42)
+                return "second request admitted"
+            except QuotaExceeded:
+                pass
+            try:
+                await client.submit("999", task_id="huge", user_id=42)
+                return "unaffordable search accepted"
+            except QuotaExceeded as e:
+                if e.retry_after is not None:
+                    return f"unaffordable search given a retry time: {e.retry_after}"
+            keypair, _, _ = await (await client.submit("a", case_sensitive=False, task_id="cheap", user_id=42))
+            if keypair is None:
+                return "cheap search failed"
+            return None
+        finally:
+            await client.close()
+            await daemon.stop()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        error = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    assert not error, f"Daemon quotas: {error}"
+    print("✅ Daemon enforces limits for every front end")
+
+def sign_init_data(fields, bot_token):
+    """Build a Telegram WebApp initData string signed the way Telegram does it"""
+    import hashlib
+    import hmac
+    from urllib.parse import urlencode
+    data_check = '\n'.join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b'WebAppData', bot_token.encode(), hashlib.sha256).digest()
+    return urlencode({**fields, 'hash': hmac.new(secret, data_check.encode(), hashlib.sha256).hexdigest()})
+
+class FakeRequest:
+    """Stands in for an aiohttp request to the mini app"""
+    
+    def __init__(self, headers=None, remote='203.0.113.7', body=None, match_info=None):
+        self.headers = headers or {}
+        self.remote = remote
+        self.body = body or {}
+        self.match_info = match_info or {}
+    
+    async def json(self):
+        return self.body
+
+def test_init_data():
+    """Test that the mini app only trusts user ids from signed Telegram initData"""
+    print("\n🔍 Testing Telegram initData verification...")
+    
+    import json
+    from telegram_mini_app import INIT_DATA_HEADER, TELEGRAM_TOKEN, caller_id, verify_init_data
+    
+    fields = {'auth_date': str(int(time.time())), 'query_id': 'AAE', 'user': json.dumps({'id': 4242})}
+    signed = sign_init_data(fields, TELEGRAM_TOKEN)
+    assert (verify_init_data(signed, TELEGRAM_TOKEN) or {}).get('user', {}).get('id') == 4242, "Valid initData was rejected"
+    
+    forged = signed.replace('4242', '4343')
+    expired = sign_init_data({**fields, 'auth_date': str(int(time.time()) - 2 * 86400)}, TELEGRAM_TOKEN)
+    other_bot = sign_init_data(fields, 'another-token')
+    for name, init_data in (("forged", forged), ("expired", expired), ("other bot's", other_bot), ("empty", "")):
+        assert verify_init_data(init_data, TELEGRAM_TOKEN) is None, f"Accepted {name} initData"
+    
+    assert caller_id(FakeRequest({INIT_DATA_HEADER: signed})) == '4242', "Signed user id not used"
+    assert caller_id(FakeRequest({INIT_DATA_HEADER: forged})) == '203.0.113.7', "Forged initData did not fall back to the client address"
+    
+    print("✅ Signed ids accepted; forged, expired and foreign initData fall back to the client address")
+
+def test_mini_app_identity():
+    """Test that the mini app queues searches under the verified Telegram id, not one from the body"""
+    print("\n🔍 Testing mini app identity...")
+    
+    import json
+    import tempfile
+    from cryptography.fernet import Fernet
+    import telegram_mini_app as mini
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    from inventory import Inventory
+    from job_store import JobStore
+    
+    signed = sign_init_data({'auth_date': str(int(time.time())), 'user': json.dumps({'id': 4242})},
+                            mini.TELEGRAM_TOKEN)
+    intruder = sign_init_data({'auth_date': str(int(time.time())), 'user': json.dumps({'id': 666})},
+                              mini.TELEGRAM_TOKEN)
+    
+    async def run(directory):
+        service = GenerationService(max_attempts=10**9, workers=1)
+        daemon = ComputeDaemon(service, os.path.join(directory, "compute.sock"))
+        await daemon.start()
+        mini.compute = ComputeClient(daemon.path, name="mini_app")
+        app = mini.TelegramMiniApp()
+        try:
+            owners = {}
+            for name, headers in (("signed", {mini.INIT_DATA_HEADER: signed}), ("unsigned", {})):
+                # The body's user_id claims someone else and must be ignored
+                request = FakeRequest(headers, body={'prefix': 'AAAA', 'user_id': 'victim'})
+                response = json.loads((await app.generate_api_handler(request)).text)
+                if not response.get('success'):
+                    return f"{name} request failed: {response}"
+                task_id = response['task_id']
+                owners[name] = service._tasks[task_id].user_id
+                
+                # Only the owner may cancel it, once the background task has recorded it
+                await asyncio.sleep(0.05)
+                match_info = {'task_id': task_id}
+                denied = await app.cancel_api_handler(FakeRequest({mini.INIT_DATA_HEADER: intruder},
+                                                                  match_info=match_info))
+                if denied.status != 403 or task_id not in service._tasks:
+                    return f"another user cancelled the {name} search"
+                cancelled = await app.cancel_api_handler(FakeRequest(headers, match_info=match_info))
+                if not json.loads(cancelled.text).get('success'):
+                    return f"owner could not cancel the {name} search"
+            if owners != {'signed': '4242', 'unsigned': '203.0.113.7'}:
+                return f"searches queued under {owners}"
+            return None
+        finally:
+            await mini.compute.close()
+            await daemon.stop()
+    
+    originals = (mini.compute, mini.job_store, mini.inventory)
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # The app serves ./static
+            os.makedirs(os.path.join(directory, "static"))
+            os.chdir(directory)
+            mini.job_store = JobStore(':memory:')
+            mini.inventory = Inventory(os.path.join(directory, "inventory.db"), key=Fernet.generate_key(),
+                                       prefixes=[])
+            error = asyncio.run(run(directory))
+            mini.inventory.close()
+            mini.job_store.close()
+    finally:
+        os.chdir(cwd)
+        mini.compute, mini.job_store, mini.inventory = originals
+    assert not error, f"{error}"
+    print("✅ Searches are queued under the signed Telegram id, or the client address without one")
+    print("✅ Only the owner can cancel a search")
+
+def test_mini_app_startup():
+    """Test that the mini app waits for a compute daemon that is not listening yet"""
+    print("\n🔍 Testing mini app start-up before the daemon...")
+    
+    import tempfile
+    import telegram_mini_app as mini
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    
+    async def run(directory):
+        path = os.path.join(directory, "compute.sock")
+        mini.compute = ComputeClient(path, name="mini_app")
+        app = mini.TelegramMiniApp()
+        resume = asyncio.create_task(app.resume_generations())
+        await asyncio.sleep(0.3)
+        if resume.done():
+            return f"resume gave up without a daemon: {resume.exception()!r}"
+        
+        daemon = ComputeDaemon(GenerationService(max_attempts=1000, workers=1), path)
+        await daemon.start()
+        try:
+            await asyncio.wait_for(resume, 5)
+            return None
+        finally:
+            await mini.compute.close()
+            await daemon.stop()
+    
+    original = (mini.compute, mini.RESUME_RETRY_INTERVAL)
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # The app serves ./static
+            os.makedirs(os.path.join(directory, "static"))
+            os.chdir(directory)
+            mini.RESUME_RETRY_INTERVAL = 0.1
+            error = asyncio.run(run(directory))
+    finally:
+        os.chdir(cwd)
+        mini.compute, mini.RESUME_RETRY_INTERVAL = original
+    assert not error, f"{error}"
+    print("✅ Searches are resumed once the daemon starts listening")
+
+def test_metrics():
+    """Test the Prometheus metrics of the service and the /metrics handler"""
+    print("\n🔍 Testing metrics...")
+    
+    import tempfile
+    import bot
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    from metrics import Registry
+    
+    registry = Registry()
+    histogram = registry.histogram('wait_seconds', 'Wait', ('length',), buckets=(1, 10))
+    for value in (0.5, 5, 50):
+        histogram.observe(value, 3)
+    text = registry.render()
+    for line in ('wait_seconds_bucket{length="3",le="1"} 1', 'wait_seconds_bucket{length="3",le="10"} 2',
+                 'wait_seconds_bucket{length="3",le="+Inf"} 3', 'wait_seconds_count{length="3"} 3'):
+        assert line in text, f"Missing histogram line: {line}"
+    
+    async def run(path):
+        daemon = ComputeDaemon(GenerationService(max_attempts=10**9, workers=1), path)
+        await daemon.start()
+        bot.compute = ComputeClient(path, name="bot")
+        try:
+            keypair, _, _ = await bot.compute.generate("a", case_sensitive=False, task_id="quick")
+            if keypair is None:
+                return None
+            # Let the monitor measure a rate window of a long search
+            slow = await bot.compute.submit("AAAA", task_id="slow")
+            await asyncio.sleep(1.5)
+            response = await bot.metrics_handler(None)
+            await bot.compute.cancel("slow")
+            await asyncio.gather(slow, return_exceptions=True)
+            return response.body.decode()
+        finally:
+            await bot.compute.close()
+            await daemon.stop()
+    
+    original_client = bot.compute
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            text = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    finally:
+        bot.compute = original_client
+    assert text is not None, "Quick search failed"
+    for line in ('vanity_compute_up 1', 'vanity_jobs_finished_total{outcome="found"}',
+                 'vanity_time_to_result_seconds_count{length="1"} 1', 'vanity_queue_wait_seconds_count{length="1"} 1',
+                 'vanity_worker_keys_per_second{worker="0"}', 'vanity_jobs_queued 0'):
+        assert line in text, f"Missing metric: {line}"
+    print(f"✅ /metrics exports {text.count('# TYPE')} metrics from the bot and the daemon")
+
+def test_profiler():
+    """Test sampling the workers' stacks at runtime through the daemon"""
+    print("\n🔍 Testing worker profiler...")
+    
+    import tempfile
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    from profiler import hottest_frames
+    
+    async def run(path):
+        daemon = ComputeDaemon(GenerationService(max_attempts=10**9, workers=1), path)
+        await daemon.start()
+        client = ComputeClient(path, name="bot")
+        try:
+            search = await client.submit("AAAA", task_id="slow")
+            # A worker's late answer to an earlier round must not leak into this one
+            daemon.service._profiles.put((0, 0, {"stale_round (old.py:1)": 10**6}))
+            profiling = asyncio.create_task(client.profile(1.0))
+            # Other requests are answered while the profile is taken
+            start = time.perf_counter()
+            await client.stats()
+            stats_latency = time.perf_counter() - start
+            profile = await profiling
+            await client.cancel("slow")
+            await asyncio.gather(search, return_exceptions=True)
+            return profile, stats_latency
+        finally:
+            await client.close()
+            await daemon.stop()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        profile, stats_latency = asyncio.run(run(os.path.join(directory, "compute.sock")))
+    
+    lines = profile.splitlines()
+    if not lines or not all(line.startswith("_stream_worker (") and line.rsplit(' ', 1)[1].isdigit()
+                            for line in lines):
+        raise AssertionError(f"Not collapsed worker stacks: {lines[:3]}")
+    assert "stale_round" not in profile, "A previous round's samples were merged into the profile"
+    assert any("derive" in line for line in lines), "Key derivation missing from the profile"
+    assert stats_latency <= 0.5, f"Requests were held up by profiling ({stats_latency:.2f}s)"
+    frame, share = hottest_frames(profile)[0]
+    samples = sum(int(line.rsplit(' ', 1)[1]) for line in lines)
+    print(f"✅ {samples} samples; hottest frame {frame} ({share:.0%})")
+
+def test_stage_timing():
+    """Test the per-stage timing of the search loops, locally and through the daemon"""
+    print("\n🔍 Testing stage timing...")
+
+    import tempfile
+    from compute_daemon import ComputeClient, ComputeDaemon
+    from generation_service import GenerationService
+    from vanity_generator import STAGES, SolanaVanityGenerator
+
+    keypair, attempts, time_taken = result = SolanaVanityGenerator(
+        max_attempts=20000, workers=1, stage_timing=True).generate_vanity_address("AAAA")
+    assert list(result.stages) == list(STAGES) and result.stages['derive'] > 0, f"Bad local stage times: {result.stages}"
+    assert sum(result.stages.values()) <= time_taken + 0.01, f"Stage times exceed the search time: {result.stages} vs {time_taken:.3f}s"
+    assert SolanaVanityGenerator(max_attempts=2000, workers=1).generate_vanity_address("AAAA").stages is None, "Stages timed without stage_timing"
+
+    async def run(path):
+        daemon = ComputeDaemon(GenerationService(max_attempts=100000, workers=1, stage_timing=True), path)
+        await daemon.start()
+        client = ComputeClient(path, name="bot")
+        try:
+            search = await client.submit("AAA", task_id="timed")
+            await asyncio.sleep(0.5)
+            progress = await client.progress("timed")
+            return progress, await search
+        finally:
+            await client.close()
+            await daemon.stop()
+
+    with tempfile.TemporaryDirectory() as directory:
+        progress, result = asyncio.run(run(os.path.join(directory, "compute.sock")))
+
+    assert progress is None or set(progress['stages']) == set(STAGES), f"Progress without stage times: {progress}"
+    assert result.stages and result.stages['derive'] > 0, f"No stage times in the daemon's result: {result.stages}"
+    per_key = {stage: seconds / result[1] * 1e6 for stage, seconds in result.stages.items()}
+    print("✅ Per key: " + ", ".join(f"{stage} {micros:.2f}µs" for stage, micros in per_key.items()))
+
 def main():
     """Run all tests"""
     print("🚀 Solana Vanity Wallet Telegram Bot - Test Suite")
@@ -128,7 +1368,35 @@ def main():
         ("Environment Configuration", test_environment),
         ("Dependencies", test_dependencies),
         ("Vanity Generator", test_vanity_generator),
+        ("Seeded Generation", test_seeded_generation),
+        ("Key Backends", test_key_backends),
+        ("Prefix Matching", test_prefix_matching),
+        ("Suffix Matching", test_suffix_matching),
+        ("Case-insensitive Matching", test_case_insensitive_matching),
+        ("Parallel Generation", test_parallel_generation),
+        ("Time Estimates", test_estimate),
+        ("Calibration Profile", test_calibration_profile),
         ("Bot Module", test_bot_module),
+        ("Handler Latency", test_handler_latency),
+        ("Daemon Unavailable", test_daemon_unavailable),
+        ("Progress Edits", test_progress_edits),
+        ("Admission Control", test_admission),
+        ("Cancellation", test_cancellation),
+        ("Job Store Secrets", test_job_store_secrets),
+        ("Fair Scheduler", test_fair_scheduler),
+        ("Shared Matches", test_shared_matches),
+        ("Checkpoint Resume", test_checkpoint_resume),
+        ("Inventory", test_inventory),
+        ("Harvest", test_harvest),
+        ("Distributed Search", test_distributed_search),
+        ("Compute Daemon", test_compute_daemon),
+        ("Quotas", test_quotas),
+        ("Telegram initData", test_init_data),
+        ("Mini App Identity", test_mini_app_identity),
+        ("Mini App Start-up", test_mini_app_startup),
+        ("Metrics", test_metrics),
+        ("Worker Profiler", test_profiler),
+        ("Stage Timing", test_stage_timing),
     ]
     
     passed = 0
@@ -136,12 +1404,16 @@ def main():
     
     for test_name, test_func in tests:
         print(f"\n📋 Running: {test_name}")
+        # Older tests return True/False; the rest return nothing and fail by raising, as under pytest
         try:
-            if test_func():
+            if test_func() is not False:
                 print(f"✅ {test_name}: PASSED")
                 passed += 1
             else:
                 print(f"❌ {test_name}: FAILED")
+        except AssertionError as e:
+            print(f"❌ {e}")
+            print(f"❌ {test_name}: FAILED")
         except Exception as e:
             print(f"❌ {test_name}: ERROR - {e}")
     
@@ -7,6 +7,8 @@ import asyncio
 import logging
 from aiohttp import web
 from vanity_generator import SolanaVanityGenerator
+from generation_service import GenerationService
+from job_store import JobStore
 from datetime import datetime
 
 # Configure logging
@@ -16,8 +18,11 @@ logger = logging.getLogger(__name__)
 # Initialize the vanity generator
 vanity_generator = SolanaVanityGenerator(max_attempts=1000000)
 
-# Store active generations
-active_generations = {}
+# Searches run in worker processes so the server stays responsive
+generation_service = GenerationService(max_attempts=1000000)
+
+# Task records, persisted so results survive restarts
+job_store = JobStore()
 
 class TestWebServer:
     def __init__(self):
@@ -72,8 +77,8 @@ class TestWebServer:
         """Handle status check API requests"""
         task_id = request.match_info['task_id']
         
-        if task_id in active_generations:
-            status = active_generations[task_id]
+        status = job_store.get(task_id)
+        if status is not None:
             return web.json_response(status)
         else:
             return web.json_response({
@@ -85,20 +90,20 @@ class TestWebServer:
         """Generate vanity address asynchronously"""
         try:
             # Initialize task status
-            active_generations[task_id] = {
+            job_store.put(task_id, {
                 'status': 'generating',
                 'prefix': prefix,
                 'attempts': 0,
                 'start_time': datetime.now().isoformat(),
                 'progress': 0
-            }
+            })
             
             # Generate the vanity address
-            keypair, attempts, time_taken = vanity_generator.generate_vanity_address(prefix)
+            keypair, attempts, time_taken = await generation_service.generate(prefix)
             
             if keypair:
                 # Success
-                active_generations[task_id] = {
+                job_store.put(task_id, {
                     'status': 'completed',
                     'prefix': prefix,
                     'attempts': attempts,
@@ -106,26 +111,26 @@ class TestWebServer:
                     'public_key': str(keypair.pubkey()),
                     'private_key': vanity_generator.format_private_key(keypair),
                     'completion_time': datetime.now().isoformat()
-                }
+                })
             else:
                 # Failed
-                active_generations[task_id] = {
+                job_store.put(task_id, {
                     'status': 'failed',
                     'prefix': prefix,
                     'attempts': attempts,
                     'time_taken': time_taken,
                     'error': 'Could not find vanity address within maximum attempts',
                     'completion_time': datetime.now().isoformat()
-                }
+                })
                 
         except Exception as e:
             logger.error(f"Error in async generation: {e}")
-            active_generations[task_id] = {
+            job_store.put(task_id, {
                 'status': 'failed',
                 'prefix': prefix,
                 'error': str(e),
                 'completion_time': datetime.now().isoformat()
-            }
+            })
     
     def get_mini_app_html(self):
         """Generate the HTML content for the mini app"""
@@ -517,6 +522,8 @@ async def main():
         logger.info("�� Shutting down server...")
     finally:
         await runner.cleanup()
+        generation_service.stop()
+        job_store.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
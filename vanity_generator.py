@@ -1,79 +1,754 @@
 import base58
+import hashlib
+import itertools
+import math
+import multiprocessing
+import os
+import queue
 import secrets
-from typing import Tuple, Optional
+import threading
+from bisect import bisect_right
+from typing import Callable, Dict, List, Sequence, Tuple, Optional
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 import time
 from config import SOLANA_NETWORK
 
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# Longest prefix (or prefix + suffix) the generator accepts
+MAX_PATTERN_LENGTH = 8
+
+# Size of a Solana public key in bytes
+PUBKEY_LENGTH = 32
+
+# Size of an ed25519 seed in bytes
+SEED_LENGTH = 32
+
+# Ways of producing candidate keypairs, see KeySource
+KEY_BACKENDS = ("keypair", "os", "chacha20")
+
+# Keystream bytes a ChaCha20 source emits before re-keying itself
+CHACHA20_REKEY_BYTES = 1 << 30
+
+# Number of keys a worker tries between checks of the shared stop flag
+WORKER_BATCH_SIZE = 1024
+
+# Seconds between progress lines printed while workers are searching
+PROGRESS_INTERVAL = 5.0
+
+# Seconds the parallel search waits for a result before checking cancellation and progress
+POLL_INTERVAL = 0.2
+
+# Seconds spent measuring throughput when no measured rate is available
+RATE_SAMPLE_SECONDS = 0.25
+
+# Time each stage of the search loop (STAGE_TIMING=1); see StageTimer
+STAGE_TIMING = os.getenv('STAGE_TIMING', '0') == '1'
+
+# Stages of a search batch, in loop order: drawing keypairs, extracting the
+# public key bytes, matching them and the loop's own bookkeeping
+STAGES = ("derive", "extract", "match", "bookkeeping")
+DERIVE, EXTRACT, MATCH, BOOKKEEPING = range(len(STAGES))
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration for display, e.g. ``45s``, ``3m 20s`` or ``2d 5h``.
+    
+    Args:
+        seconds (float): Duration in seconds
+        
+    Returns:
+        str: Short human readable duration
+    """
+    if seconds < 1:
+        return "<1s"
+    units = (("d", 86400), ("h", 3600), ("m", 60), ("s", 1))
+    parts = []
+    remaining = int(round(seconds))
+    for name, size in units:
+        if remaining >= size or parts:
+            value, remaining = divmod(remaining, size)
+            parts.append(f"{value}{name}")
+        if len(parts) == 2:
+            break
+    return " ".join(part for part in parts if not part.startswith("0")) or "0s"
+
+
+def usable_cpu_count() -> int:
+    """
+    Return the number of CPUs this process is allowed to run on.
+    
+    Returns:
+        int: Usable core count (affinity-aware where the platform supports it)
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _base58_value(text: str) -> int:
+    """Read a base58 string as an integer (leading '1's are zero digits)"""
+    value = 0
+    for char in text:
+        digit = BASE58_ALPHABET.find(char)
+        if digit < 0:
+            raise ValueError(f"Invalid base58 character: {char}")
+        value = value * 58 + digit
+    return value
+
+
+def prefix_intervals(prefix: str) -> List[Tuple[int, int]]:
+    """
+    Compile a base58 prefix into the pubkey values whose address starts with it.
+    
+    A base58 address is one '1' per leading zero byte followed by the digits
+    of the key read as a big-endian integer. A prefix therefore fixes the
+    number of leading zero bytes and, for every possible digit count, one
+    contiguous range of integers.
+    
+    Args:
+        prefix (str): A base58 prefix
+        
+    Returns:
+        List[Tuple[int, int]]: Sorted, disjoint, inclusive (low, high) ranges
+    """
+    ones = len(prefix) - len(prefix.lstrip('1'))
+    rest = prefix[ones:]
+    if ones > PUBKEY_LENGTH or (rest and ones == PUBKEY_LENGTH):
+        return []
+    
+    # Keys with at least `ones` leading zero bytes are below `top`
+    top = 1 << (8 * (PUBKEY_LENGTH - ones))
+    if not rest:
+        return [(0, top - 1)]
+    # ...and with exactly `ones` of them are at least `low`
+    low = top >> 8
+    
+    value = _base58_value(rest)
+    intervals = []
+    scale = 1
+    while value * scale < top:
+        start = max(value * scale, low)
+        end = min((value + 1) * scale - 1, top - 1)
+        if start <= end:
+            intervals.append((start, end))
+        scale *= 58
+    return intervals
+
+
+def suffix_residue(suffix: str) -> Tuple[int, int]:
+    """
+    Compile a base58 suffix into a modular constraint on the pubkey value.
+    
+    The last k characters of an address are the last k base58 digits of the
+    key, i.e. ``value % 58**k``. Keys too small to have k digits are caught
+    by the full encoding done on a hit (see ``address_tail``).
+    
+    Args:
+        suffix (str): A base58 suffix
+        
+    Returns:
+        Tuple[int, int]: (modulus, residue)
+    """
+    return 58 ** len(suffix), _base58_value(suffix)
+
+
+def case_variants(text: str) -> List[str]:
+    """
+    List every spelling of ``text`` with its letters in either case.
+    
+    Only spellings made of base58 characters are returned (e.g. ``o`` has no
+    upper-case form and ``L`` no lower-case one).
+    
+    Args:
+        text (str): The pattern text
+        
+    Returns:
+        List[str]: The valid spellings
+    """
+    options = []
+    for char in text:
+        chars = sorted({c for c in (char.upper(), char.lower()) if c in BASE58_ALPHABET})
+        if not chars:
+            raise ValueError(f"Invalid base58 character: {char}")
+        options.append(chars)
+    return [''.join(spelling) for spelling in itertools.product(*options)]
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Merge inclusive ranges into a sorted list of disjoint ones.
+    
+    Args:
+        intervals (List[Tuple[int, int]]): Inclusive (low, high) ranges
+        
+    Returns:
+        List[Tuple[int, int]]: Sorted, disjoint, non-adjacent ranges
+    """
+    merged = []
+    for low, high in sorted(intervals):
+        if merged and low <= merged[-1][1] + 1:
+            if high > merged[-1][1]:
+                merged[-1] = (merged[-1][0], high)
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def address_tail(pubkey_bytes: bytes, length: int) -> str:
+    """Return the last ``length`` characters of the key's base58 address"""
+    return base58.b58encode(pubkey_bytes).decode('ascii')[-length:]
+
+
+class PatternMatcher:
+    """
+    Tests raw 32-byte public keys against a compiled prefix and/or suffix.
+    
+    Byte strings of equal length compare like the big-endian integers they
+    encode, so the prefix check is a bisect over the range bounds instead of
+    a full base58 encoding per candidate. The suffix check is one big-int
+    modulo and a set lookup. The prefix check is the cheaper of the two and
+    runs first. Without ``case_sensitive`` every case spelling of the pattern
+    is compiled into the same merged ranges and residue set.
+    """
+    
+    def __init__(self, prefix: str = "", suffix: str = "", case_sensitive: bool = True):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.case_sensitive = case_sensitive
+        
+        prefixes = ([prefix] if case_sensitive else case_variants(prefix)) if prefix else []
+        self.intervals = merge_intervals([
+            interval for spelling in prefixes for interval in prefix_intervals(spelling)
+        ])
+        self._lows = [low.to_bytes(PUBKEY_LENGTH, 'big') for low, _ in self.intervals]
+        self._highs = [high.to_bytes(PUBKEY_LENGTH, 'big') for _, high in self.intervals]
+        
+        self.suffixes = frozenset([suffix] if case_sensitive else case_variants(suffix)) if suffix else frozenset()
+        self.modulus = 58 ** len(suffix)
+        self.residues = frozenset(suffix_residue(spelling)[1] for spelling in self.suffixes)
+    
+    def describe(self) -> str:
+        """Return a human readable description of the pattern"""
+        parts = []
+        if self.prefix:
+            parts.append(f"starting with: {self.prefix}")
+        if self.suffix:
+            parts.append(f"ending with: {self.suffix}")
+        description = " and ".join(parts)
+        return description if self.case_sensitive else f"{description} (any case)"
+    
+    def match_probability(self) -> float:
+        """
+        Return the chance that one random key matches the pattern.
+        
+        Returns:
+            float: Match probability per attempt
+        """
+        probability = 1.0
+        if self.prefix:
+            probability = sum(high - low + 1 for low, high in self.intervals) / (1 << (8 * PUBKEY_LENGTH))
+        if self.suffix:
+            probability *= len(self.residues) / self.modulus
+        return probability
+    
+    def matches(self, pubkey_bytes: bytes) -> bool:
+        """
+        Check whether a raw public key encodes to an address with the pattern.
+        
+        Args:
+            pubkey_bytes (bytes): The 32-byte public key
+            
+        Returns:
+            bool: True if the address starts with the prefix and ends with the suffix
+        """
+        if self.prefix:
+            i = bisect_right(self._lows, pubkey_bytes) - 1
+            if i < 0 or pubkey_bytes > self._highs[i]:
+                return False
+        if self.suffix:
+            if int.from_bytes(pubkey_bytes, 'big') % self.modulus not in self.residues:
+                return False
+            return address_tail(pubkey_bytes, len(self.suffix)) in self.suffixes
+        return True
+
+
+class KeySource:
+    """
+    Produces batches of candidate keypairs.
+    
+    The ``keypair`` backend calls ``Keypair()`` once per key, which makes one
+    OS random call each time. The ``os`` and ``chacha20`` backends fill one
+    buffer with ``count * 32`` bytes per batch (from ``secrets`` or from a
+    ChaCha20 keystream) and derive keys with ``Keypair.from_seed`` on
+    memoryview slices of it.
+    """
+    
+    def __init__(self, backend: str = "keypair", key: Optional[bytes] = None):
+        if backend not in KEY_BACKENDS:
+            raise ValueError(f"Unknown key backend: {backend}")
+        self.backend = backend
+        self._key = key or secrets.token_bytes(32)
+        self._keystream = None
+        self._keystream_used = 0
+    
+    def seeds(self, count: int) -> bytes:
+        """
+        Return ``count`` concatenated 32-byte seeds.
+        
+        Args:
+            count (int): Number of seeds
+            
+        Returns:
+            bytes: A buffer of ``count * SEED_LENGTH`` bytes
+        """
+        size = count * SEED_LENGTH
+        if self.backend != "chacha20":
+            return secrets.token_bytes(size)
+        
+        if self._keystream is None or self._keystream_used >= CHACHA20_REKEY_BYTES:
+            if self._keystream is not None:
+                # Take the next key from the stream so it never wraps around
+                self._key = self._keystream.update(bytes(32))
+            self._keystream = Cipher(algorithms.ChaCha20(self._key, bytes(16)), mode=None).encryptor()
+            self._keystream_used = 0
+        self._keystream_used += size
+        return self._keystream.update(bytes(size))
+    
+    def derive(self, count: int) -> List[Keypair]:
+        """
+        Generate ``count`` keypairs.
+        
+        Args:
+            count (int): Number of keypairs
+            
+        Returns:
+            List[Keypair]: The candidate keypairs
+        """
+        if self.backend == "keypair":
+            return [Keypair() for _ in range(count)]
+        
+        view = memoryview(self.seeds(count))
+        from_seed = Keypair.from_seed
+        return [from_seed(view[i:i + SEED_LENGTH]) for i in range(0, count * SEED_LENGTH, SEED_LENGTH)]
+
+
+def seed_key(seed: bytes, index: int) -> bytes:
+    """
+    Derive the ChaCha20 key of worker ``index`` from a master seed.
+    
+    Args:
+        seed (bytes): The master seed
+        index (int): The worker's index
+        
+    Returns:
+        bytes: A 32-byte key, distinct per worker
+    """
+    return hashlib.sha256(seed + index.to_bytes(4, 'big')).digest()
+
+
+class StageTimer:
+    """
+    Splits the time of a search loop between ``STAGES``.
+    
+    :meth:`lap` charges the nanoseconds since the previous lap to a stage.
+    Laps are taken a few times per batch rather than per key, so timing costs
+    a handful of ``perf_counter_ns`` calls per ``WORKER_BATCH_SIZE`` keys.
+    """
+    
+    __slots__ = ("ns", "_last")
+    
+    def __init__(self):
+        self.ns = [0] * len(STAGES)
+        self._last = time.perf_counter_ns()
+    
+    def restart(self):
+        """Start the next lap now, leaving the time since the last one uncharged"""
+        self._last = time.perf_counter_ns()
+    
+    def lap(self, stage: int):
+        """Charge the time since the last lap to ``stage``"""
+        now = time.perf_counter_ns()
+        self.ns[stage] += now - self._last
+        self._last = now
+
+
+def stage_seconds(ns: Sequence[int]) -> Dict[str, float]:
+    """Turn nanoseconds per stage (in ``STAGES`` order) into ``{stage: seconds}``"""
+    return {stage: value / 1e9 for stage, value in zip(STAGES, ns)}
+
+
+def format_stages(stages: Dict[str, float], attempts: int) -> str:
+    """
+    Format stage times as microseconds per key, e.g. ``derive 31.2µs | extract 0.4µs | ...``.
+    
+    Args:
+        stages (Dict[str, float]): Seconds per stage
+        attempts (int): Keys the stages were timed over
+        
+    Returns:
+        str: One entry per stage
+    """
+    keys = max(attempts, 1)
+    return " | ".join(f"{stage} {seconds / keys * 1e6:.2f}µs" for stage, seconds in stages.items())
+
+
+class SearchResult(tuple):
+    """
+    ``(keypair, attempts, time_taken)`` of a search, unpacked like a plain tuple.
+    
+    ``stages`` holds the seconds spent per stage (see ``STAGES``) when the
+    search was timed, else None.
+    """
+    
+    def __new__(cls, keypair: Optional[Keypair], attempts: int, time_taken: float,
+                stages: Optional[Dict[str, float]] = None):
+        result = super().__new__(cls, (keypair, attempts, time_taken))
+        result.stages = stages
+        return result
+
+
+def _search(matcher: PatternMatcher, budget: int, source: KeySource, stop_event=None,
+            progress: Optional[Callable[[int], None]] = None,
+            timer: Optional[StageTimer] = None) -> Tuple[Optional[Keypair], int]:
+    """
+    Try up to ``budget`` keypairs from ``source`` against ``matcher``.
+    
+    ``stop_event`` and ``progress`` are checked and called once per batch.
+    With a ``timer``, each batch's time is split between ``STAGES``.
+    
+    Returns:
+        Tuple[Optional[Keypair], int]: (keypair, attempts)
+    """
+    attempts = 0
+    while attempts < budget:
+        if stop_event is not None and stop_event.is_set():
+            break
+        if timer is not None:
+            timer.lap(BOOKKEEPING)
+        batch = source.derive(min(WORKER_BATCH_SIZE, budget - attempts))
+        if timer is not None:
+            timer.lap(DERIVE)
+        # to_bytes() is secret || pubkey; calling pubkey() would re-derive it
+        pubkeys = [keypair.to_bytes()[32:] for keypair in batch]
+        if timer is not None:
+            timer.lap(EXTRACT)
+        for offset, pubkey in enumerate(pubkeys):
+            if matcher.matches(pubkey):
+                if timer is not None:
+                    timer.lap(MATCH)
+                return batch[offset], attempts + offset + 1
+        if timer is not None:
+            timer.lap(MATCH)
+        attempts += len(batch)
+        if progress is not None:
+            progress(attempts)
+    if timer is not None:
+        timer.lap(BOOKKEEPING)
+    return None, attempts
+
+
+def _search_worker(index: int, matcher: PatternMatcher, budget: int, source: KeySource,
+                   stop_event, counters, result_queue, timed: bool = False):
+    """
+    Worker process body for the parallel search.
+    
+    Tries up to ``budget`` keypairs, publishing its attempt count to
+    ``counters[index]`` after every batch. Exactly one message is put on
+    ``result_queue``: ``(index, keypair_bytes or None, attempts, stage_ns)``,
+    where ``stage_ns`` is the nanoseconds per stage if ``timed``, else None.
+    """
+    keypair, attempts = None, 0
+    timer = StageTimer() if timed else None
+    
+    def progress(done: int):
+        counters[index] = done
+    
+    try:
+        keypair, attempts = _search(matcher, budget, source, stop_event, progress, timer)
+    except KeyboardInterrupt:
+        attempts = counters[index]
+    
+    counters[index] = attempts
+    stage_ns = timer.ns if timer is not None else None
+    if keypair is not None:
+        stop_event.set()
+        result_queue.put((index, bytes(keypair), attempts, stage_ns))
+    else:
+        result_queue.put((index, None, attempts, stage_ns))
+
+
 class SolanaVanityGenerator:
-    def __init__(self, max_attempts: int = 1000000):
+    def __init__(self, max_attempts: int = 1000000, workers: Optional[int] = None,
+                 backend: Optional[str] = None, keys_per_second: Optional[float] = None,
+                 seed: Optional[bytes] = None, coordinator=None, stage_timing: bool = STAGE_TIMING):
+        if backend is None:
+            # Only the chacha20 keystream can be replayed from a seed
+            backend = "chacha20" if seed is not None else "keypair"
+        if backend not in KEY_BACKENDS:
+            raise ValueError(f"Unknown key backend: {backend}")
+        if seed is not None and backend != "chacha20":
+            raise ValueError(f"A seed needs the chacha20 backend, not {backend}")
         self.max_attempts = max_attempts
+        self.workers = max(1, workers if workers is not None else usable_cpu_count())
+        self.backend = backend
+        # Throughput used by estimates; measured on first use if not known
+        self.keys_per_second = keys_per_second
+        # Master seed for reproducible runs (benchmarks, tests), drawn through the chacha20
+        # backend; None draws fresh randomness
+        self.seed = seed
+        # distributed.Coordinator whose connected nodes take over searches; None searches locally
+        self.coordinator = coordinator
+        # Split local searches' time between STAGES and return it with the result
+        self.stage_timing = stage_timing
+    
+    def _key_source(self, index: int) -> KeySource:
+        """Return worker ``index``'s key source, seeded from ``self.seed`` if one is set"""
+        if self.seed is None:
+            return KeySource(self.backend)
+        return KeySource(self.backend, seed_key(self.seed, index))
     
-    def generate_vanity_address(self, prefix: str) -> Tuple[Optional[Keypair], int, float]:
+    def generate_vanity_address(self, prefix: str = "", suffix: str = "",
+                                case_sensitive: bool = True, cancel: Optional[threading.Event] = None,
+                                on_progress: Optional[Callable[[int], None]] = None
+                                ) -> Tuple[Optional[Keypair], int, float]:
         """
-        Generate a Solana vanity address with the specified prefix.
+        Generate a Solana vanity address with the specified prefix and/or suffix.
+        
+        The search is spread over ``self.workers`` processes, or over the
+        nodes of ``self.coordinator`` when any are connected; the first
+        worker to find a match stops the others. ``max_attempts`` is the
+        total budget across all workers.
         
         Args:
             prefix (str): The desired prefix for the address
+            suffix (str): The desired suffix for the address
+            case_sensitive (bool): Whether letters must match in case
+            cancel (Optional[threading.Event]): Stops the search early when set
+            on_progress (Optional[Callable[[int], None]]): Called with the attempts made so far
             
         Returns:
-            Tuple[Optional[Keypair], int, float]: (keypair, attempts, time_taken)
+            SearchResult: (keypair, attempts, time_taken), with the seconds per
+            stage in ``stages`` if ``stage_timing`` is on and the search ran locally
         """
-        if not prefix:
-            return None, 0, 0.0
+        if not prefix and not suffix:
+            return SearchResult(None, 0, 0.0)
             
-        prefix = prefix.upper()
+        matcher = PatternMatcher(prefix, suffix, case_sensitive)
+        if self.coordinator is not None and self.coordinator.nodes():
+            return SearchResult(*self._generate_distributed(matcher, cancel, on_progress))
+        workers = min(self.workers, max(1, self.max_attempts // WORKER_BATCH_SIZE))
+        if workers > 1:
+            return self._generate_parallel(matcher, workers, cancel, on_progress)
+        
         start_time = time.time()
-        attempts = 0
+        last_report = start_time
+        
+        print(f"🔍 Searching for address {matcher.describe()}")
+        
+        def progress(attempts: int):
+            nonlocal last_report
+            if on_progress is not None:
+                on_progress(attempts)
+            now = time.time()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                elapsed = now - start_time
+                rate = attempts / elapsed if elapsed > 0 else 0
+                print(f"⏳ Attempts: {attempts:,} | Rate: {rate:.0f}/sec | Elapsed: {elapsed:.1f}s")
         
-        print(f"🔍 Searching for address starting with: {prefix}")
+        timer = StageTimer() if self.stage_timing else None
+        keypair, attempts = _search(matcher, self.max_attempts, self._key_source(0), cancel, progress, timer)
         
-        while attempts < self.max_attempts:
-            attempts += 1
+        time_taken = time.time() - start_time
+        return self._result(keypair, attempts, time_taken, timer.ns if timer is not None else None)
+    
+    def _result(self, keypair: Optional[Keypair], attempts: int, time_taken: float,
+                stage_ns: Optional[Sequence[int]]) -> SearchResult:
+        """Report a finished local search and build its result"""
+        if keypair:
+            print(f"✅ Found vanity address after {attempts:,} attempts in {time_taken:.2f} seconds")
+        else:
+            print(f"❌ Failed to find vanity address after {attempts:,} attempts")
+        stages = stage_seconds(stage_ns) if stage_ns is not None else None
+        if stages is not None:
+            print(f"⏱️ Per key: {format_stages(stages, attempts)}")
+        return SearchResult(keypair, attempts, time_taken, stages)
+    
+    def _generate_parallel(self, matcher: PatternMatcher, workers: int,
+                           cancel: Optional[threading.Event] = None,
+                           on_progress: Optional[Callable[[int], None]] = None
+                           ) -> SearchResult:
+        """
+        Run the search across ``workers`` processes.
+        
+        Args:
+            matcher (PatternMatcher): The compiled pattern
+            workers (int): Number of worker processes to start
+            cancel (Optional[threading.Event]): Stops the search early when set
+            on_progress (Optional[Callable[[int], None]]): Called with the attempts made so far
             
-            # Generate a new keypair
-            keypair = Keypair()
-            public_key = str(keypair.pubkey())
+        Returns:
+            SearchResult: (keypair, attempts, time_taken), with stage times summed over the workers
+        """
+        # spawn rather than fork: callers run inside threaded asyncio apps
+        ctx = multiprocessing.get_context("spawn")
+        stop_event = ctx.Event()
+        counters = ctx.Array('Q', workers, lock=False)
+        result_queue = ctx.Queue()
+        
+        base, extra = divmod(self.max_attempts, workers)
+        processes = [
+            ctx.Process(
+                target=_search_worker,
+                args=(i, matcher, base + (1 if i < extra else 0), self._key_source(i),
+                      stop_event, counters, result_queue, self.stage_timing),
+                daemon=True,
+            )
+            for i in range(workers)
+        ]
+        
+        start_time = time.time()
+        print(f"🔍 Searching for address {matcher.describe()} ({workers} workers)")
+        
+        keypair = None
+        attempts = 0
+        stage_ns = [0] * len(STAGES) if self.stage_timing else None
+        pending = workers
+        last_report = start_time
+        try:
+            for process in processes:
+                process.start()
             
-            # Check if the address starts with the desired prefix
-            if public_key.startswith(prefix):
-                time_taken = time.time() - start_time
-                print(f"✅ Found vanity address after {attempts:,} attempts in {time_taken:.2f} seconds")
-                return keypair, attempts, time_taken
+            while pending:
+                try:
+                    message = result_queue.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    message = None
+                if message is None and not any(process.is_alive() for process in processes):
+                    # Workers that finish together can exit between the timeout and the
+                    # check, with their last results still in the pipe
+                    try:
+                        message = result_queue.get_nowait()
+                    except queue.Empty:
+                        raise RuntimeError("Search workers exited unexpectedly") from None
+                if message is None:
+                    if cancel is not None and cancel.is_set():
+                        stop_event.set()
+                    if on_progress is not None:
+                        on_progress(sum(counters))
+                    now = time.time()
+                    if now - last_report >= PROGRESS_INTERVAL:
+                        last_report = now
+                        done = sum(counters)
+                        elapsed = now - start_time
+                        rate = done / elapsed if elapsed > 0 else 0
+                        print(f"⏳ Attempts: {done:,} | Rate: {rate:.0f}/sec | Elapsed: {elapsed:.1f}s")
+                    continue
+                
+                _, keypair_bytes, worker_attempts, worker_stage_ns = message
+                pending -= 1
+                attempts += worker_attempts
+                if stage_ns is not None and worker_stage_ns is not None:
+                    stage_ns = [total + ns for total, ns in zip(stage_ns, worker_stage_ns)]
+                if keypair_bytes is not None and keypair is None:
+                    keypair = Keypair.from_bytes(keypair_bytes)
+        finally:
+            stop_event.set()
+            for process in processes:
+                if process.pid is None:
+                    continue
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+        
+        time_taken = time.time() - start_time
+        return self._result(keypair, attempts, time_taken, stage_ns)
+    
+    def _generate_distributed(self, matcher: PatternMatcher, cancel: Optional[threading.Event] = None,
+                              on_progress: Optional[Callable[[int], None]] = None
+                              ) -> Tuple[Optional[Keypair], int, float]:
+        """
+        Run the search on the coordinator's worker nodes.
+        
+        Args:
+            matcher (PatternMatcher): The compiled pattern
+            cancel (Optional[threading.Event]): Stops the search early when set
+            on_progress (Optional[Callable[[int], None]]): Called with the attempts made so far
             
-            # Progress update every 10000 attempts
-            if attempts % 10000 == 0:
-                elapsed = time.time() - start_time
-                rate = attempts / elapsed if elapsed > 0 else 0
-                print(f"⏳ Attempts: {attempts:,} | Rate: {rate:.0f}/sec | Elapsed: {elapsed:.1f}s")
+        Returns:
+            Tuple[Optional[Keypair], int, float]: (keypair, attempts, time_taken)
+        """
+        start_time = time.time()
+        print(f"🔍 Searching for address {matcher.describe()} ({len(self.coordinator.nodes())} nodes)")
+        
+        keypair, attempts = self.coordinator.search(matcher, self.max_attempts, cancel, on_progress)
         
         time_taken = time.time() - start_time
-        print(f"❌ Failed to find vanity address after {attempts:,} attempts")
-        return None, attempts, time_taken
+        if keypair:
+            print(f"✅ Found vanity address after {attempts:,} attempts in {time_taken:.2f} seconds")
+        else:
+            print(f"❌ Failed to find vanity address after {attempts:,} attempts")
+        return keypair, attempts, time_taken
     
-    def validate_prefix(self, prefix: str) -> Tuple[bool, str]:
+    def validate_prefix(self, prefix: str, name: str = "prefix",
+                        case_sensitive: bool = True) -> Tuple[bool, str]:
         """
         Validate the vanity address prefix.
         
         Args:
             prefix (str): The prefix to validate
+            name (str): What to call the value in error messages
+            case_sensitive (bool): If False, a letter is valid when either case is
             
         Returns:
             Tuple[bool, str]: (is_valid, error_message)
         """
         if not prefix:
-            return False, "Prefix cannot be empty"
+            return False, f"{name.capitalize()} cannot be empty"
         
-        if len(prefix) > 8:
-            return False, "Prefix cannot be longer than 8 characters"
+        if len(prefix) > MAX_PATTERN_LENGTH:
+            return False, f"{name.capitalize()} cannot be longer than {MAX_PATTERN_LENGTH} characters"
         
         # Check if prefix contains only valid characters (base58 alphabet)
-        valid_chars = set("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz")
+        valid_chars = set(BASE58_ALPHABET)
+        if not case_sensitive:
+            valid_chars |= set(BASE58_ALPHABET.upper()) | set(BASE58_ALPHABET.lower())
         invalid_chars = set(prefix) - valid_chars
         
         if invalid_chars:
-            return False, f"Invalid characters in prefix: {', '.join(invalid_chars)}"
+            return False, f"Invalid characters in {name}: {', '.join(invalid_chars)}"
+        
+        return True, ""
+    
+    def validate_pattern(self, prefix: str, suffix: str = "",
+                         case_sensitive: bool = True) -> Tuple[bool, str]:
+        """
+        Validate a prefix and suffix pair; at least one must be given.
+        
+        Args:
+            prefix (str): The prefix to validate (may be empty)
+            suffix (str): The suffix to validate (may be empty)
+            case_sensitive (bool): Whether letters must match in case
+            
+        Returns:
+            Tuple[bool, str]: (is_valid, error_message)
+        """
+        if not prefix and not suffix:
+            return False, "Prefix or suffix is required"
+        
+        for name, value in (("prefix", prefix), ("suffix", suffix)):
+            if value:
+                is_valid, error_message = self.validate_prefix(value, name, case_sensitive)
+                if not is_valid:
+                    return False, error_message
+        
+        if len(prefix) + len(suffix) > MAX_PATTERN_LENGTH:
+            return False, f"Prefix and suffix together cannot be longer than {MAX_PATTERN_LENGTH} characters"
         
         return True, ""
     
@@ -116,37 +791,111 @@ class SolanaVanityGenerator:
 """
         return info
     
-    def estimate_generation_time(self, prefix: str) -> str:
+    def measure_keys_per_second(self, duration: float = RATE_SAMPLE_SECONDS) -> float:
+        """
+        Measure this host's search throughput.
+        
+        Times the key backend on one core for ``duration`` seconds and scales
+        by the worker count; the result is cached for later estimates.
+        
+        Args:
+            duration (float): Seconds to sample for
+            
+        Returns:
+            float: Estimated keys per second across all workers
+        """
+        source = KeySource(self.backend)
+        keys = 0
+        start_time = time.perf_counter()
+        while time.perf_counter() - start_time < duration:
+            for keypair in source.derive(256):
+                keypair.to_bytes()
+            keys += 256
+        self.keys_per_second = keys / (time.perf_counter() - start_time) * self.workers
+        return self.keys_per_second
+    
+    def estimate(self, prefix: str, suffix: str = "", case_sensitive: bool = True,
+                 keys_per_second: Optional[float] = None) -> Dict[str, float]:
+        """
+        Estimate the time-to-result distribution of a search.
+        
+        Each attempt matches independently with the pattern's exact match
+        probability p, so the attempts needed follow a geometric distribution:
+        the q-quantile is ``log(1 - q) / log(1 - p)``.
+        
+        Args:
+            prefix (str): The desired prefix
+            suffix (str): The desired suffix
+            case_sensitive (bool): Whether letters must match in case
+            keys_per_second (Optional[float]): Measured throughput of the engine
+                that will run the search. If None, this generator's rate is used,
+                measured here (blocking for ``RATE_SAMPLE_SECONDS``) if unknown;
+                async callers should pass the engine's rate instead
+            
+        Returns:
+            Dict[str, float]: probability, expected_attempts, keys_per_second,
+            median_seconds, p90_seconds, p99_seconds and success_probability
+            (chance of a match within ``max_attempts``)
+        
+        Raises:
+            ValueError: If the pattern can never match or ``keys_per_second`` is not positive
+        """
+        probability = PatternMatcher(prefix, suffix, case_sensitive).match_probability()
+        if probability <= 0:
+            raise ValueError("Pattern can never match")
+        if keys_per_second is None:
+            keys_per_second = self.keys_per_second or self.measure_keys_per_second()
+        if keys_per_second <= 0:
+            raise ValueError("Throughput not known yet")
+        rate = keys_per_second
+        
+        def quantile_seconds(q: float) -> float:
+            if probability >= 1:
+                return 1 / rate
+            return math.log1p(-q) / math.log1p(-probability) / rate
+        
+        return {
+            'probability': probability,
+            'expected_attempts': 1 / probability,
+            'keys_per_second': rate,
+            'median_seconds': quantile_seconds(0.5),
+            'p90_seconds': quantile_seconds(0.9),
+            'p99_seconds': quantile_seconds(0.99),
+            'success_probability': -math.expm1(self.max_attempts * math.log1p(-probability))
+            if probability < 1 else 1.0,
+        }
+    
+    def estimate_generation_time(self, prefix: str, suffix: str = "", case_sensitive: bool = True,
+                                 keys_per_second: Optional[float] = None) -> str:
         """
         Estimate the time needed to generate a vanity address.
         
         Args:
             prefix (str): The desired prefix
+            suffix (str): The desired suffix
+            case_sensitive (bool): Whether letters must match in case
+            keys_per_second (Optional[float]): Measured throughput of the engine (see :meth:`estimate`)
             
         Returns:
             str: Estimated time information
         """
-        if not prefix:
+        if not prefix and not suffix:
+            return "Invalid prefix"
+        if keys_per_second is not None and keys_per_second <= 0:
+            return "Unknown (no throughput measured yet)"
+        
+        try:
+            estimate = self.estimate(prefix, suffix, case_sensitive, keys_per_second)
+        except ValueError:
             return "Invalid prefix"
         
-        # Rough estimation based on prefix length
-        # This is a simplified estimation
-        length = len(prefix)
-        
-        if length <= 2:
-            return "~1-10 seconds"
-        elif length == 3:
-            return "~10-60 seconds"
-        elif length == 4:
-            return "~1-10 minutes"
-        elif length == 5:
-            return "~10-60 minutes"
-        elif length == 6:
-            return "~1-10 hours"
-        elif length == 7:
-            return "~10-100 hours"
-        else:  # length == 8
-            return "~100+ hours (very long)"
+        median = format_duration(estimate['median_seconds'])
+        text = (f"{median if median.startswith('<') else '~' + median} "
+                f"(90%: {format_duration(estimate['p90_seconds'])}, "
+                f"99%: {format_duration(estimate['p99_seconds'])})")
+        if estimate['success_probability'] < 0.5:
+            text += f", {estimate['success_probability']:.0%} chance within {self.max_attempts:,} attempts"
+        return text
     
     def format_private_key(self, keypair: Keypair) -> str:
         """